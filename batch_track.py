@@ -0,0 +1,131 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import yaml
+
+from track import init_worker, load_class_names, track_worker
+from utils.export_backend import resolve_backend
+from utils.run_registry import resolve_model
+from utils.video import video_info
+
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv')
+
+
+def find_videos(batch_source):
+    """
+    展开目录或通配符为视频文件列表
+
+    参数:
+    batch_source: 视频目录，或如 videos/*.MP4 的通配符
+    """
+    if os.path.isdir(batch_source):
+        pattern = os.path.join(batch_source, "*")
+    else:
+        pattern = batch_source
+    return sorted(f for f in glob.glob(pattern) if f.lower().endswith(VIDEO_EXTS))
+
+
+def run_batch(config):
+    """
+    用进程池批量追踪一个目录(或通配符)下的全部视频
+
+    按视频时长从长到短提交任务(最长处理时间优先)，使各进程负载均衡；
+    每个视频的结果写入 project/track_name/<视频名>/
+    """
+    videos = find_videos(config['batch_source'])
+    if not videos:
+        print(f"错误: 在 {config['batch_source']} 中未找到视频")
+        return None
+
+    # 按时长降序排列
+    durations = {}
+    for v in videos:
+        info = video_info(v)
+        durations[v] = info['frame_count'] / info['fps'] if info['fps'] else 0.0
+    videos.sort(key=lambda v: durations[v], reverse=True)
+
+    workers = min(config.get('batch_workers', os.cpu_count() or 1), len(videos))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    out_root = os.path.join(config.get('project', 'runs/track'), config.get('track_name', 'exp'))
+    print(f"共 {len(videos)} 个视频, 总时长 {sum(durations.values()) / 60:.1f} 分钟, "
+          f"{workers} 个进程 x {threads} 线程")
+
+    start = time.perf_counter()
+    records = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(config, threads)) as pool:
+        futures = {
+            pool.submit(track_worker, v,
+                        os.path.join(out_root, os.path.splitext(os.path.basename(v))[0], 'tracks')): v
+            for v in videos
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"处理 {futures[future]} 时出错: {e}")
+                continue
+            records.append(record)
+            print(f"完成 {record['video']}: {record['frames']} 帧, "
+                  f"{record['frames'] / max(record['elapsed_s'], 1e-9):.2f} FPS (进程 {record['pid']})")
+    wall = time.perf_counter() - start
+
+    # 汇总每个进程的吞吐
+    per_worker = {}
+    for r in records:
+        w = per_worker.setdefault(r['pid'], {'videos': 0, 'frames': 0, 'busy_s': 0.0})
+        w['videos'] += 1
+        w['frames'] += r['frames']
+        w['busy_s'] += r['elapsed_s']
+    for w in per_worker.values():
+        w['fps'] = w['frames'] / w['busy_s'] if w['busy_s'] > 0 else 0.0
+
+    total_frames = sum(r['frames'] for r in records)
+    summary = {
+        'videos': records,
+        'workers': {str(pid): w for pid, w in per_worker.items()},
+        'total_frames': total_frames,
+        'wall_s': wall,
+        'fps': total_frames / wall if wall > 0 else 0.0,
+    }
+    os.makedirs(out_root, exist_ok=True)
+    summary_path = os.path.join(out_root, 'batch_summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"\n批处理完成: {len(records)}/{len(videos)} 个视频, {total_frames} 帧, "
+          f"总吞吐 {summary['fps']:.2f} FPS, 用时 {wall:.1f}s")
+    for pid, w in per_worker.items():
+        print(f"  进程 {pid}: {w['videos']} 个视频, {w['frames']} 帧, {w['fps']:.2f} FPS")
+    print(f"汇总已保存到 {summary_path}")
+    return summary
+
+
+def main():
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    if not config.get('batch_source'):
+        print("错误：配置文件中缺少 'batch_source' 项，请指定视频目录或通配符！")
+        return
+
+    # 在启动工作进程前选好模型(登记表)和推理后端(导出与测速)，各进程不再重复测量
+    config = resolve_model(config)
+    if config is None:
+        return
+    if config.get('inference_backend', 'pt') != 'pt':
+        config = resolve_backend(config, load_class_names(config.get('data', 'datasets/dataset.yaml')))
+
+    run_batch(config)
+
+
+if __name__ == "__main__":
+    main()
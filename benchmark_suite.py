@@ -0,0 +1,211 @@
+import contextlib
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import yaml
+
+from utils.baseline import compare_metrics, flatten_metrics, load_baseline, save_baseline
+from utils.detection import Detections, tracks_to_rows
+from utils.displacement import refine_track_centers
+from utils.label_store import LabelStore
+from utils.profiler import StageProfiler
+from utils.static_tracker import StaticTracker
+from utils.synthetic import (
+    boxes_from_centers,
+    is_dataset_complete,
+    make_labelme_dataset,
+    make_yolo_dataset,
+    marker_trajectories,
+    tracks_from_centers,
+    write_marker_video,
+)
+
+
+def prepare_data(data_dir, frames, markers, images):
+    """生成(或复用已生成的)合成视频、图像序列和数据集，返回各路径与真值轨迹"""
+    centers = marker_trajectories(frames, markers, seed=0)
+    paths = {
+        'frames': os.path.join(data_dir, 'markers_png'),
+        'video': os.path.join(data_dir, 'markers.mp4'),
+        'labelme': os.path.join(data_dir, 'labelme'),
+        'yolo': os.path.join(data_dir, 'yolo'),
+    }
+    if not is_dataset_complete(paths['frames'], frames):
+        write_marker_video(paths['frames'], centers, seed=0)
+    if not is_dataset_complete(paths['video'], frames):
+        write_marker_video(paths['video'], centers, seed=0)
+    if not is_dataset_complete(os.path.join(paths['labelme'], 'images'), images):
+        make_labelme_dataset(paths['labelme'], images, markers, seed=1)
+    if not is_dataset_complete(os.path.join(paths['yolo'], 'images'), images):
+        make_yolo_dataset(paths['yolo'], images, markers, seed=2)
+    return paths, centers
+
+
+def bench_displacement(source, centers):
+    """亚像素位移精度: 以整像素检测框为输入，比较细化后的位移与真值"""
+    tracks = tracks_from_centers(centers)
+    frames, markers = centers.shape[:2]
+    true = centers - centers[:1]
+    report = {}
+    for method in ['none', 'centroid', 'correlation']:
+        t0 = time.perf_counter()
+        cx, cy = refine_track_centers(source, tracks, method=method)
+        elapsed = time.perf_counter() - t0
+        est = np.stack([cx, cy], axis=1).reshape(frames, markers, 2)
+        err = np.hypot(*np.moveaxis((est - est[:1]) - true, 2, 0))
+        report[method] = {'rmse_px': float(np.sqrt(np.mean(err ** 2))), 'max_px': float(err.max())}
+        if method != 'none':
+            report[method]['rows_per_s'] = len(cx) / elapsed if elapsed > 0 else 0.0
+    return report
+
+
+def bench_tracker(centers, seed=0):
+    """内置 static 追踪器在加噪声的真值检测上的单帧耗时和ID稳定性"""
+    rng = np.random.default_rng(seed)
+    tracker = StaticTracker()
+    latency = []
+    ids = set()
+    for c in centers:
+        xyxy = boxes_from_centers(c + rng.normal(0, 0.3, c.shape))
+        dets = Detections(xyxy, rng.uniform(0.5, 0.95, len(c)), np.zeros(len(c)))
+        t0 = time.perf_counter()
+        rows = tracks_to_rows(tracker.update(dets))
+        latency.append(time.perf_counter() - t0)
+        ids.update(rows[:, 0].astype(int).tolist())
+    latency = np.array(latency) * 1000
+    return {
+        'update_fps': len(latency) / (latency.sum() / 1000),
+        'p95_ms': float(np.percentile(latency, 95)),
+        'extra_ids': len(ids) - centers.shape[1],
+    }
+
+
+def bench_tracking(config, source, out_dir):
+    """用随机初始化的小模型(不需下载权重)在CPU上跑完整的流水线追踪，测吞吐和延迟"""
+    try:
+        import torch
+        from ultralytics import YOLO
+
+        from track import build_predict_args, track_video
+    except ImportError as e:
+        print(f"跳过追踪吞吐测试: {e}")
+        return None
+
+    torch.manual_seed(0)
+    model = YOLO(config.get('benchmark_model', 'yolov8n.yaml'))
+    predict_args = dict(build_predict_args(config, {0: 'target'}), device='cpu',
+                        imgsz=config.get('benchmark_imgsz', 320))
+    run_config = dict(config, source=source, tracker='static', pipeline=True, save=False,
+                      keyframe_interval=1, roi_mode=False, tile_mode=False, motion_gate=False,
+                      checkpoint_interval=0, resume=False)
+    profiler = StageProfiler()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        track_video(model, run_config, predict_args, os.path.join(out_dir, 'tracks'), profiler=profiler)
+    report = profiler.report()
+    return {
+        'fps': report['fps'],
+        'p50_ms': report['latency_ms']['p50'],
+        'p95_ms': report['latency_ms']['p95'],
+        'peak_rss_mb': report['peak_rss_mb'],
+    }
+
+
+def bench_conversion(labelme_dir, out_dir):
+    """LabelMe -> YOLO 全量转换吞吐，以及没有文件变化时增量重跑的耗时"""
+    from utils.convert_labelme_to_yolo import convert_labelme_to_yolo
+
+    json_dir, img_dir = os.path.join(labelme_dir, 'json'), os.path.join(labelme_dir, 'images')
+    json_files = glob.glob(os.path.join(json_dir, '*.json'))
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        t0 = time.perf_counter()
+        convert_labelme_to_yolo(json_dir, img_dir, out_dir, force=True)
+        elapsed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        convert_labelme_to_yolo(json_dir, img_dir, out_dir)
+        rescan = time.perf_counter() - t0
+    return {'images_per_s': len(json_files) / elapsed if elapsed > 0 else 0.0, 'rescan_ms': rescan * 1000}
+
+
+def bench_label_loading(labels_dir, repeat=3):
+    """
+    标签读取吞吐: 逐文件 np.loadtxt、LabelStore 全量解析、以及从内存映射缓存加载并做全数据集查询
+    (取 repeat 次中最快的一次，减少文件缓存带来的波动)
+    """
+    label_files = sorted(glob.glob(os.path.join(labels_dir, '*.txt')))
+    elapsed = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        boxes = sum(len(np.loadtxt(p, ndmin=2)) for p in label_files)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+
+    build = cached = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        LabelStore.build(labels_dir)
+        build = min(build, time.perf_counter() - t0)
+        LabelStore.load(labels_dir)  # 确保缓存存在
+        t0 = time.perf_counter()
+        store = LabelStore.load(labels_dir)
+        store.class_counts()
+        store.empty()
+        cached = min(cached, time.perf_counter() - t0)
+    return {'files_per_s': len(label_files) / elapsed, 'boxes_per_s': boxes / elapsed,
+            'store_files_per_s': len(label_files) / build, 'store_cached_query_ms': cached * 1000}
+
+
+def main():
+    """
+    可复现的离线基准测试: 生成已知亚像素位移的合成视频和合成数据集，
+    测量追踪、数据转换、标签读取的吞吐/延迟以及位移精度，并与JSON基线比较
+    """
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return 1
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    out_dir = config.get('benchmark_dir', 'runs/benchmark')
+    baseline_path = config.get('benchmark_baseline', 'benchmarks/baseline.json')
+    frames = config.get('benchmark_frames', 1000)
+    paths, centers = prepare_data(os.path.join(out_dir, 'data'), frames,
+                                  markers=config.get('benchmark_markers', 6),
+                                  images=config.get('benchmark_images', 200))
+
+    results = {'displacement': bench_displacement(paths['frames'], centers),
+               'tracker': bench_tracker(centers)}
+    tracking = bench_tracking(config, paths['video'], out_dir)
+    if tracking is not None:
+        results['tracking'] = tracking
+    results['conversion'] = bench_conversion(paths['labelme'], os.path.join(out_dir, 'converted'))
+    results['label_loading'] = bench_label_loading(os.path.join(paths['yolo'], 'labels'))
+
+    metrics = flatten_metrics(results)
+    save_baseline(os.path.join(out_dir, 'benchmark.json'), metrics)
+    baseline = load_baseline(baseline_path)
+    if baseline is None or config.get('benchmark_update_baseline', False):
+        save_baseline(baseline_path, metrics)
+        print(f"基线已写入 {baseline_path}")
+        for name, value in metrics.items():
+            print(f"  {name:<40}{value:>14.4f}")
+        return 0
+
+    rows = compare_metrics(metrics, baseline, tolerance=config.get('benchmark_tolerance', 0.1))
+    print(f"\n{'指标':<40}{'基线':>14}{'本次':>14}{'变化':>10}")
+    for r in rows:
+        flag = '  <-- 退化' if r['regressed'] else ''
+        print(f"{r['metric']:<40}{r['baseline']:>14.4f}{r['current']:>14.4f}{r['change']:>10.1%}{flag}")
+    regressed = [r['metric'] for r in rows if r['regressed']]
+    if regressed:
+        print(f"\n{len(regressed)} 项指标相对基线 {baseline_path} 退化: {', '.join(regressed)}")
+        return 1
+    print(f"\n全部 {len(rows)} 项指标均在基线容差内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
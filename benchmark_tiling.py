@@ -0,0 +1,92 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+from track import build_predict_args, load_class_names
+from utils.boxes import load_gt_boxes, match_recall
+from utils.detection import FrameDetector
+from utils.tiling import TiledDetector
+from utils.video import iter_frames, list_images
+
+
+def main():
+    """比较整帧推理与切片推理的单帧延迟和召回率"""
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    source = config['source']
+    model_path = config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')
+    if not os.path.exists(model_path):
+        print(f"错误: 模型文件 {model_path} 不存在!")
+        return
+    model = YOLO(model_path)
+    predict_args = build_predict_args(config, load_class_names(config.get('data', 'datasets/dataset.yaml')))
+
+    # 标签目录: 默认与图像目录同级的 labels
+    labels_dir = config.get('tiling_labels') or os.path.join(os.path.dirname(os.path.normpath(source)), 'labels')
+    image_paths = [Path(p) for p in list_images(source)] if os.path.isdir(source) else []
+
+    detectors = {
+        'full': FrameDetector(model, predict_args),
+        'tiled': TiledDetector(model, predict_args, tile_size=config.get('tile_size', 640),
+                               overlap=config.get('tile_overlap', 0.2)),
+    }
+    stats = {name: {'latency': [], 'hits': 0, 'detections': 0} for name in detectors}
+    gt_total = 0
+
+    max_frames = config.get('benchmark_frames', 1000)
+    for frame_idx, frame in iter_frames(source, 0, max_frames):
+        gt = None
+        if frame_idx < len(image_paths):
+            gt = load_gt_boxes(os.path.join(labels_dir, f"{image_paths[frame_idx].stem}.txt"),
+                               frame.shape[1], frame.shape[0])
+        if gt is not None:
+            gt_total += len(gt)
+        for name, detector in detectors.items():
+            t0 = time.perf_counter()
+            dets = detector(frame)
+            stats[name]['latency'].append(time.perf_counter() - t0)
+            stats[name]['detections'] += len(dets)
+            if gt is not None:
+                order = np.argsort(-dets.conf)
+                stats[name]['hits'] += match_recall(dets.xyxy[order], gt)
+
+    report = {'source': source, 'gt_boxes': gt_total, 'tile_size': config.get('tile_size', 640),
+              'tile_overlap': config.get('tile_overlap', 0.2), 'modes': {}}
+    print(f"\n{'模式':<8}{'平均ms':>10}{'p95 ms':>10}{'检测数':>10}{'召回率':>10}")
+    for name, s in stats.items():
+        latency = np.array(s['latency'])
+        recall = s['hits'] / gt_total if gt_total else float('nan')
+        report['modes'][name] = {
+            'frames': len(latency),
+            'mean_ms': float(latency.mean() * 1e3) if len(latency) else 0.0,
+            'p95_ms': float(np.percentile(latency, 95) * 1e3) if len(latency) else 0.0,
+            'detections': s['detections'],
+            'recall': recall,
+            **detectors[name].summary(),
+        }
+        m = report['modes'][name]
+        print(f"{name:<8}{m['mean_ms']:>10.1f}{m['p95_ms']:>10.1f}{m['detections']:>10}{recall:>10.3f}")
+    if not gt_total:
+        print(f"未找到标签目录 {labels_dir}，无法计算召回率")
+
+    out_dir = os.path.join(config.get('project', 'runs/track'), config.get('track_name', 'exp'))
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, 'tiling_benchmark.json')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"基准结果已保存到 {out_path}")
+
+
+if __name__ == "__main__":
+    main()
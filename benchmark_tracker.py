@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+from track import build_predict_args, build_tracker, load_class_names
+from utils.detection import detect_frames, tracks_to_rows
+from utils.track_io import TRACK_COLUMNS, id_switch_stats
+from utils.video import iter_frames, video_info
+
+
+def run_tracker(tracker, detections, frames):
+    """
+    在同一份检测结果上运行追踪器，统计每帧 update() 的耗时
+
+    返回:
+    (轨迹列字典, 每帧耗时数组)
+    """
+    costs = np.empty(len(detections))
+    parts = []
+    for i, (frame_idx, dets) in enumerate(detections):
+        t0 = time.perf_counter()
+        tracks = tracker.update(dets, frames.get(frame_idx))
+        costs[i] = time.perf_counter() - t0
+        rows = tracks_to_rows(tracks)
+        if len(rows):
+            parts.append(np.column_stack([np.full(len(rows), frame_idx), rows, np.zeros(len(rows))]))
+
+    data = np.vstack(parts) if parts else np.empty((0, len(TRACK_COLUMNS)))
+    return {col: data[:, i] for i, col in enumerate(TRACK_COLUMNS)}, costs
+
+
+def main():
+    """在同一视频的检测结果上比较 ByteTrack 与内置 static 追踪器的每帧开销和ID切换"""
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    source = config['source']
+    model_path = config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')
+    if not os.path.exists(model_path):
+        print(f"错误: 模型文件 {model_path} 不存在!")
+        return
+    model = YOLO(model_path)
+    predict_args = build_predict_args(config, load_class_names(config.get('data', 'datasets/dataset.yaml')))
+    info = video_info(source)
+
+    # 检测只运行一次，所有追踪器共用同一份检测结果
+    max_frames = config.get('benchmark_frames', 1000)
+    detections = []
+    frames = {}
+    print(f"检测 {source} 的前 {max_frames} 帧...")
+    for frame_idx, frame in iter_frames(source, 0, max_frames):
+        detections.append((frame_idx, detect_frames(model, [frame], **predict_args)[0]))
+        # BOTSORT的相机运动补偿需要图像，其他追踪器不使用
+        frames[frame_idx] = frame if config.get('tracker', '').startswith('botsort') else None
+
+    jump = config.get('static_max_displacement', 15.0)
+    report = {'source': source, 'frames': len(detections), 'trackers': {}}
+    for name in [config.get('tracker', 'bytetrack.yaml'), 'static']:
+        if name in report['trackers']:
+            continue
+        tracker = build_tracker(dict(config, tracker=name), info['fps'])
+        tracks, costs = run_tracker(tracker, detections, frames)
+        stats = id_switch_stats(tracks, jump_threshold=jump)
+        stats.update({
+            'mean_ms': float(costs.mean() * 1e3) if len(costs) else 0.0,
+            'p95_ms': float(np.percentile(costs, 95) * 1e3) if len(costs) else 0.0,
+            'total_s': float(costs.sum()),
+        })
+        report['trackers'][name] = stats
+
+    print(f"\n{'追踪器':<16}{'平均ms':>10}{'p95 ms':>10}{'ID数':>8}{'新ID':>8}{'位移尖峰':>10}")
+    for name, s in report['trackers'].items():
+        print(f"{name:<16}{s['mean_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['ids']:>8}{s['new_ids']:>8}{s['jumps']:>10}")
+
+    out_dir = os.path.join(config.get('project', 'runs/track'), config.get('track_name', 'exp'))
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, 'tracker_benchmark.json')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"基准结果已保存到 {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
-import os
 import glob
-import shutil
+import os
 from pathlib import Path
 
+from utils.dataset_sync import sync_dataset
+from utils.label_store import LabelStore
+from utils.split import split_dataset
+
+
 def check_dataset():
     """检查数据集完整性并修复图片与标注不匹配的问题"""
     # 设置路径
@@ -12,71 +16,78 @@ def check_dataset():
     
     # 创建必要的目录
     os.makedirs(labels_dir, exist_ok=True)
-    os.makedirs("data/fixed_dataset/images", exist_ok=True)
-    os.makedirs("data/fixed_dataset/labels", exist_ok=True)
     
     # 获取所有图片和标签文件
     image_files = glob.glob(os.path.join(images_dir, "*.png")) + \
                   glob.glob(os.path.join(images_dir, "*.jpg"))
-    label_files = glob.glob(os.path.join(labels_dir, "*.txt"))
+    labels = LabelStore.load(labels_dir)
     
     # 创建文件名到路径的映射
-    label_map = {Path(label_path).stem: label_path for label_path in label_files}
+    label_map = {name: os.path.join(labels_dir, f"{name}.txt") for name in labels.names}
     
-    print(f"找到 {len(image_files)} 张图片和 {len(label_files)} 个标签文件")
+    print(f"找到 {len(image_files)} 张图片和 {len(labels)} 个标签文件 (共 {labels.num_boxes} 个框)")
+    print(f"各类别框数: {labels.class_counts()}")
+    empty = labels.empty()
+    if empty:
+        print(f"空标签文件: {len(empty)} 个, 前5个: {empty[:5]}")
     
     # 检查每个图片是否有对应的标签文件
-    matched_pairs = 0
+    pairs = {}
     unmatched_images = []
     
     for img_path in image_files:
         img_name = Path(img_path).stem
         
         if img_name in label_map:
-            matched_pairs += 1
-            
-            # 复制匹配的图片和标签到固定数据集
-            shutil.copy(img_path, f"data/fixed_dataset/images/{img_name}.png")
-            shutil.copy(label_map[img_name], f"data/fixed_dataset/labels/{img_name}.txt")
-            
+            # 同名的png和jpg只保留先找到的png
+            pairs.setdefault(img_name, (img_name, img_path, label_map[img_name]))
         else:
             unmatched_images.append(img_name)
+    matched_pairs = len(pairs)
+    orphan_labels = sorted(set(label_map) - {Path(p).stem for p in image_files})
     
     print(f"匹配的图片和标注对: {matched_pairs}")
     print(f"未匹配的图片数量: {len(unmatched_images)}")
     if unmatched_images:
         print("前5个未匹配的图片:", unmatched_images[:5])
     
+    # 增量同步匹配的图片和标签到固定数据集: 未变化的文件跳过，变化的文件在多进程中校验后
+    # 硬链接/复制，jpg解码后重新编码为png，上次同步过、本次不再有效的文件被删除
+    report = sync_dataset(
+        list(pairs.values()), "data/fixed_dataset",
+        extra_report={'unmatched_images': sorted(unmatched_images), 'labels_without_image': orphan_labels,
+                      'empty_labels': empty},
+    )
+    matched_pairs = report['valid']
+    print(f"同步完成: 未变化 {report['unchanged']}, 更新 {report['synced']} (硬链接 {report['hardlink']}, "
+          f"复制 {report['copy']}, 重新编码 {report['encode']}), 删除孤儿 {report['removed']}")
+    if report['invalid_pairs']:
+        print(f"无效的图片/标签对: {len(report['invalid_pairs'])} 个 (已排除)")
+        for name, errors in list(report['invalid_pairs'].items())[:5]:
+            print(f"  {name}: {'; '.join(errors)}")
+    if report['duplicate_images']:
+        print(f"内容完全相同的图片: {len(report['duplicate_images'])} 组")
+    if report['untracked_files']:
+        print(f"目标目录中有 {len(report['untracked_files'])} 个不属于清单的图片/标签文件，未删除，"
+              f"如果不需要请手动清理: {report['untracked_files'][:5]}")
+    print("一致性报告已保存到 data/fixed_dataset/consistency_report.json")
+    
     # 创建训练和验证集文件列表
     if matched_pairs > 0:
         create_train_val_split("data/fixed_dataset")
 
 def create_train_val_split(dataset_dir, val_ratio=0.2):
-    """创建训练和验证集文件列表"""
+    """创建训练和验证集文件列表(按来源视频分组的确定性划分，已有图像不会在两侧之间移动)"""
     images_dir = os.path.join(dataset_dir, "images")
-    image_files = [os.path.join("data/fixed_dataset/images", f) for f in os.listdir(images_dir)]
+    image_files = [os.path.join(images_dir, f) for f in sorted(os.listdir(images_dir))]
     
     if not image_files:
         print("错误: 没有找到匹配的图片文件，无法创建训练和验证集")
         return
     
-    # 随机打乱
-    import random
-    random.shuffle(image_files)
-    
-    # 分割
-    split_idx = int(len(image_files) * (1 - val_ratio))
-    train_files = image_files[:split_idx]
-    val_files = image_files[split_idx:]
-    
-    # 写入文件
-    with open(os.path.join(dataset_dir, "train.txt"), 'w') as f:
-        f.write("\n".join(train_files))
-    
-    with open(os.path.join(dataset_dir, "val.txt"), 'w') as f:
-        f.write("\n".join(val_files))
+    splits = split_dataset(image_files, dataset_dir, val_ratio=val_ratio)
     
-    print(f"创建了训练集 ({len(train_files)}个文件) 和验证集 ({len(val_files)}个文件)")
+    print(f"创建了训练集 ({len(splits['train'])}个文件) 和验证集 ({len(splits['val'])}个文件)")
 
 if __name__ == "__main__":
     check_dataset()
@@ -1,11 +1,97 @@
 import os
+import time
+from pathlib import Path
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
-import matplotlib.pyplot as plt
 import yaml
-from pathlib import Path
-import torch
+from PIL import Image
+
+from utils.detection import Detections
+from utils.inference_server import RemoteModel, load_model
+from utils.label_store import LabelStore
+from utils.prediction_cache import PredictionCache
+from utils.profiler import StageProfiler
+from utils.run_registry import resolve_model
+from utils.sweep import best_operating_point, sweep_thresholds, write_sweep_csv
+from utils.video import list_images
+
+
+def run_threshold_sweep(model, model_path, config, test_dir, profiler):
+    """
+    阈值扫描: 整个测试目录按批只推理一次(最低置信度、几乎不做NMS)，
+    再对 conf x iou 网格向量化地重新过滤，统计检测数和精确率/召回率/F1
+    
+    标签默认取测试目录同级的 labels 目录(sweep_labels 可指定)，没有标签文件的图像不参与统计。
+    结果表保存为模型训练目录下的 threshold_sweep.csv
+    
+    返回:
+    最佳工作点字典，没有可用标签时返回 None
+    """
+    conf_grid = np.asarray(config.get('sweep_conf') or np.round(np.arange(0.01, 1.0, 0.01), 2))
+    iou_grid = np.asarray(config.get('sweep_iou') or np.round(np.arange(0.1, 0.95, 0.05), 2))
+    # 原始检测不做NMS(iou=1.0 不抑制任何框)，网格中每个IoU阈值的NMS都与直接推理一致
+    raw_conf, raw_iou = float(conf_grid.min()), 1.0
+    imgsz = config.get('track_imgsz') or config.get('imgsz', 640)
+    batch_size = config.get('batch_size', 8)
+    labels_dir = config.get('sweep_labels') or os.path.join(os.path.dirname(os.path.normpath(test_dir)), 'labels')
+    
+    labels = LabelStore.load(labels_dir) if os.path.isdir(labels_dir) else None
+    image_paths, gts = [], []
+    for img_path in list_images(test_dir):
+        if labels is None or Path(img_path).stem not in labels:
+            continue
+        with Image.open(img_path) as img:  # 只读取文件头获取尺寸
+            width, height = img.size
+        image_paths.append(img_path)
+        gts.append(labels.xyxy(Path(img_path).stem, width, height))
+    if not image_paths:
+        print(f"错误: 在 {labels_dir} 中找不到测试图像的标签，无法进行阈值扫描")
+        return None
+    print(f"\n阈值扫描: {len(image_paths)} 张带标签的图像, {len(conf_grid)} 个置信度 x {len(iou_grid)} 个IoU阈值")
+    
+    t0 = time.perf_counter()
+    with profiler.stage('predict'):
+        if config.get('prediction_cache', False):
+            cache = PredictionCache(
+                config.get('prediction_cache_dir', 'runs/cache/predictions'),
+                max_size_mb=config.get('prediction_cache_mb', 2048),
+                raw_conf=min(config.get('prediction_cache_conf', 0.001), raw_conf),
+                raw_iou=raw_iou,
+            )
+            raw = cache.predict_raw(model, image_paths, model_path, imgsz=imgsz, device='cpu',
+                                    batch_size=batch_size)
+            print(f"预测缓存: 命中 {cache.hits}, 未命中 {cache.misses}")
+        else:
+            raw = []
+            for s in range(0, len(image_paths), batch_size):
+                results = model.predict(image_paths[s:s + batch_size], conf=raw_conf, iou=raw_iou, imgsz=imgsz,
+                                        device='cpu', max_det=1000, verbose=False)
+                profiler.record_speed(results)
+                raw.extend(Detections.from_result(r) for r in results)
+    profiler.batch_done(time.perf_counter() - t0, len(image_paths))
+    
+    with profiler.stage('sweep'):
+        table = sweep_thresholds(raw, gts, conf_grid, iou_grid, match_iou=config.get('sweep_match_iou', 0.5))
+    out_path = os.path.join(os.path.dirname(os.path.dirname(model_path)), 'threshold_sweep.csv')
+    write_sweep_csv(out_path, table)
+    
+    # 每个IoU阈值下F1最高的置信度
+    print(f"\n{'IoU':>6}{'最佳conf':>10}{'检测数':>8}{'精确率':>8}{'召回率':>8}{'F1':>8}")
+    for k, iou in enumerate(iou_grid):
+        j = table['f1'][k].argmax()
+        print(f"{iou:>6.2f}{conf_grid[j]:>10.3f}{table['detections'][k, j]:>8}"
+              f"{table['precision'][k, j]:>8.3f}{table['recall'][k, j]:>8.3f}{table['f1'][k, j]:>8.3f}")
+    
+    best = best_operating_point(table, min_recall=config.get('sweep_min_recall', 0.0))
+    if best is None:
+        print(f"没有召回率达到 {config.get('sweep_min_recall', 0.0)} 的阈值组合")
+    else:
+        print(f"\n最佳工作点: conf={best['conf']:.3f}, iou={best['iou']:.2f}, "
+              f"P={best['precision']:.3f}, R={best['recall']:.3f}, F1={best['f1']:.3f} "
+              f"(TP {best['tp']}, FP {best['fp']}, FN {best['fn']}, 共 {table['gt']} 个真值框)")
+    print(f"完整扫描表已保存到 {out_path}")
+    return best
 
 def diagnose_model():
     """诊断模型检测失败的原因"""
@@ -13,7 +99,6 @@ def diagnose_model():
     
     # 强制使用CPU
     os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
-    torch.set_default_device('cpu')
     
     # 加载配置
     with open('config.yaml', 'r', encoding='utf-8') as f:
@@ -23,6 +108,14 @@ def diagnose_model():
     with open(config['data'], 'r', encoding='utf-8') as f:
         dataset_config = yaml.safe_load(f)
     
+    # 分阶段性能分析，报告保存在模型的训练目录中
+    profiler = StageProfiler(enabled=config.get('profile', False))
+    
+    # track_model 为 registry 时由登记表选择模型
+    config = resolve_model(config)
+    if config is None:
+        return
+    
     # 检查模型文件是否存在
     model_path = config.get('track_model', 'runs/detect/train_fixed3/weights/best.pt')
     if not os.path.exists(model_path):
@@ -37,7 +130,13 @@ def diagnose_model():
     
     # 加载模型 - 明确指定CPU设备
     print(f"加载模型: {model_path}")
-    model = YOLO(model_path)
+    with profiler.stage('load_model'):
+        # 配置了 inference_server 且服务在运行时只连接常驻服务，不在本进程中加载模型
+        model = load_model(config, model_path)
+    if not isinstance(model, RemoteModel):
+        import torch
+        
+        torch.set_default_device('cpu')
     
     # 查看模型结构信息
     print(f"模型任务: {model.task}")
@@ -70,18 +169,45 @@ def diagnose_model():
             print(f"测试图像尺寸: {test_img.shape}")
     
     # 尝试不同的置信度进行推理
-    print("\n尝试不同置信度进行推理...")
     confidence_levels = [0.01, 0.001, 0.0001]
+    if config.get('diagnose_sweep', False):
+        # 扫描模式代替下面对单张图像逐个置信度的推理
+        run_threshold_sweep(model, model_path, config, test_dir, profiler)
+        confidence_levels = []
+    else:
+        print("\n尝试不同置信度进行推理...")
+    cache = None
+    if confidence_levels and config.get('prediction_cache', False):
+        # 原始检测只推理一次并缓存，各置信度只重新过滤
+        cache = PredictionCache(
+            config.get('prediction_cache_dir', 'runs/cache/predictions'),
+            max_size_mb=config.get('prediction_cache_mb', 2048),
+            raw_conf=min(config.get('prediction_cache_conf', 0.001), min(confidence_levels)),
+        )
     for conf in confidence_levels:
         print(f"\n使用置信度阈值 {conf}:")
+        if cache is not None:
+            with profiler.frame():
+                with profiler.stage('predict'):
+                    dets = cache.predict(model, [test_img_path], model_path,
+                                         imgsz=config.get('track_imgsz') or config.get('imgsz', 640),
+                                         device='cpu', conf=conf, iou=0.01)[0]
+            print(f"检测到 {len(dets)} 个目标" if len(dets) else "未检测到任何目标")
+            for i in range(len(dets)):
+                print(f"  目标 {i+1}: 类别={model.names[int(dets.cls[i])]}, 置信度={dets.conf[i]:.4f}, "
+                      f"位置={dets.xyxy[i].tolist()}")
+            continue
         try:
-            results = model.predict(
-                source=test_img_path,
-                conf=conf,
-                iou=0.01,  # 非常低的IOU阈值
-                verbose=True,
-                device='cpu'  # 明确指定CPU设备
-            )
+            with profiler.frame():
+                with profiler.stage('predict'):
+                    results = model.predict(
+                        source=test_img_path,
+                        conf=conf,
+                        iou=0.01,  # 非常低的IOU阈值
+                        verbose=True,
+                        device='cpu'  # 明确指定CPU设备
+                    )
+            profiler.record_speed(results)
             
             if len(results) > 0:
                 boxes = results[0].boxes
@@ -97,9 +223,15 @@ def diagnose_model():
         except Exception as e:
             print(f"推理出错: {str(e)}")
     
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\n预测缓存: 命中 {stats['hits']}, 未命中 {stats['misses']}, 占用 {stats['size_mb']:.1f}MB")
+    
     # 尝试使用预训练模型
     print("\n尝试使用原始预训练模型进行比较...")
     try:
+        from ultralytics import YOLO
+        
         pretrained_model = YOLO("yolov8n.pt")
         results = pretrained_model.predict(
             source=test_img_path,
@@ -143,6 +275,8 @@ def diagnose_model():
     except Exception as e:
         print(f"检查训练日志时出错: {str(e)}")
     
+    profiler.save(os.path.dirname(os.path.dirname(model_path)), name='diagnose_profile')
+    
     # 建议下一步操作
     print("\n诊断完成!")
     print("\n建议:")
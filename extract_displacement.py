@@ -0,0 +1,70 @@
+import os
+import time
+
+import numpy as np
+import yaml
+
+from utils.displacement import displacement_series, refine_track_centers
+from utils.track_io import read_tracks
+
+
+def run_displacement(config, tracks_dir):
+    """
+    从轨迹块文件提取每个目标的位移时间序列并保存为 displacement.npz
+
+    参数:
+    config: 配置字典(source, subpixel_method, subpixel_patch, marker_polarity, pixel_to_mm, homography)
+    tracks_dir: 轨迹块文件目录
+    """
+    tracks = read_tracks(tracks_dir)
+    if len(tracks['frame']) == 0:
+        print(f"错误: {tracks_dir} 中没有轨迹数据")
+        return None
+
+    method = config.get('subpixel_method', 'centroid')
+    t0 = time.perf_counter()
+    cx, cy = refine_track_centers(
+        config['source'], tracks,
+        method=method,
+        patch_size=config.get('subpixel_patch', 32),
+        polarity=config.get('marker_polarity', 'bright'),
+    )
+    refine_s = time.perf_counter() - t0
+
+    series = displacement_series(
+        tracks, cx, cy,
+        pixel_to_mm=config.get('pixel_to_mm', 1.0),
+        homography=config.get('homography'),
+    )
+    out_path = os.path.join(os.path.dirname(os.path.normpath(tracks_dir)), 'displacement.npz')
+    np.savez(out_path, **series)
+
+    print(f"位移提取完成: {len(series['track_ids'])} 个目标, {len(series['frames'])} 帧, "
+          f"{len(tracks['frame'])} 条记录, 亚像素方法 {method} 用时 {refine_s:.1f}s")
+    peak = np.nanmax(np.hypot(series['dx'], series['dy']), axis=1)
+    for tid, p in zip(series['track_ids'], peak, strict=True):
+        print(f"  目标 {tid}: 最大位移 {p:.3f} mm")
+    print(f"结果已保存到 {out_path}")
+    return series
+
+
+def main():
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    tracks_dir = config.get('displacement_tracks') or os.path.join(
+        config.get('project', 'runs/track'), config.get('track_name', 'exp'), 'tracks')
+    if not os.path.isdir(tracks_dir):
+        print(f"错误: 轨迹目录 {tracks_dir} 不存在，请先运行 track.py")
+        return
+
+    run_displacement(config, tracks_dir)
+
+
+if __name__ == "__main__":
+    main()
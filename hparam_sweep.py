@@ -0,0 +1,67 @@
+import os
+
+import yaml
+
+from utils.hparam_search import SweepRunner, expand_space
+from utils.train_cache import TrainCache, dataset_split_files
+
+
+def prepare_caches(config, space, trials, seed):
+    """
+    训练缓存打开时，在启动试验前为每个不同的 imgsz 准备好缓存，
+    避免多个并行试验同时构建同一个缓存
+    """
+    sizes = sorted({p.get('imgsz', config['imgsz']) for p in expand_space(space, trials, seed)})
+    splits = dataset_split_files(config['data'])
+    for imgsz in sizes:
+        cache_dir = f"{config.get('train_cache_dir', 'data/train_cache')}_{imgsz}"
+        for split, files in splits.items():
+            _, stats = TrainCache.prepare(files, os.path.join(cache_dir, split), imgsz,
+                                          shard_size=config.get('train_cache_shard', 256),
+                                          workers=config.get('train_cache_workers'))
+            print(f"训练缓存 imgsz={imgsz} [{split}]: 重建 {stats['built']} 张, 沿用 {stats['reused']} 张")
+
+
+def main():
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    space = config.get('sweep_space')
+    if not space:
+        print("错误：配置文件中缺少 'sweep_space' 项，请指定要搜索的配置键及取值！")
+        return
+    unknown = [k for k in space if k not in config]
+    if unknown:
+        print(f"警告: 搜索空间中的 {', '.join(unknown)} 不在 config.yaml 中，train.py 可能不会使用")
+
+    trials = config.get('sweep_trials', 0)
+    seed = config.get('sweep_seed', 0)
+    if config.get('train_cache', False):
+        prepare_caches(config, space, trials, seed)
+
+    out_dir = os.path.join(config.get('project', 'runs/detect'), config.get('sweep_name', 'sweep'))
+    runner = SweepRunner(
+        config, space, out_dir, trials=trials, seed=seed,
+        parallel=config.get('sweep_parallel'),
+        threads=config.get('sweep_threads'),
+        epochs=config.get('sweep_epochs'),
+        warmup=config.get('sweep_prune_warmup', 5),
+        percentile=config.get('sweep_prune_percentile', 50.0),
+        min_trials=config.get('sweep_prune_min_trials', 3),
+        poll=config.get('sweep_poll', 10.0),
+    )
+    leaderboard = runner.run()
+
+    print(f"\n排行榜 (完整结果见 {os.path.join(out_dir, 'leaderboard.csv')}):")
+    for rank, t in enumerate(leaderboard[:10], start=1):
+        print(f"  {rank:>2}. {t['id']} [{t['status']}] mAP50 {t.get('best_map50', 0.0):.4f} "
+              f"mAP50-95 {t.get('best_map50_95', 0.0):.4f} ({len(t['curve'])} epochs) {t['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import time
+
+import yaml
+
+from utils.inference_server import InferenceServer
+
+
+def main():
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    threads = config.get('server_threads', 0)
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+
+    # 加载权重等同于反序列化 pickle: 只加载训练输出目录、追踪模型目录和预加载列表中的模型
+    preload = config.get('server_preload') or []
+    model_roots = [config.get('registry_runs', 'runs/detect'),
+                   os.path.dirname(config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')),
+                   *preload, *(config.get('server_model_dirs') or [])]
+    server = InferenceServer(max_batch=config.get('server_max_batch', 8),
+                             max_wait_ms=config.get('server_max_wait_ms', 10),
+                             idle_timeout=config.get('server_idle_timeout', 600),
+                             model_roots=[r for r in model_roots if r],
+                             allow_remote=config.get('server_allow_remote', False))
+    for weights in preload:
+        server.load(weights)
+    address = server.start(config.get('server_address', '127.0.0.1:8765'))
+    print(f"推理服务已启动: {address} (微批次最多 {server.max_batch} 张, 等待 {server.max_wait * 1000:.0f} ms, "
+          f"空闲 {server.idle_timeout} 秒后卸载模型)")
+    print(f"在 config.yaml 中设置 inference_server: {address} 即可让 track.py / diagnose_model.py 使用本服务，Ctrl+C 退出")
+    print(f"允许加载的模型目录: {', '.join(server.model_roots)}")
+
+    interval = config.get('server_report_interval', 60)
+    last = 0
+    try:
+        while True:
+            time.sleep(interval)
+            stats = server.stats()
+            if stats['requests'] == last:
+                continue
+            last = stats['requests']
+            lat = stats['latency_ms']
+            print(f"请求 {stats['requests']} (错误 {stats['errors']}), 延迟 p50 {lat['p50']:.1f} / p95 {lat['p95']:.1f} ms, "
+                  f"排队 p95 {stats['queue_wait_ms']['p95']:.1f} ms, 平均批大小 {stats['mean_batch']:.2f}, "
+                  f"队列深度 {stats['queue_depth']} (最大 {stats['max_queue_depth']}), "
+                  f"常驻模型 {len(stats['models'])}, 已卸载 {stats['evictions']}")
+    except KeyboardInterrupt:
+        print("\n停止推理服务")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+
+import yaml
+
+from utils.run_registry import RunRegistry, registry_requirements
+
+
+def main():
+    config_path = 'config.yaml'
+    if not os.path.exists(config_path):
+        print(f"错误：配置文件 {config_path} 不存在！")
+        return
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    imgsz_list = config.get('registry_imgsz') or [config.get('imgsz', 640)]
+    requirements = registry_requirements(config)
+    with RunRegistry(config.get('registry_path', 'runs/registry.sqlite')) as registry:
+        stats = registry.index(config.get('registry_runs', 'runs/detect'))
+        print(f"索引: 新索引 {stats['indexed']} 个运行, 未变化 {stats['unchanged']} 个, 删除 {stats['removed']} 个")
+        validated = registry.validate(imgsz_list, data=config.get('registry_val_data') or None)
+        print(f"新验证 {validated} 组精度 (imgsz {imgsz_list})")
+        measured = registry.benchmark(imgsz_list, runs=config.get('registry_latency_runs', 20))
+        print(f"新测量 {measured} 组推理延迟 (imgsz {imgsz_list})")
+
+        # 训练尺寸下的指标，以及每个推理尺寸下的验证 mAP50 / 召回率 / 延迟
+        print(f"\n{'运行':<24}{'epochs':>8}{'P':>8}{'R':>8}{'mAP50':>8}{'mAP50-95':>10}"
+              + ''.join(f"{f'{s}px mAP50':>12}{f'{s}px R':>10}{f'{s}px ms':>10}" for s in imgsz_list))
+        for run in registry.runs():
+            metrics = [run[k] if run[k] is not None else float('nan')
+                       for k in ('precision', 'recall', 'map50', 'map50_95')]
+            cells = []
+            for s in imgsz_list:
+                acc = registry.accuracy(run, s) if run['weights'] else None
+                lat = registry.latency(run, s) if run['weights'] else None
+                cells.append((f"{acc['map50']:>12.3f}{acc['recall']:>10.3f}" if acc else f"{'-':>12}{'-':>10}")
+                             + (f"{lat['mean_ms']:>10.1f}" if lat else f"{'-':>10}"))
+            print(f"{run['name']:<24}{run['epochs_done']:>8}{metrics[0]:>8.3f}{metrics[1]:>8.3f}"
+                  f"{metrics[2]:>8.3f}{metrics[3]:>10.3f}" + ''.join(cells))
+
+        best = registry.select(imgsz_list=imgsz_list, **requirements)
+    if best is None:
+        print(f"\n没有满足要求的模型 ({requirements})")
+        return
+    print(f"\n在推理尺寸下满足 {requirements} 的最快模型: {best['weights']} (imgsz={best['infer_imgsz']}, "
+          f"{best['mean_ms']:.1f} ms, mAP50 {best['map50']:.3f}, 召回率 {best['recall']:.3f})")
+    print("在 config.yaml 中设置 track_model: registry 即可让 track.py 自动使用该模型")
+
+
+if __name__ == "__main__":
+    main()
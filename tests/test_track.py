@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+import pytest
+
+import track
+from tests.utils.fake_yolo import FakeModel
+from utils.synthetic import marker_trajectories, write_marker_video
+from utils.track_io import read_tracks
+from utils.video import video_info
+
+
+def _detect_markers(frame, kwargs):
+    """假检测器: 每个亮斑的质心给出一个 16x16 的框，frame 也可以是图像路径"""
+    frame = cv2.imread(frame) if isinstance(frame, str) else frame
+    _, _, _, centroids = cv2.connectedComponentsWithStats((frame[:, :, 0] > 100).astype(np.uint8))
+    c = centroids[1:]
+    return np.hstack([c - 8, c + 8]), np.full(len(c), 0.9), np.zeros(len(c))
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _interrupting_detector(at_call):
+    """第 at_call 次检测时抛出异常，模拟进程在处理中途被中断"""
+    calls = []
+
+    def detect(frame, kwargs):
+        calls.append(1)
+        if len(calls) == at_call:
+            raise _Interrupted()
+        return _detect_markers(frame, kwargs)
+    return detect
+
+
+def _source(tmp_path, frames=12, appear=None):
+    """三个缓慢移动的标记点；appear 给定时第四个标记点从该帧开始出现(检查点之后才创建的新轨迹)"""
+    centers = list(marker_trajectories(frames, markers=3, shape=(120, 160), amplitude=2.0))
+    if appear is not None:
+        centers = [np.vstack([c, [[140, 100]]]) if i >= appear else c for i, c in enumerate(centers)]
+    return write_marker_video(str(tmp_path / 'frames'), centers, shape=(120, 160))
+
+
+def test_frame_loop_writes_annotated_video(tmp_path):
+    config = {'source': _source(tmp_path), 'tracker': 'static', 'keyframe_interval': 2}
+    frames = track.run_frame_loop(FakeModel(_detect_markers), config, {'conf': 0.1}, str(tmp_path / 'out' / 'tracks'))
+    video = tmp_path / 'out' / 'frames_tracked.mp4'
+    assert frames == 12 and video_info(str(video))['frame_count'] == 12
+
+    track.run_frame_loop(FakeModel(_detect_markers), dict(config, save=False), {'conf': 0.1},
+                         str(tmp_path / 'nosave' / 'tracks'))
+    assert not (tmp_path / 'nosave' / 'frames_tracked.mp4').exists()
+
+
+def test_cached_detection_writes_annotated_images(tmp_path):
+    source = _source(tmp_path, frames=3)
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'weights')
+    config = {'source': source, 'track_model': str(weights), 'prediction_cache_dir': str(tmp_path / 'cache'),
+              'conf': 0.1, 'batch_size': 2}
+    out = tmp_path / 'out'
+    model = FakeModel(_detect_markers)
+    assert track.run_cached_detection(model, config, {0: 'target'}, str(out / 'tracks')) == 3
+    assert sorted(p.name for p in out.glob('*.png')) == ['000000.png', '000001.png', '000002.png']
+    assert (read_tracks(str(out / 'tracks'))['track_id'] == -1).all()
+
+    # 第二次运行只重新过滤缓存，save=False 时不写标注图像
+    track.run_cached_detection(model, dict(config, save=False), {0: 'target'}, str(tmp_path / 'again' / 'tracks'))
+    assert model.images == 3 and not list((tmp_path / 'again').glob('*.png'))
+
+
+@pytest.mark.parametrize('tracker', ['static', 'bytetrack.yaml'])
+def test_frame_loop_resume_matches_uninterrupted_run(tmp_path, tracker):
+    if tracker != 'static':
+        pytest.importorskip('ultralytics')
+        from ultralytics.trackers.basetrack import BaseTrack
+    source = _source(tmp_path, frames=60, appear=40)
+    config = {'source': source, 'tracker': tracker, 'checkpoint_interval': 8, 'save': False}
+
+    def run(tracks_dir, detect, **overrides):
+        if tracker != 'static':
+            BaseTrack.reset_id()
+        return track.run_frame_loop(FakeModel(detect), dict(config, **overrides), {'conf': 0.1}, tracks_dir,
+                                    chunk_size=40)
+
+    reference = str(tmp_path / 'reference')
+    assert run(reference, _detect_markers) == 60
+
+    # 关键帧间隔为1，每帧检测一次: 第31次检测即第30帧时中断，最后一个检查点在第23帧
+    resumed = str(tmp_path / 'resumed')
+    with pytest.raises(_Interrupted):
+        run(resumed, _interrupting_detector(31))
+    model = FakeModel(_detect_markers)
+    if tracker != 'static':
+        # 新进程中轨迹ID计数器从0开始，由检查点恢复
+        BaseTrack.reset_id()
+    assert track.run_frame_loop(model, dict(config, resume=True), {'conf': 0.1}, resumed, chunk_size=40) == 60
+    assert model.images == 60 - 24
+
+    expected, actual = read_tracks(reference), read_tracks(resumed)
+    assert len(np.unique(expected['track_id'])) == 4
+    for col in expected:
+        np.testing.assert_array_equal(actual[col], expected[col], err_msg=col)
+
+
+def test_list_valued_class_names_select_classes(tmp_path):
+    data = tmp_path / 'dataset.yaml'
+    data.write_text('names: [target, marker]\n', encoding='utf-8')
+    class_names = track.load_class_names(str(data))
+    assert class_names == {0: 'target', 1: 'marker'}
+    assert track.build_predict_args({}, class_names)['classes'] == [0, 1]
+    assert track.load_class_names(str(tmp_path / 'missing.yaml')) == {0: 'target'}
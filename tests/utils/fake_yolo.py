@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+
+
+class FakeTensor:
+    """有 .cpu() / .numpy() 的数组包装，代替 torch 张量"""
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.data
+
+
+class FakeBoxes:
+    """ultralytics Boxes 的最小替身: xyxy / conf / cls 和 len()"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = FakeTensor(xyxy), FakeTensor(conf), FakeTensor(cls)
+
+    def __len__(self):
+        return len(self.conf.data)
+
+
+class FakeResult:
+    def __init__(self, xyxy, conf, cls, speed=None):
+        self.boxes = FakeBoxes(xyxy, conf, cls)
+        self.speed = speed or {}
+
+
+class FakeModel:
+    """
+    假的 YOLO 模型
+
+    参数:
+    detect: detect(frame, predict_kwargs) -> (xyxy, conf, cls)，给出每帧的检测框
+    delay: 每帧推理耗时(秒)
+    batch_delay: 每次 predict 调用的固定耗时(秒)
+    names: 类别名称
+    imgsz: 训练尺寸，设置时提供 model.model.args['imgsz']
+
+    calls 记录每次 predict 的 (帧数, 参数)
+    """
+
+    def __init__(self, detect, delay=0.0, batch_delay=0.0, names=None, imgsz=None):
+        self.detect = detect
+        self.delay = delay
+        self.batch_delay = batch_delay
+        self.names = names or {0: 'target'}
+        self.model = type('M', (), {'args': {'imgsz': imgsz}})() if imgsz else None
+        self.calls = []
+
+    @property
+    def images(self):
+        return sum(n for n, _ in self.calls)
+
+    def predict(self, frames, verbose=False, **kwargs):
+        self.calls.append((len(frames), kwargs))
+        time.sleep(self.batch_delay + self.delay * len(frames))
+        return [FakeResult(*self.detect(f, kwargs), speed={'inference': 1.0}) for f in frames]
+
+
+def fixed_boxes(xyxy, conf=None, cls=None):
+    """每帧输出相同框的 detect 函数，conf 默认 0.9，cls 默认 0"""
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    conf = np.full(len(xyxy), 0.9) if conf is None else conf
+    cls = np.zeros(len(xyxy)) if cls is None else cls
+    return lambda frame, kwargs: (xyxy, conf, cls)
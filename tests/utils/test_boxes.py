@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.boxes import box_iou, expand_windows, merge_windows, nms
+
+
+def test_nms_suppresses_overlaps_per_class():
+    xyxy = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [1, 1, 11, 11], [50, 50, 60, 60]])
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    cls = np.array([0, 0, 1, 0])
+    np.testing.assert_array_equal(nms(xyxy, scores, 0.5, cls=cls), [0, 2, 3])
+    np.testing.assert_array_equal(nms(xyxy, scores, 0.5), [0, 3])
+
+
+def test_blockwise_nms_matches_dense_greedy():
+    rng = np.random.default_rng(0)
+    lt = rng.uniform(0, 200, (500, 2))
+    xyxy = np.hstack([lt, lt + rng.uniform(5, 40, (500, 2))])
+    scores = rng.uniform(size=500)
+    cls = rng.integers(0, 3, 500)
+
+    def dense(cls=None):
+        order = np.argsort(-scores, kind='stable')
+        boxes = xyxy[order] + (0 if cls is None else cls[order, None] * 1000.0)
+        iou = box_iou(boxes, boxes)
+        suppressed = np.zeros(len(boxes), dtype=bool)
+        keep = []
+        for i in range(len(boxes)):
+            if not suppressed[i]:
+                keep.append(i)
+                suppressed |= iou[i] > 0.3
+        return order[keep]
+
+    for block_size in (1, 7, 64, 1024):
+        np.testing.assert_array_equal(nms(xyxy, scores, 0.3, block_size=block_size), dense())
+        np.testing.assert_array_equal(nms(xyxy, scores, 0.3, cls=cls, block_size=block_size), dense(cls))
+
+
+def test_windows_are_clipped_and_merged():
+    windows = expand_windows([[5, 5, 15, 15], [20, 20, 30, 30], [200, 200, 210, 210]], (240, 320), pad=10)
+    np.testing.assert_array_equal(windows[0], [0, 0, 25, 25])
+    merged = merge_windows(windows)
+    np.testing.assert_array_equal(merged, [[0, 0, 40, 40], [190, 190, 220, 220]])
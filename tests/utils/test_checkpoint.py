@@ -0,0 +1,29 @@
+import numpy as np
+
+from utils.checkpoint import load_checkpoint, save_checkpoint
+from utils.track_io import TrackWriter, read_tracks
+
+
+def test_resume_from_checkpoint_matches_uninterrupted_output(tmp_path):
+    rows = np.array([[1, 0, 0.9, 10, 20, 30, 40]], dtype=float)
+    ckpt = str(tmp_path / "tracks" / "checkpoint.pkl")
+
+    # 第一次运行在第5帧保存检查点后又写了两帧，随后中断
+    writer = TrackWriter(str(tmp_path / "tracks"), chunk_size=100)
+    for frame_idx in range(6):
+        writer.write(frame_idx, rows)
+    writer.flush()
+    save_checkpoint(ckpt, {'frame': 5, 'chunks_written': writer.chunks_written,
+                           'rows_written': writer.rows_written})
+    for frame_idx in range(6, 8):
+        writer.write(frame_idx, rows)
+    writer.flush()
+
+    state = load_checkpoint(ckpt)
+    with TrackWriter(str(tmp_path / "tracks"), chunk_size=100, start_chunk=state['chunks_written'],
+                     start_rows=state['rows_written']) as writer:
+        for frame_idx in range(state['frame'] + 1, 10):
+            writer.write(frame_idx, rows)
+
+    assert writer.rows_written == 10
+    np.testing.assert_array_equal(read_tracks(str(tmp_path / "tracks"))['frame'], np.arange(10))
@@ -0,0 +1,36 @@
+import json
+import os
+
+from utils.convert_labelme_to_yolo import convert_labelme_to_yolo
+from utils.synthetic import make_labelme_dataset
+
+
+def test_incremental_conversion_only_redoes_changed_files(tmp_path):
+    src = tmp_path / 'lm'
+    make_labelme_dataset(str(src), images=4, markers=2, shape=(60, 80), box_size=10)
+    json_dir, img_dir, out = str(src / 'json'), str(src / 'images'), str(tmp_path / 'yolo')
+
+    stats = convert_labelme_to_yolo(json_dir, img_dir, out, workers=2)
+    assert stats['converted'] == 4 and stats['encode'] == 0
+    name = sorted(os.listdir(img_dir))[0]
+    assert os.path.samefile(os.path.join(img_dir, name), os.path.join(out, 'images', name))
+
+    # 只touch不改内容: 跳过
+    files = sorted(os.listdir(json_dir))
+    os.utime(os.path.join(json_dir, files[0]))
+    assert convert_labelme_to_yolo(json_dir, img_dir, out, workers=1)['skipped'] == 4
+
+    # 修改一个、删除一个
+    path = os.path.join(json_dir, files[1])
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    data['shapes'] = data['shapes'][:1]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.remove(os.path.join(json_dir, files[2]))
+
+    stats = convert_labelme_to_yolo(json_dir, img_dir, out, workers=1)
+    assert (stats['converted'], stats['skipped'], stats['removed']) == (1, 2, 1)
+    with open(os.path.join(out, 'labels', files[1].replace('.json', '.txt'))) as f:
+        assert len(f.readlines()) == 1
+    assert not os.path.exists(os.path.join(out, 'labels', files[2].replace('.json', '.txt')))
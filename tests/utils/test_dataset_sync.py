@@ -0,0 +1,60 @@
+import os
+
+import cv2
+import numpy as np
+
+from utils.dataset_sync import sync_dataset, validate_label
+
+
+def test_validate_label():
+    assert validate_label("0 0.5 0.5 0.1 0.1\n\n") == []
+    errors = validate_label("0 0.5 0.5 0.1\n-1 0.5 0.5 0.1 0.1\n0 1.2 0.5 0.1 0.1\n")
+    assert len(errors) == 3
+
+
+def test_sync_is_incremental_and_removes_orphans(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    pairs = []
+    for i, ext in enumerate(['.png', '.jpg', '.png']):
+        img = np.full((20, 30, 3), 40 * i, dtype=np.uint8)
+        cv2.imwrite(str(src / f"img{i}{ext}"), img)
+        (src / f"img{i}.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+        pairs.append((f"img{i}", str(src / f"img{i}{ext}"), str(src / f"img{i}.txt")))
+    dst = str(tmp_path / 'dst')
+
+    report = sync_dataset(pairs, dst, workers=1)
+    assert (report['synced'], report['encode'], report['valid']) == (3, 1, 3)
+    # jpg 被真正转换为png，而不是只改扩展名
+    with open(os.path.join(dst, 'images', 'img1.png'), 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+    report = sync_dataset(pairs, dst, workers=1)
+    assert report['unchanged'] == 3 and report['synced'] == 0
+
+    # 删除一对、修改一个标签为无效
+    (src / "img2.txt").write_text("0 0.5 0.5\n")
+    report = sync_dataset(pairs[1:], dst, workers=1)
+    assert report['removed'] == 1
+    assert list(report['invalid_pairs']) == ['img2']
+    assert sorted(os.listdir(os.path.join(dst, 'labels'))) == ['img1.txt']
+
+
+def test_sync_keeps_files_it_did_not_create(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    cv2.imwrite(str(src / 'a.png'), np.zeros((20, 30, 3), dtype=np.uint8))
+    (src / 'a.txt').write_text("0 0.5 0.5 0.2 0.2\n")
+    dst = tmp_path / 'dst'
+    (dst / 'images').mkdir(parents=True)
+    (dst / 'labels').mkdir()
+    (dst / 'images' / 'notes.md').write_text("手动放入的文件")
+    (dst / 'labels' / 'manual.txt').write_text("0 0.5 0.5 0.1 0.1\n")
+
+    report = sync_dataset([('a', str(src / 'a.png'), str(src / 'a.txt'))], str(dst), workers=1)
+    report = sync_dataset([], str(dst), workers=1)
+    # 只删除清单中记录过的 a，不认识的文件保留并在报告中列出
+    assert report['removed'] == 1
+    assert sorted(os.listdir(dst / 'images')) == ['notes.md']
+    assert sorted(os.listdir(dst / 'labels')) == ['manual.txt']
+    assert report['untracked_files'] == [os.path.join('labels', 'manual.txt')]
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.displacement import displacement_series, refine_track_centers
+
+
+def _blob(cx, cy, shape=(120, 160)):
+    yy, xx = np.mgrid[:shape[0], :shape[1]]
+    img = 30 + 200 * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * 3.0 ** 2))
+    return np.dstack([img.astype(np.uint8)] * 3)
+
+
+@pytest.mark.parametrize("method", ["centroid", "correlation"])
+def test_refine_recovers_subpixel_motion(tmp_path, method):
+    true_x = 60 + 0.37 * np.arange(5)
+    for i, x in enumerate(true_x):
+        cv2.imwrite(str(tmp_path / f"{i:04d}.png"), _blob(x, 50.25))
+
+    # 检测框中心只有整像素精度
+    frame = np.arange(5)
+    tracks = {
+        'frame': frame, 'track_id': np.ones(5, dtype=np.int64),
+        'x1': np.round(true_x) - 8, 'x2': np.round(true_x) + 8,
+        'y1': np.full(5, 42.0), 'y2': np.full(5, 58.0),
+    }
+    cx, cy = refine_track_centers(str(tmp_path), tracks, method=method, patch_size=24)
+    np.testing.assert_allclose(cx - cx[0], true_x - true_x[0], atol=0.1)
+
+    series = displacement_series(tracks, cx, cy, pixel_to_mm=2.0)
+    assert series['dx'].shape == (1, 5)
+    np.testing.assert_allclose(series['dx'][0], 2.0 * (true_x - true_x[0]), atol=0.2)
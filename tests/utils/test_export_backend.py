@@ -0,0 +1,138 @@
+import os
+
+import cv2
+import numpy as np
+
+from tests.utils.fake_yolo import FakeModel, fixed_boxes
+from utils.detection import Detections
+from utils.export_backend import (
+    artifact_path,
+    benchmark_backends,
+    choose_backend,
+    compare_detections,
+    resolve_backend,
+)
+from utils.roi import RoiDetector
+from utils.tiling import TiledDetector
+
+
+def _model(shift=0.0, delay=0.0, drop=False):
+    """每帧输出两个固定框的假模型，shift 为框的偏移，delay 为每帧耗时，drop 时只输出第一个框"""
+    boxes = np.array([[10, 10, 30, 30], [50, 50, 70, 70]], dtype=np.float32) + shift
+    return FakeModel(fixed_boxes(boxes[:1] if drop else boxes), delay=delay, imgsz=320)
+
+
+def _torchscript(path):
+    """只能按导出尺寸推理的假 torchscript 模型，尺寸取自文件名 best_<imgsz>.torchscript"""
+    size = int(os.path.basename(path).split('_')[1].split('.')[0])
+    boxes = fixed_boxes([[10, 10, 30, 30], [50, 50, 70, 70]])
+
+    def detect(frame, kwargs):
+        if kwargs.get('imgsz') != size:
+            raise RuntimeError('The following operation failed in the TorchScript interpreter.')
+        return boxes(frame, kwargs)
+    return FakeModel(detect, imgsz=320)
+
+
+def _dets(*boxes, cls=None):
+    cls = np.zeros(len(boxes)) if cls is None else np.asarray(cls)
+    return Detections(np.array(boxes, dtype=np.float64).reshape(-1, 4), np.ones(len(boxes)), cls)
+
+
+def test_compare_detections_reports_f1_and_shift():
+    ref = [_dets([0, 0, 10, 10], [20, 20, 30, 30]), _dets()]
+    assert compare_detections(ref, ref) == (1.0, 0.0)
+    f1, shift = compare_detections(ref, [_dets([1, 0, 11, 10]), _dets([50, 50, 60, 60])])
+    assert abs(f1 - 2 / 4) < 1e-9 and abs(shift - 1.0) < 1e-9
+    # 偏移按匹配到的同类别参考框计算，而不是最近的任意类别参考框
+    ref = [_dets([0, 0, 10, 10], [2, 0, 12, 10], cls=[0, 1])]
+    f1, shift = compare_detections(ref, [_dets([0, 0, 10, 10], cls=[1])])
+    assert abs(shift - 2.0) < 1e-9
+
+
+def test_choose_backend_prefers_fastest_matching():
+    frames = [np.zeros((80, 80, 3), np.uint8)] * 3
+    models = {'pt': _model(delay=0.01), 'onnx': _model(delay=0.002), 'onnx_int8': _model(shift=2.0),
+              'torchscript': _model(drop=True)}
+    report = benchmark_backends(models, frames, {'conf': 0.1}, repeats=1)
+    assert report['pt']['f1'] == 1.0 and report['onnx_int8']['shift_px'] > 2
+    assert report['torchscript']['f1'] < 0.98
+    # 最快的 onnx_int8 和 torchscript 偏差过大，选择 onnx
+    assert choose_backend(report) == 'onnx'
+    assert choose_backend(report, max_shift_px=5.0) in ('onnx_int8', 'onnx')
+    assert choose_backend({'pt': {'latency_ms': 5.0, 'f1': 1.0, 'shift_px': 0.0},
+                           'onnx': {'latency_ms': 1.0, 'f1': 0.5, 'shift_px': 0.0}}) == 'pt'
+
+
+def test_resolve_backend_exports_and_selects(tmp_path):
+    weights = tmp_path / 'weights' / 'best.pt'
+    weights.parent.mkdir()
+    weights.write_bytes(b'pt')
+    val = tmp_path / 'images'
+    val.mkdir()
+    for i in range(3):
+        cv2.imwrite(str(val / f"v_{i}.png"), np.zeros((40, 60, 3), np.uint8))
+    (tmp_path / 'data.yaml').write_text(f"path: {tmp_path}\ntrain: images\nval: images\n", encoding='utf-8')
+
+    exported = []
+
+    def export(w, backend, imgsz):
+        exported.append((backend, imgsz))
+        return artifact_path(w, backend, imgsz)
+
+    def load(path):
+        return _model(delay=0.0 if path.endswith('.onnx') else 0.01)
+
+    config = {'track_model': str(weights), 'inference_backend': 'auto', 'data': str(tmp_path / 'data.yaml'),
+              'inference_backends': ['onnx']}
+    resolved = resolve_backend(config, load_model=load, export=export)
+    assert resolved['track_model'] == os.path.join(str(weights.parent), 'best_320.onnx')
+    assert resolved['track_imgsz'] == 320 and ('onnx', 320) in exported
+
+    fixed = resolve_backend(dict(config, inference_backend='torchscript', track_imgsz=640), load_model=load,
+                            export=export)
+    assert fixed['track_model'].endswith('best_640.torchscript')
+    assert resolve_backend(dict(config, inference_backend='pt')) is not None
+
+
+def test_exported_backends_run_in_tile_and_roi_modes(tmp_path):
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'pt')
+    exported = []
+
+    def export(w, backend, imgsz):
+        exported.append((backend, imgsz))
+        return artifact_path(w, backend, imgsz)
+
+    def load(path):
+        return _torchscript(path) if path.endswith('.torchscript') else _model()
+
+    frame = np.zeros((600, 700, 3), np.uint8)
+    base = {'track_model': str(weights), 'track_imgsz': 320, 'batch_size': 4}
+
+    # 切片模式只用 tile_size 一种输入尺寸: torchscript 按切片尺寸导出后可以使用
+    config = dict(base, inference_backend='torchscript', tile_mode=True, tile_size=256)
+    resolved = resolve_backend(config, load_model=load, export=export)
+    assert resolved['track_model'].endswith('best_256.torchscript')
+    detector = TiledDetector(load(resolved['track_model']), {'imgsz': resolved['track_imgsz'], 'iou': 0.5},
+                             tile_size=256)
+    assert len(detector(frame)) > 0
+
+    # ROI模式同时用整帧尺寸与 roi_imgsz: torchscript 退回 pt，动态导出的 onnx 可以使用
+    config = dict(base, inference_backend='torchscript', roi_mode=True, roi_imgsz=160)
+    assert resolve_backend(config, load_model=load, export=export)['track_model'] == str(weights)
+    resolved = resolve_backend(dict(config, inference_backend='onnx'), load_model=load, export=export)
+    assert resolved['track_model'].endswith('best_320.onnx')
+    detector = RoiDetector(load(resolved['track_model']), {'imgsz': resolved['track_imgsz'], 'iou': 0.5},
+                           roi_imgsz=160)
+    prev = detector(frame)
+    rows = np.column_stack([np.arange(len(prev)), prev.cls, prev.conf, prev.xyxy])
+    assert len(detector(frame, rows)) == len(prev) and detector.roi_passes == 1
+
+    # 按导出尺寸试推理失败的后端同样退回 pt
+    def stale(w, backend, imgsz):
+        return artifact_path(w, backend, 640)
+
+    config = dict(base, inference_backend='torchscript')
+    assert resolve_backend(config, load_model=load, export=stale)['track_model'] == str(weights)
+    assert ('torchscript', 160) not in exported and ('torchscript', 320) not in exported
@@ -0,0 +1,75 @@
+import os
+import sys
+import textwrap
+
+from utils.hparam_search import SweepRunner, expand_space, read_results, should_prune, trial_id
+
+HEADER = "epoch,time,metrics/precision(B),metrics/recall(B),metrics/mAP50(B),metrics/mAP50-95(B)\n"
+
+# 假的 train.py: 按配置中的 quality 写出 results.csv，quality 低的试验训练得慢
+FAKE_TRAIN = textwrap.dedent('''
+    import os, sys, time, yaml
+    with open(sys.argv[1], encoding='utf-8') as f:
+        cfg = yaml.safe_load(f)
+    out = os.path.join(cfg['project'], cfg['name'])
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, 'results.csv'), 'w') as f:
+        f.write({header!r})
+        for e in range(1, cfg['epochs'] + 1):
+            m = cfg['quality'] * e / cfg['epochs']
+            f.write(f"{{e}},0,0,0,{{m}},{{m / 2}}\\n")
+            f.flush()
+            time.sleep(0.02 if cfg['quality'] > 0.3 else 0.3)
+''').format(header=HEADER)
+
+
+def test_expand_space_grid_and_sampling():
+    grid = expand_space({'mosaic': [0.0, 0.5], 'imgsz': [640, 1024, 1280]})
+    assert len(grid) == 6 and {'imgsz': 640, 'mosaic': 0.5} in grid
+    assert expand_space({'mosaic': [0.0, 0.5], 'imgsz': [640, 1024]}, trials=3, seed=1) == \
+        expand_space({'mosaic': [0.0, 0.5], 'imgsz': [640, 1024]}, trials=3, seed=1)
+    sampled = expand_space({'scale': {'low': 0.1, 'high': 0.5}, 'model': ['a', 'b']}, trials=4)
+    assert len(sampled) == 4 and all(0.1 <= p['scale'] <= 0.5 for p in sampled)
+    assert trial_id({'a': 1, 'b': 2}) == trial_id({'b': 2, 'a': 1})
+
+
+def test_read_results_skips_partial_rows(tmp_path):
+    path = tmp_path / 'results.csv'
+    path.write_text(HEADER.replace(',', ',  ') + "1,0,0,0,0.1,0.05\n2,0,0,0,0.3,0.1\n3,0,0", encoding='utf-8')
+    epochs, map50, map50_95 = read_results(str(path))
+    assert epochs.tolist() == [1, 2] and map50.tolist() == [0.1, 0.3] and map50_95.tolist() == [0.05, 0.1]
+    assert len(read_results(str(tmp_path / 'missing.csv'))[0]) == 0
+
+
+def test_should_prune_compares_matching_epochs():
+    others = [[0.2, 0.4, 0.5], [0.3, 0.5], [0.1, 0.45, 0.6, 0.7]]
+    assert not should_prune([0.1], others, warmup=2, min_trials=2)
+    assert should_prune([0.1, 0.2], others, warmup=2, min_trials=2)
+    assert not should_prune([0.1, 0.5], others, warmup=2, min_trials=2)
+    # 第3个epoch只有两个试验有结果
+    assert not should_prune([0.1, 0.2, 0.2], others, warmup=2, min_trials=3)
+
+
+def test_sweep_prunes_lagging_trial_and_resumes(tmp_path):
+    script = tmp_path / 'fake_train.py'
+    script.write_text(FAKE_TRAIN, encoding='utf-8')
+    out = str(tmp_path / 'sweep')
+    # 要求其他三个试验都到达同一epoch才比较，结果不依赖子进程的调度快慢
+    kwargs = {'parallel': 4, 'threads': 1, 'epochs': 10, 'warmup': 2, 'min_trials': 3, 'percentile': 25.0,
+              'poll': 0.05, 'command': [sys.executable, str(script)]}
+    runner = SweepRunner({'epochs': 100, 'quality': 0.5}, {'quality': [0.1, 0.6, 0.8, 0.9]}, out, **kwargs)
+    board = runner.run()
+
+    assert [t['params']['quality'] for t in board] == [0.9, 0.8, 0.6, 0.1]
+    assert [t['status'] for t in board[:3]] == ['done'] * 3
+    assert board[3]['status'] == 'pruned' and len(board[3]['curve']) < 10
+    assert abs(board[0]['best_map50'] - 0.9) < 1e-9
+    assert os.path.exists(os.path.join(out, 'leaderboard.csv'))
+
+    # 断点续跑: 已结束的试验不再运行，新增的取值才启动
+    resumed = SweepRunner({'epochs': 100, 'quality': 0.5}, {'quality': [0.1, 0.6, 0.8, 0.9, 0.7]}, out, **kwargs)
+    launched = []
+    resumed.launch = lambda trial, launch=resumed.launch: (launched.append(trial['params']['quality']),
+                                                           launch(trial))
+    board = resumed.run()
+    assert launched == [0.7] and len(board) == 5
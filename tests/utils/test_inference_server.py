@@ -0,0 +1,228 @@
+import http.client
+import json
+import os
+import stat
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tests.utils.fake_yolo import FakeModel
+from utils.detection import detect_frames
+from utils.inference_server import (
+    InferenceClient,
+    InferenceServer,
+    is_loopback,
+    load_model,
+    parse_address,
+)
+
+
+def _model(calls):
+    """每帧输出一个框的假模型，框的位置由帧的像素值决定，conf 取请求参数；calls 记录每次调用的批大小和参数"""
+    model = FakeModel(lambda f, kwargs: ([[f.mean(), 0, f.mean() + 10, 10]], [kwargs.get('conf', 0.5)], [0]),
+                      batch_delay=0.02)
+    model.calls = calls
+    return model
+
+
+@pytest.fixture
+def weights(tmp_path):
+    path = tmp_path / 'best.pt'
+    path.write_bytes(b'weights')
+    return str(path)
+
+
+def _server(calls, loads=None, **kwargs):
+    def loader(path):
+        if loads is not None:
+            loads.append(path)
+        return _model(calls)
+    return InferenceServer(loader=loader, **kwargs)
+
+
+def test_parse_address():
+    assert parse_address('unix:/tmp/a.sock') == ('unix', '/tmp/a.sock')
+    assert parse_address('http://127.0.0.1:8765/') == ('tcp', ('127.0.0.1', 8765))
+    with pytest.raises(ValueError):
+        parse_address('localhost')
+    assert is_loopback('127.0.0.1') and is_loopback('::1') and is_loopback('localhost')
+    assert not is_loopback('0.0.0.0') and not is_loopback('192.168.1.5') and not is_loopback('evil.example')
+
+
+def test_concurrent_requests_share_batches(weights):
+    calls = []
+    server = _server(calls, max_batch=8, max_wait_ms=200)
+    address = server.start('127.0.0.1:0')
+    try:
+        client = InferenceClient(address)
+        client.load(weights)
+        out = {}
+
+        def request(i):
+            conf = 0.9 if i == 5 else 0.5
+            out[i] = client.predict(weights, [np.full((32, 32, 3), i * 10, dtype=np.uint8)], conf=conf)[0]
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 每个请求拿回自己那张图像的结果
+        for i, r in out.items():
+            assert r.boxes.xyxy.cpu().numpy()[0, 0] == i * 10
+            assert r.boxes.conf[0].item() == pytest.approx(0.9 if i == 5 else 0.5)
+        # 去掉预热调用后，6张图像少于6次前向推理，且不同 conf 的图像不在同一批
+        batches = calls[1:]
+        assert sum(n for n, _ in batches) == 6 and len(batches) < 6
+        assert any(n > 1 for n, _ in batches)
+        assert all(n == 1 for n, args in batches if args['conf'] == 0.9)
+
+        stats = client.stats()
+        assert stats['requests'] == 6 and stats['errors'] == 0
+        assert stats['max_queue_depth'] >= 2 and stats['queue_depth'] == 0
+        assert stats['latency_ms']['p95'] > 0 and stats['mean_batch'] > 1
+        assert [m['weights'] for m in stats['models']] == [weights]
+    finally:
+        server.close()
+
+
+def test_remote_model_over_unix_socket(tmp_path, weights):
+    server = _server([])
+    address = server.start(f"unix:{tmp_path / 'infer.sock'}")
+    try:
+        model = load_model({'inference_server': address}, weights)
+        assert model.names == {0: 'target'}
+        frames = [np.full((32, 32, 3), v, dtype=np.uint8) for v in (20, 40)]
+        dets = detect_frames(model, frames, conf=0.3)
+        assert [d.xyxy[0, 0] for d in dets] == [20, 40]
+
+        # 图像路径在服务端读取，结果可以像 ultralytics Boxes 一样逐个框访问
+        import cv2
+        path = str(tmp_path / 'img.png')
+        cv2.imwrite(path, frames[1])
+        result = model.predict(source=path, conf=0.3, verbose=True)[0]
+        box = next(iter(result.boxes))
+        assert int(box.cls[0].item()) == 0 and box.xyxy[0].tolist() == [40, 0, 50, 10]
+
+        with pytest.raises(ValueError):
+            model.predict(frames, save=True)
+        with pytest.raises(RuntimeError):
+            model.predict(str(tmp_path / 'missing.png'))
+    finally:
+        server.close()
+    assert not (tmp_path / 'infer.sock').exists()
+    assert not InferenceClient(address).available()
+
+
+def test_idle_model_is_evicted_and_reloaded(weights):
+    loads = []
+    server = _server([], loads, idle_timeout=60)
+    address = server.start('127.0.0.1:0')
+    try:
+        client = InferenceClient(address)
+        client.predict(weights, [np.zeros((8, 8, 3), dtype=np.uint8)])
+        assert server.evict_idle() == []
+        assert server.evict_idle(now=time.monotonic() + 120) == [weights]
+        stats = client.stats()
+        assert stats['models'] == [] and stats['evictions'] == 1
+
+        client.predict(weights, [np.zeros((8, 8, 3), dtype=np.uint8)])
+        assert loads == [weights, weights]
+    finally:
+        server.close()
+
+
+def test_cold_load_does_not_block_loaded_models(tmp_path, weights):
+    slow = tmp_path / 'slow.pt'
+    slow.write_bytes(b'slow')
+    loads, release = [], threading.Event()
+
+    def loader(path):
+        loads.append(path)
+        if path == str(slow):
+            release.wait(5)
+        return _model([])
+
+    server = InferenceServer(loader=loader)
+    server.load(weights)
+    threads = [threading.Thread(target=server.load, args=(str(slow),)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    try:
+        # 另一个模型正在加载时，已加载模型的请求和状态查询不等待
+        t0 = time.perf_counter()
+        server.predict(weights, [np.zeros((8, 8, 3), dtype=np.uint8)], {})
+        assert [m['weights'] for m in server.stats()['models']] == [weights]
+        assert time.perf_counter() - t0 < 1.0
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+    # 同一权重的并发请求只加载一次
+    assert loads == [weights, str(slow)]
+    assert len(server.stats()['models']) == 2
+    server.close()
+
+
+def test_close_fails_queued_requests(weights):
+    server = _server([], max_batch=1, max_wait_ms=0)
+    futures = server.submit(weights, [np.zeros((8, 8, 3), dtype=np.uint8)] * 20, {})
+    t0 = time.perf_counter()
+    server.close()
+    # 每张图像推理 20ms: 关闭时大部分图像还在队列中，它们立即以错误结束而不是挂起
+    assert all(f.done() for f in futures) and time.perf_counter() - t0 < 1.0
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    assert errors and all(isinstance(e, RuntimeError) for e in errors)
+    with pytest.raises(RuntimeError):
+        server.submit(weights, [np.zeros((8, 8, 3), dtype=np.uint8)], {})
+
+
+def test_server_rejects_untrusted_requests(tmp_path, weights):
+    # 监听非回环地址需要显式允许
+    with pytest.raises(ValueError):
+        _server([]).start('0.0.0.0:0')
+
+    allowed = tmp_path / 'runs'
+    allowed.mkdir()
+    inside = allowed / 'best.pt'
+    inside.write_bytes(b'weights')
+    server = _server([], model_roots=[str(allowed)])
+    address = server.start('127.0.0.1:0')
+    try:
+        host, port = parse_address(address)[1]
+
+        def post(path, body, headers):
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            conn.request('POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            return response.status
+
+        body = json.dumps({'model': str(inside)}).encode('utf-8')
+        # DNS重绑定: Host 不是本机
+        assert post('/load', body, {'Content-Type': 'application/json', 'Host': 'evil.example:80'}) == 403
+        # 网页表单可以不经预检发送 text/plain
+        assert post('/load', body, {'Content-Type': 'text/plain'}) == 415
+        assert post('/load', body, {'Content-Type': 'application/json'}) == 200
+
+        client = InferenceClient(address)
+        with pytest.raises(RuntimeError, match='403'):
+            client.load(weights)
+        with pytest.raises(RuntimeError, match='403'):
+            client.predict(weights, [np.zeros((8, 8, 3), dtype=np.uint8)])
+        assert [m['weights'] for m in client.stats()['models']] == [str(inside)]
+    finally:
+        server.close()
+
+
+def test_unix_socket_is_private(tmp_path):
+    server = _server([])
+    server.start(f"unix:{tmp_path / 'infer.sock'}")
+    try:
+        assert stat.S_IMODE(os.stat(tmp_path / 'infer.sock').st_mode) == 0o600
+    finally:
+        server.close()
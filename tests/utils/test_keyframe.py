@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+
+from utils.keyframe import KeyframeScheduler, propagate_centers
+
+
+def _frame(cx, cy):
+    img = np.zeros((200, 200), dtype=np.uint8)
+    cv2.circle(img, (cx, cy), 6, 255, -1)
+    cv2.rectangle(img, (cx - 12, cy - 12), (cx + 12, cy + 12), 128, 2)
+    return cv2.GaussianBlur(img, (5, 5), 0)
+
+
+def test_propagate_centers_follows_shift():
+    centers, ok = propagate_centers(_frame(100, 100), _frame(103, 98), np.array([[100.0, 100.0]]))
+    assert ok.all()
+    np.testing.assert_allclose(centers[0], [103, 98], atol=0.5)
+
+
+def test_scheduler_interval():
+    scheduler = KeyframeScheduler(interval=3)
+    assert scheduler.need_detection()
+    scheduler.reset(_frame(100, 100), np.array([[1, 0, 0.9, 88, 88, 112, 112]], dtype=float))
+    flags = []
+    for shift in range(1, 4):
+        flags.append(scheduler.need_detection())
+        if not flags[-1]:
+            rows, confidence = scheduler.propagate(_frame(100 + shift, 100))
+            assert confidence == 1.0
+    assert flags == [False, False, True]
+    np.testing.assert_allclose(rows[0, 3], 90, atol=0.5)
@@ -0,0 +1,51 @@
+import csv
+import os
+
+import cv2
+import numpy as np
+
+from utils.label_render import read_class_names, render_contact_sheets
+from utils.label_store import LabelStore
+from utils.synthetic import make_yolo_dataset
+
+
+def test_read_class_names_accepts_list_and_dict(tmp_path):
+    path = tmp_path / 'dataset.yaml'
+    path.write_text("names: [target, p, sp]\n", encoding='utf-8')
+    assert read_class_names(str(path)) == {0: 'target', 1: 'p', 2: 'sp'}
+    path.write_text("names:\n  0: target\n  2: sp\n", encoding='utf-8')
+    assert read_class_names(str(path)) == {0: 'target', 2: 'sp'}
+    assert read_class_names(str(tmp_path / 'missing.yaml')) == {}
+
+
+def test_contact_sheets_cover_whole_dataset(tmp_path):
+    data = make_yolo_dataset(str(tmp_path / 'ds'), images=11, markers=3, shape=(60, 80), box_size=10)
+    images = sorted(os.path.join(data, 'images', f) for f in os.listdir(os.path.join(data, 'images')))
+    os.remove(os.path.join(data, 'labels', os.path.splitext(os.path.basename(images[0]))[0] + '.txt'))
+    labels = LabelStore.load(os.path.join(data, 'labels'))
+
+    out = str(tmp_path / 'vis')
+    stats = render_contact_sheets(images, labels, out, names={0: 'target'}, thumb=64, cols=3, rows=2, workers=2)
+    assert stats['images'] == 11 and stats['sheets'] == 2
+    assert stats['missing_labels'] == 1 and stats['boxes'] == 30
+    sheet = cv2.imread(os.path.join(out, 'sheet_0000.jpg'))
+    assert sheet.shape[:2] == (2 * (64 + 14), 3 * 64)
+
+    with open(os.path.join(out, 'index.csv'), encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [r['image'] for r in rows] == images
+    assert rows[0]['boxes'] == '' and rows[1]['boxes'] == '3'
+
+    # 串行渲染得到相同的拼图，旧拼图被替换
+    serial = render_contact_sheets(images, labels, out, thumb=64, cols=3, rows=4, workers=1)
+    assert serial['sheets'] == 1 and sorted(f for f in os.listdir(out) if f.endswith('.jpg')) == ['sheet_0000.jpg']
+
+
+def test_xyxyn_matches_per_file_conversion(tmp_path):
+    data = make_yolo_dataset(str(tmp_path / 'ds'), images=3, markers=2, shape=(60, 80), box_size=10)
+    labels = LabelStore.load(os.path.join(data, 'labels'))
+    xyxyn = labels.xyxyn()
+    for i, name in enumerate(labels.names):
+        xyxy, _ = labels.xyxy(name, 80, 60)
+        np.testing.assert_allclose(xyxyn[labels.offsets[i]:labels.offsets[i + 1]] * [80, 60, 80, 60], xyxy,
+                                   atol=1e-3)
@@ -0,0 +1,41 @@
+import os
+import time
+
+import numpy as np
+
+from utils.label_store import LabelStore
+
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def test_label_store_queries_and_cache_invalidation(tmp_path):
+    labels = tmp_path / 'labels'
+    labels.mkdir()
+    _write(labels / 'a.txt', "0 0.5 0.5 0.1 0.2\n1 0.25 0.25 0.05 0.05\n")
+    _write(labels / 'b.txt', "")
+    _write(labels / 'c.txt', "0 0.1 0.1 0.1 0.1\nbad line\n")
+
+    store = LabelStore.load(str(labels))
+    assert store.names == ['a', 'b', 'c']
+    assert store.num_boxes == 3
+    assert store.empty() == ['b']
+    assert store.class_counts() == {0: 2, 1: 1}
+    np.testing.assert_allclose(store.boxes('a')[1], [1, 0.25, 0.25, 0.05, 0.05])
+    xyxy, cls = store.xyxy('a', 200, 100)
+    np.testing.assert_allclose(xyxy[0], [90, 40, 110, 60])
+    assert cls.tolist() == [0, 1]
+
+    # 第二次从内存映射的缓存加载
+    cached = LabelStore.load(str(labels))
+    assert isinstance(cached.data, np.memmap)
+    np.testing.assert_array_equal(cached.data, store.data)
+
+    # 修改已有文件的内容也会使缓存失效
+    time.sleep(0.01)
+    _write(labels / 'b.txt', "2 0.5 0.5 0.3 0.3\n")
+    os.utime(labels / 'b.txt', ns=(time.time_ns(), time.time_ns()))
+    updated = LabelStore.load(str(labels))
+    assert updated.empty() == [] and updated.class_counts()[2] == 1
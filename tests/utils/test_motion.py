@@ -0,0 +1,31 @@
+import numpy as np
+
+from utils.motion import MotionGate
+
+
+def test_motion_gate_holds_static_frames_and_detects_target_motion():
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(240, 320, 3), dtype=np.uint8)
+    rows = np.array([[1, 0, 0.9, 100, 100, 140, 140]], dtype=float)
+    gate = MotionGate(threshold=2.0, scale=0.25, max_hold=3)
+
+    assert not gate.is_static(base, rows)  # 第一帧作为参考
+    assert gate.is_static(base.copy(), rows)
+
+    # 目标区域外的变化不触发检测
+    outside = base.copy()
+    outside[:40, :40] = 0
+    assert gate.is_static(outside, rows)
+
+    moved = base.copy()
+    moved[100:140, 100:140] = 255 - moved[100:140, 100:140]
+    assert not gate.is_static(moved, rows)
+    assert gate.skipped == 2
+
+
+def test_motion_gate_forces_processing_after_max_hold():
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    rows = np.array([[1, 0, 0.9, 10, 10, 20, 20]], dtype=float)
+    gate = MotionGate(max_hold=2)
+    flags = [gate.is_static(frame, rows) for _ in range(5)]
+    assert flags == [False, True, True, False, True]
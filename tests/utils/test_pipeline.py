@@ -0,0 +1,28 @@
+import pytest
+
+from utils.pipeline import run_pipeline
+
+
+def test_pipeline_keeps_frame_order_and_batches():
+    frames = ((i, i * 10) for i in range(23))
+    batches = []
+    written = []
+
+    def process_batch(batch):
+        batches.append(len(batch))
+        return [(idx, frame, frame + 1) for idx, frame in batch]
+
+    stats = run_pipeline(frames, process_batch, [lambda i, f, r: written.append((i, r))],
+                         batch_size=5, queue_depth=2)
+    assert stats['frames'] == 23
+    assert batches == [5, 5, 5, 5, 3]
+    assert written == [(i, i * 10 + 1) for i in range(23)]
+
+
+def test_pipeline_propagates_writer_errors():
+    def sink(idx, frame, rows):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_pipeline(((i, i) for i in range(100)), lambda b: [(i, f, None) for i, f in b], [sink],
+                     batch_size=4, queue_depth=2)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from tests.utils.fake_yolo import FakeModel, fixed_boxes
+from utils.prediction_cache import PredictionCache
+
+
+def _model():
+    """每张图像返回两个高度重叠的框和一个低置信度框"""
+    return FakeModel(fixed_boxes([[10, 10, 30, 30], [11, 11, 31, 31], [50, 50, 60, 60]], [0.9, 0.6, 0.05]))
+
+
+def test_cache_refilters_without_rerunning_model(tmp_path):
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'weights')
+    images = [np.full((32, 32, 3), i, dtype=np.uint8) for i in range(3)]
+    model = _model()
+    cache = PredictionCache(str(tmp_path / 'cache'))
+
+    loose = cache.predict(model, images, str(weights), conf=0.01, iou=0.9)
+    strict = cache.predict(model, images, str(weights), conf=0.5, iou=0.5)
+    assert model.images == 3
+    assert [len(d) for d in loose] == [3, 3, 3]
+    assert [len(d) for d in strict] == [1, 1, 1]
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 3
+
+    # 不同的 imgsz 是不同的缓存键
+    cache.predict(model, images[:1], str(weights), imgsz=320)
+    assert model.images == 4
+
+
+def test_cache_stores_detections_before_nms_and_counts_truncation(tmp_path):
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'weights')
+    model = _model()
+    cache = PredictionCache(str(tmp_path / 'cache'), max_det=3)
+    cache.predict(model, [np.zeros((32, 32, 3), dtype=np.uint8)], str(weights), conf=0.1)
+    # 原始检测按 iou=1.0 推理，即不做NMS
+    assert model.calls[0][1]['iou'] == 1.0 and model.calls[0][1]['max_det'] == 3
+    assert cache.stats()['truncated'] == 0
+    # 条目已满 max_det，低于其中最低置信度的 conf 无法从缓存精确还原
+    cache.predict(model, [np.zeros((32, 32, 3), dtype=np.uint8)], str(weights), conf=0.01)
+    assert cache.stats()['truncated'] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    weights = tmp_path / 'best.pt'
+    weights.write_bytes(b'weights')
+    images = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(20)]
+    cache = PredictionCache(str(tmp_path / 'cache'), max_size_mb=0.003)
+    cache.predict_raw(_model(), images, str(weights))
+    assert cache.evictions > 0
+    assert cache.size_bytes <= cache.max_bytes
@@ -0,0 +1,53 @@
+import csv
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from utils.profiler import StageProfiler
+
+
+def test_stages_latency_and_report(tmp_path):
+    profiler = StageProfiler()
+    for _ in profiler.iterate(range(5), 'decode'):
+        with profiler.frame():
+            with profiler.stage('detect'):
+                time.sleep(0.002)
+            profiler.record_speed([SimpleNamespace(speed={'preprocess': 1.0, 'inference': 4.0, 'postprocess': None})])
+
+    report = profiler.save(str(tmp_path))
+    assert report['frames'] == 5
+    assert report['stages']['detect']['calls'] == 5
+    assert report['stages']['decode']['calls'] == 5
+    # r.speed 细分已包含在 detect 阶段中，单独报告，不计入阶段占比
+    assert abs(report['breakdown']['inference']['wall_s'] - 0.02) < 1e-9
+    assert 'inference' not in report['stages'] and 'postprocess' not in report['breakdown']
+    assert report['latency_ms']['p50'] >= 2.0
+    assert report['latency_ms']['p50'] <= report['latency_ms']['p95'] <= report['latency_ms']['p99']
+    assert report['peak_rss_mb'] > 0
+
+    with open(os.path.join(tmp_path, 'profile.json'), encoding='utf-8') as f:
+        assert json.load(f)['frames'] == 5
+    with open(os.path.join(tmp_path, 'profile.csv'), encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert {row['stage'] for row in rows if row['kind'] == 'stage'} == {'decode', 'detect'}
+    assert {row['stage'] for row in rows if row['kind'] == 'breakdown'} == {'preprocess', 'inference'}
+
+
+def test_batch_latency_is_per_frame():
+    profiler = StageProfiler()
+    profiler.batch_done(0.08, 8)
+    with profiler.frame():
+        pass
+    # 一批8帧共80ms，每帧按10ms记录，与逐帧处理的延迟在同一量级
+    assert profiler.frame_latencies[:8] == [0.01] * 8 and len(profiler.frame_latencies) == 9
+
+
+def test_disabled_profiler_is_noop(tmp_path):
+    profiler = StageProfiler(enabled=False)
+    assert list(profiler.iterate(range(3))) == [0, 1, 2]
+    with profiler.frame(), profiler.stage('detect'):
+        pass
+    assert profiler.save(str(tmp_path)) is None
+    assert profiler.stages == {} and profiler.frame_latencies == []
+    assert not os.listdir(tmp_path)
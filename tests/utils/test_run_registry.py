@@ -0,0 +1,96 @@
+import os
+import time
+from types import SimpleNamespace
+
+import yaml
+
+from utils.run_registry import RunRegistry, read_best_epoch, registry_requirements
+
+HEADER = ("epoch,train/box_loss,metrics/precision(B),metrics/recall(B),metrics/mAP50(B),"
+          "metrics/mAP50-95(B)\n")
+
+
+class _Model:
+    """推理耗时与 imgsz 和模型大小成正比、精度随 imgsz 变小而下降的假模型"""
+
+    def __init__(self, path):
+        self.scale = 2.0 if 'big' in path else 1.0
+        self.calls = 0
+
+    def predict(self, img, imgsz, device, verbose):
+        self.calls += 1
+        time.sleep(self.scale * imgsz / 1e5)
+
+    def val(self, data, imgsz, **kwargs):
+        r = imgsz / 1024 * (0.9 if self.scale > 1 else 0.7)
+        return SimpleNamespace(box=SimpleNamespace(mp=r, mr=r, map50=r, map=r / 2))
+
+
+def _make_run(root, name, rows, weights=True, model='yolov8n.pt'):
+    run = root / name
+    (run / 'weights').mkdir(parents=True)
+    (run / 'args.yaml').write_text(yaml.safe_dump({'model': model, 'imgsz': 1024, 'epochs': 10}), encoding='utf-8')
+    (run / 'results.csv').write_text(HEADER + ''.join(f"{i + 1},1.0,{p},{r},{m},{m2}\n"
+                                                      for i, (p, r, m, m2) in enumerate(rows)), encoding='utf-8')
+    if weights:
+        (run / 'weights' / 'best.pt').write_bytes(name.encode())
+
+
+def test_read_best_epoch_uses_ultralytics_fitness(tmp_path):
+    path = tmp_path / 'results.csv'
+    path.write_text(HEADER.replace(',', ', ') + "1,1,0.9,0.2,0.8,0.3\n2,1,0.5,0.6,0.6,0.4\n", encoding='utf-8')
+    best = read_best_epoch(str(path))
+    assert best['best_epoch'] == 2 and best['recall'] == 0.6 and best['epochs_done'] == 2
+
+
+def test_registry_indexes_incrementally_and_selects_fastest(tmp_path):
+    runs = tmp_path / 'detect'
+    _make_run(runs, 'small', [(0.8, 0.7, 0.75, 0.4)])
+    _make_run(runs, 'big', [(0.9, 0.9, 0.92, 0.6)])
+    _make_run(runs, 'nobest', [(0.9, 0.9, 0.95, 0.7)], weights=False)
+    (runs / 'empty').mkdir()
+    data = tmp_path / 'dataset.yaml'
+    data.write_text("names: [target]\n", encoding='utf-8')
+
+    loaded = []
+
+    def load(path):
+        loaded.append(os.path.basename(os.path.dirname(os.path.dirname(path))))
+        return _Model(path)
+
+    with RunRegistry(str(tmp_path / 'registry.sqlite')) as reg:
+        assert reg.index(str(runs)) == {'indexed': 3, 'unchanged': 0, 'removed': 0}
+        assert [r['name'] for r in reg.runs()] == ['nobest', 'big', 'small']
+        # 训练尺寸(1024)的精度来自 results.csv，只有 320 需要验证
+        assert reg.validate([320, 1024], data=str(data), load_model=load) == 2
+        assert reg.accuracy(reg.runs()[1], 1024)['recall'] == 0.9
+        assert reg.benchmark([320, 1024], runs=2, warmup=0, load_model=load, threads=1) == 4
+
+        best = reg.select(threads=1)
+        assert best['name'] == 'small' and best['infer_imgsz'] == 320
+        # 精度要求按推理尺寸下的验证结果判断: big 只有在 1024 下才满足
+        best = reg.select(min_recall=0.8, threads=1)
+        assert best['name'] == 'big' and best['infer_imgsz'] == 1024 and best['recall'] == 0.9
+        assert reg.select(min_map50=0.99, threads=1) is None
+        assert reg.select(imgsz_list=[1024], threads=1)['infer_imgsz'] == 1024
+
+    # 重新打开: 未变化的运行不重新解析，精度和延迟不重新测量；删除的运行被移除
+    (runs / 'small' / 'results.csv').write_text(HEADER + "1,1,0.8,0.95,0.9,0.5\n", encoding='utf-8')
+    os.rename(runs / 'nobest', tmp_path / 'moved')
+    loaded.clear()
+    with RunRegistry(str(tmp_path / 'registry.sqlite')) as reg:
+        assert reg.index(str(runs)) == {'indexed': 1, 'unchanged': 1, 'removed': 1}
+        assert reg.validate([320, 1024], data=str(data), load_model=load) == 0
+        assert reg.benchmark([320, 1024], runs=2, warmup=0, load_model=load, threads=1) == 0
+        assert loaded == []
+        assert reg.select(min_recall=0.9, threads=1)['name'] == 'small'
+
+        # 权重更新后重新验证和测量，给出精度要求时只测量满足要求的尺寸
+        (runs / 'big' / 'weights' / 'best.pt').write_bytes(b'new weights')
+        reg.index(str(runs))
+        assert reg.validate([320, 1024], data=str(data), load_model=load) == 1 and loaded == ['big']
+        requirements = registry_requirements({'registry_min_recall': 0.8})
+        assert reg.benchmark([320, 1024], runs=1, warmup=0, load_model=load, threads=1,
+                             requirements=requirements) == 1
+        assert reg.latency(reg.runs()[0], 320, threads=1) is None
+        assert reg.select(threads=1, **requirements)['infer_imgsz'] == 1024
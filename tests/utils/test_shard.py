@@ -0,0 +1,35 @@
+import numpy as np
+
+from utils.shard import plan_shards, stitch_shards
+
+
+def _tracks(frames, ids_by_target):
+    """两个静止目标，ids_by_target 为它们在该分片中的局部ID"""
+    rows = []
+    for f in frames:
+        for (x, y), tid in zip([(100, 100), (300, 200)], ids_by_target, strict=True):
+            rows.append((f, tid, 0, 0.9, x - 5, y - 5, x + 5, y + 5))
+    data = np.array(rows, dtype=float)
+    cols = ('frame', 'track_id', 'cls', 'conf', 'x1', 'y1', 'x2', 'y2')
+    tracks = {c: data[:, i] for i, c in enumerate(cols)}
+    tracks['frame'] = tracks['frame'].astype(np.int64)
+    tracks['track_id'] = tracks['track_id'].astype(np.int64)
+    return tracks
+
+
+def test_plan_shards_cover_video_with_overlap():
+    plans = plan_shards(100, 3, overlap=10)
+    assert [p['core_start'] for p in plans] == [0, 33, 67]
+    assert [p['start'] for p in plans] == [0, 23, 57]
+    assert plans[-1]['stop'] == 100
+
+
+def test_stitch_shards_keeps_one_id_per_target():
+    plans = plan_shards(100, 2, overlap=10)
+    shard0 = _tracks(range(plans[0]['start'], plans[0]['stop']), [1, 2])
+    shard1 = _tracks(range(plans[1]['start'], plans[1]['stop']), [7, 3])
+    tracks = stitch_shards([shard0, shard1], plans)
+    assert len(tracks['frame']) == 200
+    left = tracks['x1'] < 200
+    assert set(tracks['track_id'][left]) == {1}
+    assert set(tracks['track_id'][~left]) == {2}
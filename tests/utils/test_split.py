@@ -0,0 +1,47 @@
+import os
+
+from utils.split import group_of, split_dataset
+
+
+def _paths(videos, frames, start=0):
+    return [f"images/GX01{v:04d}_{i:05d}.png" for v in videos for i in range(start, start + frames)]
+
+
+def test_group_of_uses_video_prefix():
+    assert group_of('GX010355_0240') == group_of('GX010355_1800') == 'GX010355'
+    assert group_of('frame') == 'frame'
+
+
+def test_split_is_grouped_deterministic_and_incremental(tmp_path):
+    a, b = tmp_path / 'a', tmp_path / 'b'
+    a.mkdir()
+    b.mkdir()
+    paths = _paths(range(20), 5)
+    first = split_dataset(paths, str(a), val_ratio=0.3)
+    # 同一组输入在另一个目录得到相同结果，与输入顺序无关
+    assert split_dataset(paths[::-1], str(b), val_ratio=0.3) == first
+    assert first['val'] and len(first['train']) + len(first['val']) == len(paths)
+
+    side = {}
+    for name in ('train', 'val'):
+        for p in first[name]:
+            g = group_of(os.path.splitext(os.path.basename(p))[0])
+            assert side.setdefault(g, name) == name
+
+    # 新帧和新视频只追加，已有图像不移动；修改比例不影响已划分的分组
+    more = paths + _paths(range(20), 2, start=5) + _paths(range(20, 25), 3)
+    second = split_dataset(more, str(a), val_ratio=0.9)
+    for name in ('train', 'val'):
+        assert second[name][:len(first[name])] == first[name]
+    assert len(second['train']) + len(second['val']) == len(more)
+    with open(a / 'train.txt', encoding='utf-8') as f:
+        assert f.read().split() == second['train']
+
+    # 删除的图像移出列表
+    third = split_dataset(more[1:], str(a))
+    assert more[0] not in third['train'] + third['val']
+
+
+def test_small_dataset_keeps_a_validation_group(tmp_path):
+    splits = split_dataset(_paths(range(2), 3), str(tmp_path), val_ratio=0.01)
+    assert len(splits['val']) == 3 and len(splits['train']) == 3
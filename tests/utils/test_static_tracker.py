@@ -0,0 +1,34 @@
+import numpy as np
+
+from utils.detection import Detections
+from utils.static_tracker import StaticTracker
+
+
+def _dets(centers, conf=0.9):
+    centers = np.asarray(centers, dtype=float)
+    xyxy = np.hstack([centers - 5, centers + 5])
+    return Detections(xyxy, np.full(len(centers), conf), np.zeros(len(centers)))
+
+
+def test_static_tracker_keeps_ids_for_jittering_points():
+    tracker = StaticTracker(max_displacement=10)
+    first = tracker.update(_dets([[100, 100], [130, 100]]))
+    ids = {x1 < 115: tid for x1, tid in zip(first[:, 0], first[:, 4], strict=True)}
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        jitter = rng.normal(0, 2, size=(2, 2))
+        out = tracker.update(_dets(np.array([[130, 100], [100, 100]]) + jitter))
+        for row in out:
+            assert ids[row[0] < 115] == row[4]
+    assert tracker._next_id == 3
+
+
+def test_static_tracker_gates_far_detections_and_drops_lost():
+    tracker = StaticTracker(max_displacement=10, max_lost=2)
+    tracker.update(_dets([[100, 100]]))
+    out = tracker.update(_dets([[150, 100]]))
+    assert out[0, 4] == 2
+    for _ in range(3):
+        tracker.update(Detections.empty())
+    assert len(tracker.ids) == 0
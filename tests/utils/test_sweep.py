@@ -0,0 +1,38 @@
+import numpy as np
+
+from utils.boxes import match_predictions
+from utils.detection import Detections
+from utils.prediction_cache import filter_detections
+from utils.sweep import best_operating_point, sweep_thresholds
+
+
+def _random_case(rng, n_images=6):
+    raw, gts = [], []
+    for _ in range(n_images):
+        gt = rng.uniform(0, 200, (4, 2))
+        gt = np.hstack([gt, gt + 20])
+        # 每个真值附近若干抖动的预测，再加一些随机误检
+        jitter = np.repeat(gt, 3, axis=0) + rng.normal(0, 4, (12, 4))
+        noise = rng.uniform(0, 200, (5, 2))
+        pred = np.vstack([jitter, np.hstack([noise, noise + 15])])
+        raw.append(Detections(pred, rng.uniform(0.01, 1.0, len(pred)), np.zeros(len(pred))))
+        gts.append(gt)
+    return raw, gts
+
+
+def test_sweep_matches_filtering_each_threshold_separately():
+    raw, gts = _random_case(np.random.default_rng(0))
+    conf_grid = [0.05, 0.3, 0.6, 0.9]
+    iou_grid = [0.3, 0.5, 0.7]
+    table = sweep_thresholds(raw, gts, conf_grid, iou_grid)
+
+    for k, iou in enumerate(iou_grid):
+        for j, conf in enumerate(conf_grid):
+            dets = [filter_detections(d, conf, iou) for d in raw]
+            tp = sum(int(match_predictions(d.xyxy, g).sum()) for d, g in zip(dets, gts, strict=True))
+            assert table['detections'][k, j] == sum(len(d) for d in dets)
+            assert table['tp'][k, j] == tp
+
+    best = best_operating_point(table)
+    assert best['f1'] == table['f1'].max()
+    assert best['tp'] + best['fn'] == table['gt'] == 24
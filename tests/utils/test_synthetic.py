@@ -0,0 +1,38 @@
+import glob
+import os
+
+import numpy as np
+
+from utils.baseline import compare_metrics, flatten_metrics
+from utils.convert_labelme_to_yolo import convert_labelme_to_yolo
+from utils.synthetic import make_labelme_dataset, marker_trajectories, tracks_from_centers
+
+
+def test_trajectories_and_tracks_are_reproducible():
+    a = marker_trajectories(20, markers=4, seed=3)
+    b = marker_trajectories(20, markers=4, seed=3)
+    np.testing.assert_array_equal(a, b)
+    assert a.shape == (20, 4, 2)
+
+    tracks = tracks_from_centers(a, box_size=16)
+    cx = (tracks['x1'] + tracks['x2']) / 2
+    assert np.all(cx == np.round(cx))  # 检测框只有整像素精度
+    assert np.abs(cx - a[..., 0].ravel()).max() <= 0.5
+
+
+def test_labelme_dataset_converts_to_matching_yolo_labels(tmp_path):
+    make_labelme_dataset(str(tmp_path / 'lm'), images=3, markers=2, shape=(120, 160), box_size=10)
+    convert_labelme_to_yolo(str(tmp_path / 'lm' / 'json'), str(tmp_path / 'lm' / 'images'), str(tmp_path / 'yolo'))
+
+    labels = sorted(glob.glob(os.path.join(tmp_path, 'yolo', 'labels', '*.txt')))
+    assert len(labels) == 3
+    data = np.loadtxt(labels[0], ndmin=2)
+    assert data.shape == (2, 5)
+    np.testing.assert_allclose(data[:, 3], 10 / 160, atol=1e-6)
+
+
+def test_compare_metrics_uses_direction_by_name():
+    baseline = flatten_metrics({'tracking': {'fps': 100.0}, 'displacement': {'rmse_px': 0.02}})
+    rows = compare_metrics({'tracking.fps': 80.0, 'displacement.rmse_px': 0.015}, baseline, tolerance=0.1)
+    regressed = {r['metric']: r['regressed'] for r in rows}
+    assert regressed == {'tracking.fps': True, 'displacement.rmse_px': False}
@@ -0,0 +1,19 @@
+import numpy as np
+
+from utils.tiling import tile_grid
+
+
+def test_tile_grid_covers_frame_with_overlap():
+    tiles = tile_grid((2160, 3840, 3), tile_size=1024, overlap=0.25)
+    assert tiles[:, 2].max() == 3840 and tiles[:, 3].max() == 2160
+    assert ((tiles[:, 2] - tiles[:, 0]) == 1024).all()
+    covered = np.zeros((2160, 3840), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+    xs = np.unique(tiles[:, 0])
+    assert (np.diff(xs) <= 768).all()
+
+
+def test_tile_grid_small_frame_is_single_tile():
+    np.testing.assert_array_equal(tile_grid((480, 640), tile_size=1024), [[0, 0, 640, 480]])
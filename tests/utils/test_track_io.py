@@ -0,0 +1,17 @@
+import numpy as np
+
+from utils.track_io import TrackWriter, read_tracks
+
+
+def test_track_writer_roundtrip(tmp_path):
+    rows = np.array([[1, 0, 0.9, 10, 20, 30, 40], [2, 0, 0.8, 50, 60, 70, 80]], dtype=float)
+    with TrackWriter(str(tmp_path), chunk_size=3) as writer:
+        for frame_idx in range(5):
+            writer.write(frame_idx, rows)
+    assert writer.rows_written == 10
+    assert writer.chunks_written == 3
+
+    tracks = read_tracks(str(tmp_path))
+    np.testing.assert_array_equal(tracks['frame'], np.repeat(np.arange(5), 2))
+    np.testing.assert_array_equal(tracks['track_id'], np.tile([1, 2], 5))
+    np.testing.assert_allclose(tracks['x2'], np.tile([30, 70], 5))
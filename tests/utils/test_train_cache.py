@@ -0,0 +1,103 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.label_store import LabelStore
+from utils.split import split_dataset
+from utils.synthetic import make_yolo_dataset
+from utils.train_cache import (
+    TrainCache,
+    cached_dataset_class,
+    dataset_split_files,
+    img2label_path,
+    resize_long_side,
+)
+
+
+def _dataset(tmp_path, images=10):
+    data = make_yolo_dataset(str(tmp_path / 'ds'), images=images, markers=2, shape=(60, 90), box_size=10)
+    images_dir = os.path.join(data, 'images')
+    return data, sorted(os.path.join(images_dir, f) for f in os.listdir(images_dir))
+
+
+def test_cache_matches_direct_decoding_and_labels(tmp_path):
+    data, files = _dataset(tmp_path)
+    cache, stats = TrainCache.prepare(files, str(tmp_path / 'cache'), imgsz=48, shard_size=4, workers=2)
+    assert stats['built'] == 10 and stats['shards'] == 3
+
+    cache = TrainCache.load(str(tmp_path / 'cache'))
+    store = LabelStore.load(os.path.join(data, 'labels'))
+    for i in (0, 5, 9):
+        img, (h0, w0), (h, w) = cache.image(i)
+        expected = resize_long_side(cv2.imread(files[i]), 48)
+        assert (h0, w0) == (60, 90) and (h, w) == expected.shape[:2] == (32, 48)
+        np.testing.assert_array_equal(img, expected)
+        name = os.path.splitext(os.path.basename(files[i]))[0]
+        np.testing.assert_allclose(cache.labels(i), store.boxes(name))
+    assert img.flags.writeable
+
+
+def test_cache_reuses_shards_and_invalidates_on_imgsz(tmp_path):
+    _, files = _dataset(tmp_path, images=12)
+    out = str(tmp_path / 'cache')
+    TrainCache.prepare(files[:8], out, imgsz=32, shard_size=4, workers=1)
+
+    # 追加新帧: 前两个完整分片沿用
+    cache, stats = TrainCache.prepare(files, out, imgsz=32, shard_size=4, workers=1)
+    assert stats['reused'] == 8 and stats['built'] == 4 and len(cache) == 12
+
+    _, stats = TrainCache.prepare(files, out, imgsz=40, shard_size=4, workers=1)
+    assert stats['built'] == 12
+
+    # 删除末尾的帧: 不需要重建，多余的分片被删除
+    cache, stats = TrainCache.prepare(files[:5], out, imgsz=40, shard_size=4, workers=1)
+    assert stats['built'] == 0 and len(TrainCache.load(out)) == 5
+    assert sorted(f for f in os.listdir(out) if f.startswith('shard_')) == ['shard_0000.npy', 'shard_0001.npy']
+
+
+def test_cache_rebuilds_shard_of_rewritten_image(tmp_path):
+    _, files = _dataset(tmp_path, images=8)
+    out = str(tmp_path / 'cache')
+    TrainCache.prepare(files, out, imgsz=32, shard_size=4, workers=1)
+
+    # 同一路径的图像被改写(如重新导出的帧)，只重建它所在的分片
+    img = np.full((60, 90, 3), 200, dtype=np.uint8)
+    cv2.imwrite(files[5], img)
+    st = os.stat(files[5])
+    os.utime(files[5], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    cache, stats = TrainCache.prepare(files, out, imgsz=32, shard_size=4, workers=1)
+    assert stats['built'] == 4 and stats['reused'] == 4
+    np.testing.assert_array_equal(cache.image(5)[0], resize_long_side(img, 32))
+
+    _, stats = TrainCache.prepare(files, out, imgsz=32, shard_size=4, workers=1)
+    assert stats['built'] == 0
+
+
+def test_dataset_split_files_reads_split_lists(tmp_path):
+    data, files = _dataset(tmp_path, images=20)
+    splits = split_dataset(files, data, val_ratio=0.3)
+    yaml_path = os.path.join(data, 'dataset.yaml')
+    with open(yaml_path, 'w', encoding='utf-8') as f:
+        f.write(f"path: {data}\ntrain: train.txt\nval: val.txt\nnames: [target]\n")
+    assert dataset_split_files(yaml_path) == splits
+    assert img2label_path(files[0]) == os.path.join(data, 'labels', os.path.basename(files[0])[:-4] + '.txt')
+
+
+def test_cached_dataset_fills_mosaic_buffer(tmp_path):
+    pytest.importorskip('ultralytics')
+    from ultralytics.cfg import get_cfg
+
+    _, files = _dataset(tmp_path, images=8)
+    cache, _ = TrainCache.prepare(files, str(tmp_path / 'cache'), imgsz=64, shard_size=4, workers=1)
+    dataset = cached_dataset_class()(train_cache=cache, img_path=str(tmp_path / 'ds' / 'images'), imgsz=64,
+                                     batch_size=4, augment=True, hyp=get_cfg(), rect=False, cache=None,
+                                     stride=32, pad=0.0, data={'names': {0: 'target'}, 'channels': 3})
+    # 默认 mosaic=1.0: 第一张图像就要从缓冲区中抽取其余三张
+    for i in range(len(files)):
+        item = dataset[i]
+        assert tuple(item['img'].shape) == (3, 64, 64)
+    assert dataset.buffer and all(dataset.ims[j] is not None for j in dataset.buffer)
+    img, hw0, hw = dataset.load_image(dataset.buffer[0])
+    assert hw0 == (60, 90) and hw == img.shape[:2] == (43, 64)
@@ -1,8 +1,558 @@
 import os
-import yaml
-from ultralytics import YOLO
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import cv2
 import numpy as np
+import yaml
+
+from extract_displacement import run_displacement
+from utils.checkpoint import load_checkpoint, save_checkpoint
+from utils.detection import FrameDetector, detect_frames, make_tracker, tracks_to_rows
+from utils.export_backend import resolve_backend
+from utils.inference_server import RemoteModel, load_model
+from utils.keyframe import KeyframeScheduler
+from utils.label_render import read_class_names
+from utils.motion import MotionGate
+from utils.pipeline import run_pipeline
+from utils.prediction_cache import PredictionCache
+from utils.profiler import StageProfiler
+from utils.roi import RoiDetector
+from utils.run_registry import resolve_model
+from utils.shard import plan_shards, stitch_shards
+from utils.tiling import TiledDetector
+from utils.track_io import TrackWriter, read_tracks, results_to_rows, track_drift, write_tracks
+from utils.video import (
+    IMAGE_EXTS,
+    AnnotatedVideoWriter,
+    draw_rows,
+    iter_frames,
+    list_images,
+    video_info,
+)
+
+# 每个工作进程只加载一次的模型及参数
+_worker = {}
+
+def run_stream(results, tracks_dir, chunk_size=10000, profiler=None):
+    """
+    逐帧消费结果生成器，并把每帧的框追加写入分块列式文件
+
+    参数:
+    results: model.track / model.predict 在 stream=True 下返回的生成器
+    tracks_dir: 轨迹块文件输出目录
+    chunk_size: 每个块文件的行数
+    profiler: 可选的 StageProfiler
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    frame_count = 0
+    with TrackWriter(tracks_dir, chunk_size=chunk_size) as writer:
+        # 生成器内部完成解码+推理+追踪，整体计为 predict 阶段，细分耗时取自 r.speed
+        for frame_idx, r in enumerate(profiler.iterate(results, 'predict')):
+            with profiler.frame():
+                profiler.record_speed([r])
+                with profiler.stage('write'):
+                    rows = results_to_rows(r)
+                    writer.write(frame_idx, rows)
+            frame_count += 1
+            if frame_count % 500 == 0:
+                print(f"已处理 {frame_count} 帧, 已写出 {writer.rows_written} 行")
+
+    print(f"流式处理完成: 共 {frame_count} 帧, {writer.rows_written} 条记录, "
+          f"{writer.chunks_written} 个块文件 -> {tracks_dir}")
+    return frame_count
+
+def load_class_names(dataset_yaml):
+    """从数据集配置文件读取类别名称 {id: name}(names 为列表时按下标编号)，文件不存在时使用默认类别"""
+    if os.path.exists(dataset_yaml):
+        class_names = read_class_names(dataset_yaml)
+        print(f"加载类别配置: {class_names}")
+    else:
+        class_names = {0: 'target'}  # 默认类别
+        print(f"警告: 未找到数据集配置文件 {dataset_yaml}, 使用默认类别")
+    return class_names
+
+def build_predict_args(config, class_names):
+    """由配置构造传给 model.predict 的参数"""
+    args = {
+        'conf': config.get('conf', 0.05),
+        'iou': config.get('iou', 0.5),
+        'device': config.get('device', 'cpu'),
+        'classes': list(class_names.keys()) if class_names else None,
+    }
+    # 推理尺寸: 由登记表选择模型时确定，否则使用模型训练时的尺寸
+    if config.get('track_imgsz'):
+        args['imgsz'] = config['track_imgsz']
+    return args
+
+def build_tracker(config, frame_rate):
+    """根据配置创建追踪器，tracker 为 static 时使用内置的静止目标追踪器"""
+    return make_tracker(
+        config.get('tracker', 'bytetrack.yaml'), frame_rate,
+        max_displacement=config.get('static_max_displacement', 15.0),
+        max_lost=config.get('static_max_lost', 30),
+        new_track_thresh=config.get('static_new_track_thresh', 0.25),
+        anchor_momentum=config.get('static_anchor_momentum', 0.0),
+    )
+
+def build_detector(model, config, predict_args):
+    """根据配置创建整帧检测器、切片检测器或ROI检测器"""
+    if config.get('tile_mode', False):
+        return TiledDetector(
+            model, predict_args,
+            tile_size=config.get('tile_size', 640),
+            overlap=config.get('tile_overlap', 0.2),
+        )
+    if config.get('roi_mode', False):
+        return RoiDetector(
+            model, predict_args,
+            pad=config.get('roi_pad', 64),
+            min_size=config.get('roi_min_size', 160),
+            full_interval=config.get('roi_full_interval', 30),
+            roi_imgsz=config.get('roi_imgsz', 320),
+        )
+    return FrameDetector(model, predict_args)
+
+def track_frame(frame, rows, detector, tracker, scheduler, profiler=None):
+    """
+    处理一帧: 非关键帧用光流传播上一帧的轨迹，关键帧(或传播置信度不足时)运行检测+追踪
+    
+    返回:
+    (本帧轨迹行, 是否运行了检测)
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if scheduler.interval > 1 else None
+    if not scheduler.need_detection():
+        with profiler.stage('flow'):
+            propagated, confidence = scheduler.propagate(gray)
+        if confidence >= scheduler.min_confidence:
+            return propagated, False
+        # 传播置信度不足，本帧改为重新检测
+    with profiler.stage('detect'):
+        dets = detector(frame, rows)
+    with profiler.stage('track'):
+        rows = tracks_to_rows(tracker.update(dets, frame))
+    scheduler.reset(gray, rows)
+    return rows, True
+
+def annotated_video_path(source, tracks_dir):
+    """标注视频写在轨迹目录旁边: <视频名>_tracked.mp4"""
+    stem = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    return os.path.join(os.path.dirname(tracks_dir), f"{stem}_tracked.mp4")
+
+def run_frame_loop(model, config, predict_args, tracks_dir, chunk_size=10000, start=0, stop=None,
+                   profiler=None, class_names=None):
+    """
+    逐帧检测+追踪循环，支持关键帧调度、运动门控与ROI/切片推理
+    
+    每 keyframe_interval 帧(或光流置信度下降时)运行一次检测+追踪，
+    中间帧用金字塔LK光流传播框中心；检测本身可以是整帧、切片或ROI裁剪推理。
+    motion_gate 为真时画面静止的帧直接沿用上一帧的轨迹(held 列为真)
+    
+    参数:
+    model: YOLO模型
+    config: 配置字典
+    predict_args: 传给 model.predict 的参数
+    tracks_dir: 轨迹块文件输出目录
+    chunk_size: 每个块文件的行数
+    start, stop: 只处理帧区间 [start, stop)
+    profiler: 可选的 StageProfiler，记录解码/门控/光流/检测/追踪/写出各阶段耗时
+    class_names: 标注视频中显示的类别名称
+    
+    save 为真时与流水线一样写出标注视频；从检查点恢复时视频无法续写，只包含恢复之后的帧。
+    checkpoint_interval > 0 时每隔该帧数保存一次检查点(追踪器状态、最后处理的帧号、
+    已写出的块数)，resume 为 true 时从检查点继续，输出与不中断的运行一致
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    source = config['source']
+    info = video_info(source)
+    tracker = build_tracker(config, info['fps'])
+    detector = build_detector(model, config, predict_args)
+    detector.profiler = profiler
+    scheduler = KeyframeScheduler(
+        interval=config.get('keyframe_interval', 1),
+        min_confidence=config.get('keyframe_min_confidence', 0.8),
+        win_size=config.get('lk_win_size', 15),
+        max_level=config.get('lk_max_level', 2),
+    )
+    gate = None
+    if config.get('motion_gate', False):
+        gate = MotionGate(
+            threshold=config.get('motion_threshold', 2.0),
+            scale=config.get('motion_scale', 0.25),
+            roi_only=config.get('motion_roi_only', True),
+            max_hold=config.get('motion_max_hold', 300),
+        )
+    
+    frame_count = 0
+    detect_count = 0
+    rows = None
+    start_chunk = 0
+    start_rows = 0
+    first_frame = start
+    ckpt_interval = config.get('checkpoint_interval', 0)
+    ckpt_path = os.path.join(tracks_dir, 'checkpoint.pkl')
+    if config.get('resume', False):
+        state = load_checkpoint(ckpt_path)
+        if state is None or state['source'] != source or state['start'] != start:
+            print(f"未找到可用的检查点 {ckpt_path}，从头开始")
+        elif state['done']:
+            print(f"检查点显示该任务已完成 ({state['frame_count']} 帧)，跳过")
+            return state['frame_count']
+        else:
+            tracker = state['tracker']
+            scheduler = state['scheduler']
+            gate = state['gate']
+            detector.load_state_dict(state['detector'])
+            rows = state['rows']
+            frame_count = state['frame_count']
+            detect_count = state['detect_count']
+            start_chunk = state['chunks_written']
+            start_rows = state['rows_written']
+            first_frame = state['frame'] + 1
+            print(f"从检查点恢复: 已处理 {frame_count} 帧, 从第 {state['frame'] + 1} 帧继续")
+    
+    def checkpoint(frame_idx, done=False):
+        save_checkpoint(ckpt_path, {
+            'source': source,
+            'start': start,
+            'frame': frame_idx,
+            'done': done,
+            'frame_count': frame_count,
+            'detect_count': detect_count,
+            'chunks_written': writer.chunks_written,
+            'rows_written': writer.rows_written,
+            'tracker': tracker,
+            'scheduler': scheduler,
+            'gate': gate,
+            'detector': detector.state_dict(),
+            'rows': rows,
+        })
+    
+    save = config.get('save', True)
+    video_path = annotated_video_path(source, tracks_dir)
+    if save:
+        if first_frame > start:
+            video_path = f"{os.path.splitext(video_path)[0]}_from{first_frame}.mp4"
+            print(f"注意: 标注视频无法续写，恢复后的帧写入 {video_path}")
+        else:
+            print(f"标注视频: {video_path}")
+    
+    frame_idx = first_frame - 1
+    # 本次运行中门控跳过/实际处理的帧数与耗时(不含解码)，用于估算门控的实际收益
+    static_frames = active_frames = 0
+    static_s = active_s = 0.0
+    t0 = time.perf_counter()
+    with TrackWriter(tracks_dir, chunk_size=chunk_size, start_chunk=start_chunk,
+                     start_rows=start_rows) as writer, \
+            AnnotatedVideoWriter(video_path, fps=info['fps'], class_names=class_names) as video:
+        for frame_idx, frame in profiler.iterate(iter_frames(source, first_frame, stop), 'decode'):
+            with profiler.frame():
+                t_frame = time.perf_counter()
+                static = False
+                if gate is not None:
+                    with profiler.stage('motion_gate'):
+                        static = gate.is_static(frame, rows)
+                if static:
+                    # 画面静止: 跳过检测，沿用上一帧的轨迹
+                    with profiler.stage('write'):
+                        writer.write(frame_idx, rows, held=True)
+                else:
+                    rows, detected = track_frame(frame, rows, detector, tracker, scheduler, profiler)
+                    detect_count += detected
+                    with profiler.stage('write'):
+                        writer.write(frame_idx, rows)
+                if save:
+                    with profiler.stage('video'):
+                        video.write(frame_idx, frame, rows if rows is not None else np.empty((0, 7)))
+                if static:
+                    static_frames += 1
+                    static_s += time.perf_counter() - t_frame
+                else:
+                    active_frames += 1
+                    active_s += time.perf_counter() - t_frame
+                frame_count += 1
+                if ckpt_interval and frame_count % ckpt_interval == 0:
+                    # 先把缓冲区写盘，保证检查点记录的块与已处理的帧完全对应
+                    with profiler.stage('checkpoint'):
+                        writer.flush()
+                        checkpoint(frame_idx)
+        writer.flush()
+        if ckpt_interval:
+            checkpoint(frame_idx, done=True)
+    elapsed = time.perf_counter() - t0
+    
+    fps = frame_count / elapsed if elapsed > 0 else 0.0
+    print(f"逐帧循环完成: {frame_count} 帧, 检测 {detect_count} 次 "
+          f"({detect_count / max(frame_count, 1):.1%}), {fps:.2f} FPS")
+    if gate is not None:
+        print(f"运动门控: 跳过 {gate.skipped} 帧 ({gate.skipped / max(frame_count, 1):.1%}), "
+              f"跳过比 {frame_count / max(frame_count - gate.skipped, 1):.2f}:1")
+        if static_frames and active_frames:
+            # 假设被跳过的帧若正常处理，耗时与实际处理的帧相同
+            static_ms, active_ms = static_s / static_frames * 1000, active_s / active_frames * 1000
+            gain = active_s / active_frames * (static_frames + active_frames) / (static_s + active_s)
+            print(f"  跳过的帧平均 {static_ms:.2f} ms, 处理的帧平均 {active_ms:.2f} ms, "
+                  f"按实测耗时推算检测+追踪部分提速约 {gain:.2f} 倍(不含解码)")
+    stats = detector.summary()
+    print(f"检测统计: {stats}")
+    
+    # 与逐帧完整运行的结果比较漂移
+    reference = config.get('reference_tracks')
+    if reference and os.path.isdir(reference):
+        drift = track_drift(read_tracks(reference), read_tracks(tracks_dir))
+        print(f"相对参考轨迹 {reference} 的漂移: 匹配 {drift['matched']}, 未匹配 {drift['unmatched']}, "
+              f"平均 {drift['mean_px']:.3f}px, p95 {drift['p95_px']:.3f}px, 最大 {drift['max_px']:.3f}px")
+    return frame_count
+
+def run_pipelined(model, config, predict_args, tracks_dir, chunk_size=10000, class_names=None,
+                  start=0, stop=None, profiler=None):
+    """
+    解码/推理/写出 三线程流水线模式
+    
+    解码线程读帧进入有界队列，推理阶段按 batch_size 组批一次前向，
+    追踪器按帧顺序更新，写出线程负责轨迹块文件和标注视频
+    
+    参数:
+    model: YOLO模型
+    config: 配置字典
+    predict_args: 传给 model.predict 的参数
+    tracks_dir: 轨迹块文件输出目录
+    chunk_size: 每个块文件的行数
+    class_names: 类别名称映射，用于标注视频
+    start, stop: 只处理帧区间 [start, stop)
+    profiler: 可选的 StageProfiler；各阶段在各自的线程中计时，
+              每帧延迟记为其所在批次的推理+追踪耗时
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    source = config['source']
+    info = video_info(source)
+    tracker = build_tracker(config, info['fps'])
+    
+    def process_batch(batch):
+        t0 = time.perf_counter()
+        with profiler.stage('detect'):
+            dets = detect_frames(model, [frame for _, frame in batch], profiler=profiler, **predict_args)
+        with profiler.stage('track'):
+            out = [
+                (frame_idx, frame, tracks_to_rows(tracker.update(d, frame)))
+                for (frame_idx, frame), d in zip(batch, dets, strict=True)
+            ]
+        profiler.batch_done(time.perf_counter() - t0, len(batch))
+        return out
+    
+    def timed(name, sink):
+        def write(idx, frame, rows):
+            with profiler.stage(name):
+                sink(idx, frame, rows)
+        return write
+    
+    video_path = annotated_video_path(source, tracks_dir)
+    with TrackWriter(tracks_dir, chunk_size=chunk_size) as writer, \
+            AnnotatedVideoWriter(video_path, fps=info['fps'], class_names=class_names) as video:
+        sinks = [timed('write', lambda idx, frame, rows: writer.write(idx, rows))]
+        if config.get('save', True):
+            sinks.append(timed('video', video.write))
+        stats = run_pipeline(
+            profiler.iterate(iter_frames(source, start, stop), 'decode'), process_batch, sinks,
+            batch_size=config.get('batch_size', 8),
+            queue_depth=config.get('queue_depth', 32),
+        )
+    
+    print(f"流水线完成: {stats['frames']} 帧, {stats['batches']} 批, {stats['fps']:.2f} FPS "
+          f"(推理 {stats['infer_s']:.1f}s, 等待解码 {stats['decode_wait_s']:.1f}s)")
+    return stats
+
+def needs_frame_loop(config):
+    """关键帧、ROI、切片、运动门控或检查点模式需要逐帧的状态或自定义检测器，只能走逐帧循环"""
+    return (config.get('keyframe_interval', 1) > 1 or config.get('roi_mode', False)
+            or config.get('tile_mode', False) or config.get('checkpoint_interval', 0) > 0
+            or config.get('motion_gate', False))
+
+def uses_frame_engine(config):
+    """配置是否启用了由本脚本驱动逐帧循环的模式(关键帧/ROI/切片/流水线/内置追踪器等)"""
+    return (needs_frame_loop(config) or config.get('pipeline', False)
+            or config.get('tracker') == 'static')
+
+def track_video(model, config, predict_args, tracks_dir, chunk_size=10000, class_names=None,
+                start=0, stop=None, profiler=None):
+    """
+    对 config['source'] 执行一次完整的追踪并写出轨迹
+    
+    needs_frame_loop() 为真时走逐帧循环；否则走批量流水线
+    
+    返回:
+    处理的帧数
+    """
+    if needs_frame_loop(config):
+        return run_frame_loop(model, config, predict_args, tracks_dir, chunk_size=chunk_size,
+                              start=start, stop=stop, profiler=profiler, class_names=class_names)
+    stats = run_pipelined(model, config, predict_args, tracks_dir, chunk_size=chunk_size,
+                          class_names=class_names, start=start, stop=stop, profiler=profiler)
+    return stats['frames']
+
+def init_worker(config, threads=1):
+    """工作进程初始化: 限制线程数并加载一次模型(使用推理服务时只连接服务)"""
+    class_names = load_class_names(config.get('data', 'datasets/dataset.yaml'))
+    _worker['model'] = load_model(config, config.get('track_model', 'runs/detect/train_improved4/weights/best.pt'))
+    if not isinstance(_worker['model'], RemoteModel):
+        import torch
+        
+        torch.set_num_threads(threads)
+    _worker['class_names'] = class_names
+    _worker['predict_args'] = build_predict_args(config, class_names)
+    _worker['config'] = config
+
+def track_worker(source, tracks_dir, start=0, stop=None, **overrides):
+    """在工作进程中追踪一个视频(或其中一个帧区间)，返回吞吐统计"""
+    config = dict(_worker['config'], source=source, **overrides)
+    profiler = StageProfiler(enabled=config.get('profile', False))
+    t0 = time.perf_counter()
+    frames = track_video(
+        _worker['model'], config, _worker['predict_args'], tracks_dir,
+        chunk_size=config.get('track_chunk_size', 10000),
+        class_names=_worker['class_names'],
+        start=start, stop=stop, profiler=profiler,
+    )
+    elapsed = time.perf_counter() - t0
+    # 每个视频/分片的性能报告写在各自的轨迹目录中
+    profiler.save(tracks_dir)
+    return {'video': source, 'pid': os.getpid(), 'start': start, 'frames': frames, 'elapsed_s': elapsed}
+
+def run_sharded(config, tracks_dir, chunk_size=10000):
+    """
+    把一个长视频切成相互重叠的帧区间，在多个进程中分别追踪，
+    再根据重叠帧内的框位置拼接轨迹ID，使每个目标只有一个全局ID
+    
+    参数:
+    config: 配置字典，shards 为分片数，shard_overlap 为重叠帧数
+    tracks_dir: 拼接后轨迹块文件的输出目录
+    chunk_size: 每个块文件的行数
+    """
+    source = config['source']
+    info = video_info(source)
+    plans = plan_shards(info['frame_count'], config.get('shards', os.cpu_count() or 1),
+                        overlap=config.get('shard_overlap', 60))
+    threads = max(1, (os.cpu_count() or 1) // len(plans))
+    shard_root = os.path.join(os.path.dirname(tracks_dir), 'shards')
+    print(f"分片追踪: {info['frame_count']} 帧 -> {len(plans)} 个分片 x {threads} 线程, "
+          f"重叠 {config.get('shard_overlap', 60)} 帧 (分片模式不保存标注视频)")
+    
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(plans), initializer=init_worker,
+                             initargs=(config, threads)) as pool:
+        futures = [
+            pool.submit(track_worker, source, os.path.join(shard_root, f"shard_{i:03d}"),
+                        plan['start'], plan['stop'], save=False)
+            for i, plan in enumerate(plans)
+        ]
+        records = [f.result() for f in futures]
+    
+    shard_tracks = [read_tracks(os.path.join(shard_root, f"shard_{i:03d}")) for i in range(len(plans))]
+    tracks = stitch_shards(shard_tracks, plans, max_distance=config.get('shard_match_distance', 10.0))
+    rows = write_tracks(tracks_dir, tracks, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - t0
+    
+    print(f"分片追踪完成: {info['frame_count']} 帧, {len(np.unique(tracks['track_id']))} 个全局轨迹, "
+          f"{rows} 条记录, {info['frame_count'] / max(elapsed, 1e-9):.2f} FPS")
+    for i, r in enumerate(records):
+        print(f"  分片 {i}: 帧 {plans[i]['start']}-{plans[i]['stop']}, "
+              f"{r['frames'] / max(r['elapsed_s'], 1e-9):.2f} FPS")
+    return rows
+
+def build_prediction_cache(config):
+    """由配置创建磁盘预测缓存"""
+    return PredictionCache(
+        config.get('prediction_cache_dir', 'runs/cache/predictions'),
+        max_size_mb=config.get('prediction_cache_mb', 2048),
+        raw_conf=config.get('prediction_cache_conf', 0.001),
+    )
+
+def run_cached_detection(model, config, class_names, tracks_dir, chunk_size=10000, profiler=None):
+    """
+    检测模式的缓存版本: 原始检测按(权重, 图像内容, imgsz, device)缓存在磁盘上，
+    只改变 conf / iou 的重复运行不再推理，只对缓存结果重新过滤
+    
+    检测框按 track_id=-1 写入轨迹块文件；图像目录按文件内容哈希，视频按解码后的帧哈希。
+    缓存的是NMS之前的原始检测，重新过滤的结果与直接推理一致(每张图像最多缓存 max_det 个框，
+    截断时会给出警告)。save 为真时把标注图像写在轨迹目录旁边，视频写为 <视频名>_tracked.mp4；
+    不支持 show
+    
+    返回:
+    处理的图像/帧数
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+    cache = build_prediction_cache(config)
+    source = config['source']
+    weights = config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')
+    batch_size = config.get('batch_size', 8)
+    filter_args = {
+        'imgsz': config.get('track_imgsz') or config.get('imgsz', 640),
+        'device': config.get('device', 'cpu'),
+        'conf': config.get('conf', 0.05),
+        'iou': config.get('iou', 0.5),
+        'classes': list(class_names.keys()) if class_names else None,
+        'batch_size': batch_size,
+    }
+    
+    if os.path.isdir(source) or source.lower().endswith(IMAGE_EXTS):
+        paths = list_images(source) if os.path.isdir(source) else [source]
+        batches = ([(i, p) for i, p in enumerate(paths[s:s + batch_size], start=s)]
+                   for s in range(0, len(paths), batch_size))
+    else:
+        def batches_of_frames():
+            batch = []
+            for item in iter_frames(source):
+                batch.append(item)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        batches = batches_of_frames()
+    
+    save = config.get('save', True)
+    out_dir = os.path.dirname(tracks_dir)
+    if config.get('show', False):
+        print("提示: 缓存检测模式不显示结果(show)，需要显示时关闭 prediction_cache")
+    
+    count = 0
+    with TrackWriter(tracks_dir, chunk_size=chunk_size) as writer, \
+            AnnotatedVideoWriter(annotated_video_path(source, tracks_dir), fps=video_info(source)['fps'],
+                                 class_names=class_names) as video:
+        for batch in profiler.iterate(batches, 'decode'):
+            t0 = time.perf_counter()
+            with profiler.stage('predict'):
+                dets = cache.predict(model, [item for _, item in batch], weights, **filter_args)
+            profiler.batch_done(time.perf_counter() - t0, len(batch))
+            for (idx, item), d in zip(batch, dets, strict=True):
+                rows = np.column_stack([np.full(len(d), -1.0), d.cls, d.conf, d.xyxy]).astype(np.float64)
+                writer.write(idx, rows)
+                if save:
+                    with profiler.stage('save'):
+                        if isinstance(item, str):
+                            cv2.imwrite(os.path.join(out_dir, os.path.basename(item)),
+                                        draw_rows(cv2.imread(item), rows, class_names))
+                        else:
+                            video.write(idx, item, rows)
+                count += 1
+                print(f"图片 {idx + 1}: 检测到 {len(d)} 个目标" if len(d) else f"图片 {idx + 1}: 未检测到目标")
+    
+    stats = cache.stats()
+    print(f"预测缓存: 命中 {stats['hits']}, 未命中 {stats['misses']} (命中率 {stats['hit_rate']:.1%}), "
+          f"淘汰 {stats['evictions']}, 占用 {stats['size_mb']:.1f}MB")
+    if stats['truncated']:
+        print(f"警告: {stats['truncated']} 张图像的原始检测在 max_det={cache.max_det} 处截断，"
+              f"conf={filter_args['conf']} 的过滤结果可能与直接推理不同，可提高 prediction_cache_conf")
+    if save:
+        print(f"标注结果已保存到 {out_dir}/")
+    return count
+
+def record_results(profiler, results):
+    """非流式的 predict/track 只返回结果列表，按每帧 r.speed 记录各阶段耗时和每帧延迟"""
+    profiler.record_speed(results)
+    for r in results:
+        profiler.frame_done(sum(v for v in r.speed.values() if v is not None) / 1000)
 
 def main():
     # 加载配置文件
@@ -20,6 +570,11 @@ def main():
         print("错误：配置文件中缺少 'source' 项，请指定输入视频或图像目录！")
         return
     
+    # track_model 为 registry 时由登记表选择满足精度要求的最快模型及推理尺寸
+    config = resolve_model(config)
+    if config is None:
+        return
+    
     # 设置默认值和从配置中获取值
     model_path = config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')
     show = config.get('show', False)
@@ -31,18 +586,19 @@ def main():
     # 是否使用检测模式(而非跟踪模式)
     detection_mode = config.get('detection_mode', False)
     
+    # 流式模式: 逐帧处理并写盘，内存占用不随视频长度增长
+    stream = config.get('stream', False)
+    tracks_dir = os.path.join(project, name, 'tracks')
+    chunk_size = config.get('track_chunk_size', 10000)
+    
+    # 分阶段性能分析: 报告保存为 <project>/<name>/profile.json 和 profile.csv
+    profiler = StageProfiler(enabled=config.get('profile', False))
+    
     # 获取数据集配置文件路径
     dataset_yaml = config.get('data', 'D:/Clouddisk/Dropbox/01-Research/2_co-research/HT_Sui/disp_track/data/dataset.yaml')
     
     # 加载数据集配置以获取类别信息
-    if os.path.exists(dataset_yaml):
-        with open(dataset_yaml, 'r', encoding='utf-8') as f:
-            dataset_config = yaml.safe_load(f)
-            class_names = dataset_config.get('names', {})
-            print(f"加载类别配置: {class_names}")
-    else:
-        class_names = {0: 'target'}  # 默认类别
-        print(f"警告: 未找到数据集配置文件 {dataset_yaml}, 使用默认类别")
+    class_names = load_class_names(dataset_yaml)
     
     # 降低默认检测阈值
     conf_threshold = config.get('conf', 0.05)  # 进一步降低阈值到0.05
@@ -54,8 +610,24 @@ def main():
         print(f"错误: 模型文件 {model_path} 不存在!")
         return
     
+    # 推理后端: 导出为 TorchScript/ONNX 等CPU格式，auto 时选择检测结果与fp32一致的最快后端
+    if config.get('inference_backend', 'pt') != 'pt':
+        config = resolve_backend(config, class_names)
+        model_path = config['track_model']
+    
+    # 推理服务(瘦客户端)只用于由本脚本调用 predict 的模式；ultralytics 的 track/保存结果需要本进程中的模型
+    remote_ok = ((not detection_mode and (uses_frame_engine(config) or config.get('shards', 1) > 1))
+                 or (detection_mode and config.get('prediction_cache', False) and not stream))
+    if config.get('inference_server') and not remote_ok:
+        print("提示: 当前模式由 ultralytics 直接处理数据源，在本进程中加载模型而不使用推理服务")
+        config = dict(config, inference_server='')
+    
     # 加载模型
-    model = YOLO(model_path)
+    model = load_model(config, model_path)
+    if isinstance(model, RemoteModel) and not detection_mode and config.get('tracker') != 'static':
+        # 推理在服务中进行，但 ultralytics 的 ByteTrack/BoT-SORT 追踪器仍在本进程中导入 ultralytics 和 torch
+        print(f"提示: 追踪器 {config.get('tracker', 'bytetrack.yaml')} 仍需在本进程中导入 ultralytics，"
+              f"tracker: static 时客户端不导入 ultralytics/torch")
     
     # 打印诊断信息
     print(f"模型架构: {model.task}")
@@ -66,11 +638,82 @@ def main():
         print(f"错误: 源路径 {config['source']} 不存在!")
         return
     
+    predict_args = build_predict_args(config, class_names)
+    size_args = {'imgsz': predict_args['imgsz']} if 'imgsz' in predict_args else {}
+    
+    # 分片模式: 一个长视频按帧区间分给多个进程
+    if not detection_mode and config.get('shards', 1) > 1 and not os.path.isdir(config['source']):
+        run_sharded(config, tracks_dir, chunk_size=chunk_size)
+        print(f"结果已保存到 {tracks_dir}/")
+        if config.get('extract_displacement', False):
+            run_displacement(config, tracks_dir)
+        return
+    
+    # 关键帧/ROI/流水线模式: 由本脚本自己驱动逐帧循环
+    if not detection_mode and uses_frame_engine(config):
+        track_video(model, config, predict_args, tracks_dir, chunk_size=chunk_size, class_names=class_names,
+                    profiler=profiler)
+        profiler.save(os.path.join(project, name))
+        print(f"结果已保存到 {os.path.join(project, name)}/")
+        if config.get('extract_displacement', False):
+            run_displacement(config, tracks_dir)
+        return
+    
+    # 流式模式
+    if stream:
+        if detection_mode:
+            results = model.predict(
+                source=config['source'],
+                **size_args,
+                conf=conf_threshold,
+                iou=config.get('iou', 0.5),
+                show=show,
+                save=save,
+                device=device,
+                project=project,
+                name=name,
+                exist_ok=True,
+                classes=list(class_names.keys()) if class_names else None,
+                stream=True,
+                verbose=False,
+            )
+        else:
+            results = model.track(
+                source=config['source'],
+                **size_args,
+                conf=conf_threshold,
+                iou=config.get('iou', 0.5),
+                show=show,
+                save=save,
+                device=device,
+                tracker=config.get('tracker', 'bytetrack.yaml'),
+                project=project,
+                name=name,
+                exist_ok=True,
+                stream=True,
+                persist=True,
+                verbose=False,
+            )
+        run_stream(results, tracks_dir, chunk_size=chunk_size, profiler=profiler)
+        profiler.save(os.path.join(project, name))
+        print(f"结果已保存到 {os.path.join(project, name)}/")
+        if not detection_mode and config.get('extract_displacement', False):
+            run_displacement(config, tracks_dir)
+        return
+    
+    # 缓存检测模式: 重复运行只重新过滤缓存的原始检测
+    if detection_mode and config.get('prediction_cache', False):
+        run_cached_detection(model, config, class_names, tracks_dir, chunk_size=chunk_size, profiler=profiler)
+        profiler.save(os.path.join(project, name))
+        print(f"检测完成！结果已保存到 {tracks_dir}/")
+        return
+    
     # 根据模式选择检测或跟踪
     if detection_mode:
         # 执行普通检测，指定类别名称
         results = model.predict(
             source=config['source'],
+            **size_args,
             conf=conf_threshold,
             iou=config.get('iou', 0.5),
             show=show,
@@ -82,6 +725,7 @@ def main():
             classes=list(class_names.keys()) if class_names else None,  # 指定类别ID
             verbose=True  # 显示详细信息
         )
+        record_results(profiler, results)
         
         # 结果分析
         if len(results) > 0:
@@ -98,11 +742,13 @@ def main():
                 else:
                     print(f"图片 {i+1}/{len(results)}: 未检测到目标")
         
+        profiler.save(os.path.join(project, name))
         print(f"检测完成！结果已保存到 {os.path.join(project, name)}/")
     else:
         # 执行追踪
         results = model.track(
             source=config['source'],
+            **size_args,
             conf=conf_threshold,
             iou=config.get('iou', 0.5),
             show=show,
@@ -113,6 +759,8 @@ def main():
             name=name,
             exist_ok=True,
         )
+        record_results(profiler, results)
+        profiler.save(os.path.join(project, name))
         print(f"追踪完成！结果已保存到 {os.path.join(project, name)}/")
 
 if __name__ == "__main__":
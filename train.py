@@ -1,10 +1,20 @@
 import os
+import sys
+
 import yaml
 from ultralytics import YOLO
 
-def main():
+from utils.train_cache import (
+    EpochMonitor,
+    TrainCache,
+    cached_trainer_class,
+    dataset_split_files,
+    measure_read,
+)
+
+
+def main(config_path='config.yaml'):
     # 加载配置文件
-    config_path = 'config.yaml'
     if not os.path.exists(config_path):
         print(f"错误：配置文件 {config_path} 不存在！")
         return
@@ -41,14 +51,47 @@ def main():
         train_args['patience'] = config['patience']
     if 'workers' in config:
         train_args['workers'] = config['workers']
+    # 数据增强等训练参数(超参数搜索的试验配置也通过这里生效)
+    for key in ('mosaic', 'mixup', 'degrees', 'translate', 'scale', 'fliplr', 'hsv_h', 'hsv_s', 'hsv_v',
+                'seed', 'exist_ok'):
+        if key in config:
+            train_args[key] = config[key]
+    
+    # 预处理训练缓存: 每张图像只解码、缩放一次，训练时从内存映射分片读取
+    if config.get('train_cache', False):
+        cache_dir = config.get('train_cache_dir', 'data/train_cache')
+        for split, files in dataset_split_files(config['data']).items():
+            cache, stats = TrainCache.prepare(
+                files, os.path.join(cache_dir, split), config['imgsz'],
+                shard_size=config.get('train_cache_shard', 256),
+                workers=config.get('train_cache_workers'),
+            )
+            print(f"训练缓存 [{split}]: {stats['images']} 张图像, 重建 {stats['built']} 张, 沿用 {stats['reused']} 张, "
+                  f"{stats['shards']} 个分片, {stats['size_mb']:.0f} MB, 耗时 {stats['seconds']:.1f} 秒")
+            if split == 'train' and len(cache):
+                decode_ms, cache_ms = measure_read(cache)
+                print(f"单张读取: 解码原图 {decode_ms:.1f} ms, 读取缓存 {cache_ms:.2f} ms")
+        train_args['trainer'] = cached_trainer_class(cache_dir)
+    
+    # 记录每个epoch的耗时和内存，便于比较是否使用训练缓存
+    monitor = EpochMonitor()
+    monitor.attach(model)
     
     # 执行训练
     model.train(**train_args)
     
+    summary = monitor.summary()
+    if summary:
+        save_dir = getattr(model.trainer, 'save_dir', os.path.join(config['project'], config['name']))
+        monitor.save(os.path.join(save_dir, 'epoch_stats.csv'))
+        print(f"平均epoch耗时 {summary['mean_epoch_s']:.1f} 秒 (中位数 {summary['median_epoch_s']:.1f} 秒), "
+              f"峰值内存 {summary['peak_rss_mb']:.0f} MB")
+    
     # 验证模型
     model.val()
     
     print(f"训练完成！模型已保存到 {os.path.join(config['project'], config['name'], 'weights/')}")
 
 if __name__ == "__main__":
-    main()
+    # 可选参数: 配置文件路径(超参数搜索为每个试验生成单独的配置)
+    main(sys.argv[1] if len(sys.argv) > 1 else 'config.yaml')
@@ -0,0 +1,61 @@
+import json
+import os
+
+
+def higher_is_better(name):
+    """吞吐类指标(名称以 fps 或 per_s 结尾)越大越好，其余(延迟、误差等)越小越好"""
+    return name.endswith(('fps', 'per_s'))
+
+
+def flatten_metrics(results, prefix=''):
+    """把嵌套的结果字典展开为 {'a.b.c': 数值}，忽略非数值项"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare_metrics(current, baseline, tolerance=0.1, abs_tolerance=1e-6):
+    """
+    与基线比较展开后的指标
+
+    参数:
+    current: 本次运行的指标 {名称: 数值}
+    baseline: 基线指标 {名称: 数值}
+    tolerance: 允许变差的相对比例
+    abs_tolerance: 允许变差的绝对量，避免接近0的误差指标因微小波动被判为退化
+
+    返回:
+    每个共同指标一行的列表，包含 metric, baseline, current, change(相对变化), regressed
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        old, new = baseline[name], current[name]
+        margin = abs(old) * tolerance + abs_tolerance
+        worse = old - new if higher_is_better(name) else new - old
+        rows.append({
+            'metric': name,
+            'baseline': old,
+            'current': new,
+            'change': (new - old) / abs(old) if old else 0.0,
+            'regressed': worse > margin,
+        })
+    return rows
+
+
+def load_baseline(path):
+    """读取基线文件，不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, metrics):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, ensure_ascii=False, sort_keys=True)
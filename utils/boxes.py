@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """
+    计算两组xyxy框两两之间的IoU
+
+    参数:
+    a: (n, 4) 数组
+    b: (m, 4) 数组
+
+    返回:
+    (n, m) IoU矩阵
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def box_iou_pairs(a, b):
+    """逐行计算两组等长xyxy框对应框之间的IoU，返回 (n,) 数组"""
+    lt = np.maximum(a[:, :2], b[:, :2])
+    rb = np.minimum(a[:, 2:], b[:, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=1)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def nms(xyxy, scores, iou_threshold=0.5, cls=None, block_size=1024):
+    """
+    分块的非极大值抑制
+
+    按得分降序每次取 block_size 个框: 先去掉与已保留框重叠的框，再在块内贪心保留，
+    结果与逐个贪心相同，但只计算块内的IoU和块与已保留框中相交框对的IoU，不生成 n×n 矩阵；
+    给定 cls 时不同类别之间互不抑制。
+
+    返回:
+    保留框的索引(按得分降序)
+    """
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind='stable')
+    boxes = xyxy[order]
+    if cls is not None:
+        # 按类别平移框，使不同类别的框不会重叠
+        offset = np.asarray(cls, dtype=np.float64)[order] * (boxes.max() + 1)
+        boxes = boxes + offset[:, None]
+
+    keep = np.empty(0, dtype=np.int64)
+    for start in range(0, len(boxes), block_size):
+        block = boxes[start:start + block_size]
+        alive = np.ones(len(block), dtype=bool)
+        if len(keep):
+            # 只对相交的框对计算IoU
+            kept_boxes = boxes[keep]
+            rows, cols = np.nonzero((block[:, None, 0] < kept_boxes[None, :, 2]) & (kept_boxes[None, :, 0] < block[:, None, 2])
+                                    & (block[:, None, 1] < kept_boxes[None, :, 3]) & (kept_boxes[None, :, 1] < block[:, None, 3]))
+            iou = box_iou_pairs(block[rows], kept_boxes[cols])
+            alive[rows[iou > iou_threshold]] = False
+        iou = box_iou(block, block)
+        kept = []
+        for i in np.flatnonzero(alive):
+            if not alive[i]:
+                continue
+            kept.append(i)
+            alive[i + 1:] &= iou[i, i + 1:] <= iou_threshold
+        keep = np.concatenate([keep, start + np.asarray(kept, dtype=np.int64)])
+    return order[keep]
+
+
+def expand_windows(xyxy, frame_shape, pad=64, min_size=0):
+    """
+    将框向外扩展 pad 像素并保证最小边长，裁剪到图像范围内
+
+    参数:
+    xyxy: (n, 4) 框
+    frame_shape: 图像的 shape (h, w, ...)
+    pad: 外扩像素
+    min_size: 窗口最小边长
+
+    返回:
+    (n, 4) 整数窗口
+    """
+    h, w = frame_shape[:2]
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+    half = np.maximum((xyxy[:, 2:] - xyxy[:, :2]) / 2 + pad, min_size / 2)
+    lt = np.floor(centers - half)
+    rb = np.ceil(centers + half)
+    lt = np.clip(lt, 0, [w, h])
+    rb = np.clip(rb, 0, [w, h])
+    return np.hstack([lt, rb]).astype(np.int64)
+
+
+def merge_windows(windows):
+    """
+    合并相互重叠的窗口，返回覆盖所有输入窗口的最少窗口集合
+    """
+    windows = [list(w) for w in np.asarray(windows).reshape(-1, 4)]
+    merged = True
+    while merged and len(windows) > 1:
+        merged = False
+        for i in range(len(windows)):
+            for j in range(i + 1, len(windows)):
+                a, b = windows[i], windows[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    windows[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del windows[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return np.asarray(windows, dtype=np.int64).reshape(-1, 4)
+
+
+def match_predictions(pred_xyxy, gt_xyxy, iou_threshold=0.5, pred_cls=None, gt_cls=None, return_index=False):
+    """
+    按IoU贪心匹配预测框与真值框，返回每个预测框是否为真阳性
+
+    参数:
+    pred_xyxy: (n, 4) 预测框，应按置信度降序排列
+    gt_xyxy: (m, 4) 真值框
+    iou_threshold: 判定为命中的最小IoU
+    pred_cls, gt_cls: 可选的类别，给定时只匹配同类别的框
+    return_index: 为 True 时返回每个预测框匹配到的真值框下标
+
+    返回:
+    (n,) 布尔数组；return_index 时为 (n,) 整数数组，未匹配为 -1
+    """
+    index = np.full(len(pred_xyxy), -1, dtype=int)
+    if len(pred_xyxy) and len(gt_xyxy):
+        iou = box_iou(pred_xyxy, gt_xyxy)
+        if pred_cls is not None and gt_cls is not None:
+            iou = np.where(np.asarray(pred_cls)[:, None] == np.asarray(gt_cls)[None, :], iou, 0.0)
+        matched = np.zeros(len(gt_xyxy), dtype=bool)
+        for i, row in enumerate(iou):
+            row = np.where(matched, 0.0, row)
+            j = row.argmax()
+            if row[j] >= iou_threshold:
+                matched[j] = True
+                index[i] = j
+    return index if return_index else index >= 0
+
+
+def match_recall(pred_xyxy, gt_xyxy, iou_threshold=0.5):
+    """
+    按IoU贪心匹配预测框与真值框，返回被匹配上的真值框数量
+
+    参数:
+    pred_xyxy: (n, 4) 预测框，应按置信度降序排列
+    gt_xyxy: (m, 4) 真值框
+    iou_threshold: 判定为命中的最小IoU
+    """
+    return int(match_predictions(pred_xyxy, gt_xyxy, iou_threshold).sum())
+
+
+def load_gt_boxes(label_path, width, height):
+    """读取YOLO格式标签并转换为像素坐标的xyxy框"""
+    if not os.path.exists(label_path):
+        return None
+    data = np.loadtxt(label_path, ndmin=2)
+    if data.size == 0:
+        return np.empty((0, 4))
+    cx, cy = data[:, 1] * width, data[:, 2] * height
+    w, h = data[:, 3] * width, data[:, 4] * height
+    return np.column_stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
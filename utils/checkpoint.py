@@ -0,0 +1,42 @@
+import os
+import pickle
+
+
+def _id_counter_owner():
+    """ultralytics的轨迹ID计数器保存在 BaseTrack 的类属性中"""
+    try:
+        from ultralytics.trackers.basetrack import BaseTrack
+    except ImportError:
+        return None
+    return BaseTrack
+
+
+def save_checkpoint(path, state):
+    """
+    原子地保存检查点
+
+    参数:
+    path: 检查点文件路径
+    state: 需要保存的状态字典(追踪器、最后处理的帧号、已写出的块数等)
+    """
+    owner = _id_counter_owner()
+    if owner is not None:
+        state = dict(state, id_counter=owner._count)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """读取检查点并恢复全局轨迹ID计数器，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    owner = _id_counter_owner()
+    if owner is not None and 'id_counter' in state:
+        owner._count = state['id_counter']
+    return state
+
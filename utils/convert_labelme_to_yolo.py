@@ -1,17 +1,171 @@
-import os
-import json
 import glob
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+
 from PIL import Image
 
-def convert_labelme_to_yolo(json_dir, img_dir,output_dir, class_name="track_point"):
+from utils.split import split_dataset
+
+MANIFEST_NAME = ".convert_manifest.json"
+
+def find_image(json_file, img_dir, img_name):
+    """按 img_dir 下的 png/jpg、再按json所在目录的顺序查找标注对应的图像，找不到时返回 None"""
+    candidates = [
+        os.path.join(img_dir, f"{img_name}.png"),
+        os.path.join(img_dir, f"{img_name}.jpg"),
+        os.path.join(os.path.dirname(json_file), f"{img_name}.png"),
+        os.path.join(os.path.dirname(json_file), f"{img_name}.jpg"),
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+def place_image(src, dst, link=True):
+    """
+    把图像放到输出目录: 源文件已是PNG时硬链接(跨文件系统等失败时复制)，
+    否则才用PIL重新编码为PNG
+    """
+    if os.path.exists(dst) or os.path.islink(dst):
+        os.remove(dst)
+    if src.lower().endswith('.png'):
+        if link:
+            try:
+                os.link(src, dst)
+                return 'link'
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+        return 'copy'
+    with Image.open(src) as img:
+        img.save(dst)
+    return 'encode'
+
+def convert_one(json_file, img_dir, images_dir, labels_dir, link=True):
+    """
+    转换单个LabelMe标注文件(在工作进程中运行)
+    
+    返回:
+    记录字典: 源文件的哈希与mtime、图像路径与mtime、输出文件和图像的处理方式；
+    出错时包含 error
+    """
+    try:
+        with open(json_file, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        
+        # 获取图像路径和文件名
+        img_name = Path(data['imagePath']).stem
+        img_path = find_image(json_file, img_dir, img_name)
+        if img_path is None:
+            return {'json': json_file, 'error': f"无法找到图像 {img_name}"}
+        
+        # 只读取文件头获取图像尺寸，不解码像素
+        with Image.open(img_path) as img:
+            img_width, img_height = img.size
+        
+        out_img = os.path.join(images_dir, f"{img_name}.png")
+        mode = place_image(img_path, out_img, link=link)
+        
+        # 创建对应的txt文件
+        txt_path = os.path.join(labels_dir, f"{img_name}.txt")
+        lines = []
+        for shape in data.get('shapes', []):
+            if shape['shape_type'] == 'rectangle':
+                # LabelMe的矩形是由两个点定义的：左上角和右下角
+                (x1, y1), (x2, y2) = shape['points'][:2]
+                
+                # 计算YOLO格式：中心点坐标和宽高（相对值）
+                x_center = (x1 + x2) / 2 / img_width
+                y_center = (y1 + y2) / 2 / img_height
+                width = abs(x2 - x1) / img_width
+                height = abs(y2 - y1) / img_height
+                
+                # YOLO格式: <class_id> <x_center> <y_center> <width> <height>
+                lines.append(f"0 {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
+        with open(txt_path, 'w') as f:
+            f.writelines(lines)
+        
+        st = os.stat(json_file)
+        img_st = os.stat(img_path)
+        return {
+            'json': json_file,
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha1': hashlib.sha1(raw).hexdigest(),
+            'image': img_path,
+            'image_mtime_ns': img_st.st_mtime_ns,
+            'image_size': img_st.st_size,
+            'outputs': [out_img, txt_path],
+            'image_mode': mode,
+            'boxes': len(lines),
+        }
+    except Exception as e:
+        return {'json': json_file, 'error': str(e)}
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def is_up_to_date(entry, json_file):
+    """
+    清单记录是否仍对应当前的源文件: json的mtime和大小未变(mtime变了但内容哈希相同也算未变)，
+    图像未被替换，输出文件都还存在
+    """
+    if entry is None or not all(os.path.exists(p) for p in entry['outputs']):
+        return False
+    try:
+        img_st = os.stat(entry['image'])
+    except OSError:
+        return False
+    if (img_st.st_mtime_ns, img_st.st_size) != (entry['image_mtime_ns'], entry['image_size']):
+        return False
+    st = os.stat(json_file)
+    if (st.st_mtime_ns, st.st_size) == (entry['mtime_ns'], entry['size']):
+        return True
+    with open(json_file, 'rb') as f:
+        if hashlib.sha1(f.read()).hexdigest() != entry['sha1']:
+            return False
+    entry['mtime_ns'] = st.st_mtime_ns  # 只是被touch过，更新记录即可
+    return True
+
+def convert_labelme_to_yolo(json_dir, img_dir, output_dir, class_name="track_point", workers=None, link=True,
+                            force=False):
     """
     将LabelMe格式的json文件转换为YOLO格式的txt文件
     
+    多进程并行转换；图像尺寸只从文件头读取，PNG源图像直接硬链接/复制而不重新编码。
+    输出目录中的清单记录每个json的mtime和内容哈希，再次运行时只转换新增或修改过的文件，
+    并删除源json已不存在的输出。
+    
     参数:
     json_dir: 包含LabelMe标注文件的目录
+    img_dir: 图像目录
     output_dir: YOLO格式标注文件和图像的输出目录
     class_name: 类别名称
+    workers: 进程数，None表示CPU核数，1表示在当前进程中串行转换
+    link: 是否用硬链接代替复制PNG图像
+    force: 忽略清单，全部重新转换
+    
+    返回:
+    统计字典(converted, skipped, removed, errors, 以及图像的 link/copy/encode 次数)
     """
     # 创建输出目录结构
     images_dir = os.path.join(output_dir, "images")
@@ -21,78 +175,49 @@ def convert_labelme_to_yolo(json_dir, img_dir,output_dir, class_name="track_poin
     os.makedirs(labels_dir, exist_ok=True)
     
     # 获取所有json文件
-    json_files = glob.glob(os.path.join(json_dir, "*.json"))
-    
-    for json_file in json_files:
-        try:
-            # 读取json文件
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-            
-            # 获取图像路径和文件名
-            img_name = Path(data['imagePath']).stem
-            # 正确组合图像路径 - 将目录与文件名结合
-            img_path = os.path.join(img_dir, f"{img_name}.png")
-            
-            # 检查图像文件是否存在
-            if not os.path.exists(img_path):
-                print(f"警告: 找不到图像文件 {img_path}")
-                # 尝试其他格式
-                alt_path = os.path.join(img_dir, f"{img_name}.jpg")
-                if os.path.exists(alt_path):
-                    img_path = alt_path
-                    print(f"找到替代图像: {alt_path}")
-                else:
-                    # 尝试根据JSON文件位置寻找图像
-                    alternative_paths = [
-                        os.path.join(os.path.dirname(json_file), f"{img_name}.png"),
-                        os.path.join(os.path.dirname(json_file), f"{img_name}.jpg")
-                    ]
-                    for alt_path in alternative_paths:
-                        if os.path.exists(alt_path):
-                            img_path = alt_path
-                            print(f"找到替代图像: {alt_path}")
-                            break
-                    else:
-                        print(f"错误: 无法找到图像 {img_name}")
-                        continue
-            
-            # 获取图像尺寸
-            with Image.open(img_path) as img:
-                img_width, img_height = img.size
-                
-                # 复制图像到目标目录
-                img.save(os.path.join(images_dir, f"{img_name}.png"))
-            
-            # 创建对应的txt文件
-            txt_path = os.path.join(labels_dir, f"{img_name}.txt")
-            
-            with open(txt_path, 'w') as f:
-                # 处理所有标注的形状
-                for shape in data.get('shapes', []):
-                    if shape['shape_type'] == 'rectangle':
-                        # LabelMe的矩形是由两个点定义的：左上角和右下角
-                        points = shape['points']
-                        x1, y1 = points[0]
-                        x2, y2 = points[1]
-                        
-                        # 计算YOLO格式：中心点坐标和宽高（相对值）
-                        x_center = (x1 + x2) / 2 / img_width
-                        y_center = (y1 + y2) / 2 / img_height
-                        width = abs(x2 - x1) / img_width
-                        height = abs(y2 - y1) / img_height
-                        
-                        # 写入YOLO格式: <class_id> <x_center> <y_center> <width> <height>
-                        f.write(f"0 {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
-                        
-            print(f"处理完成: {json_file} -> {txt_path}")
-        except Exception as e:
-            print(f"处理 {json_file} 时出错: {e}")
+    json_files = sorted(glob.glob(os.path.join(json_dir, "*.json")))
+    manifest = {} if force else load_manifest(output_dir)
+    todo = [f for f in json_files if not is_up_to_date(manifest.get(f), f)]
+    stats = {'converted': 0, 'skipped': len(json_files) - len(todo), 'removed': 0, 'errors': 0,
+             'link': 0, 'copy': 0, 'encode': 0}
+    
+    # 源json已删除: 删除对应的输出
+    current = set(json_files)
+    for json_file in [f for f in manifest if f not in current]:
+        for p in manifest.pop(json_file)['outputs']:
+            if os.path.exists(p):
+                os.remove(p)
+        stats['removed'] += 1
+    
+    args = [(f, img_dir, images_dir, labels_dir, link) for f in todo]
+    if workers == 1 or len(todo) <= 1:
+        records = [convert_one(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(convert_one, *zip(*args, strict=True), chunksize=max(1, len(args) // 64)))
+    
+    for record in records:
+        if 'error' in record:
+            print(f"处理 {record['json']} 时出错: {record['error']}")
+            manifest.pop(record['json'], None)
+            stats['errors'] += 1
+            continue
+        manifest[record['json']] = {k: v for k, v in record.items() if k not in ('json', 'image_mode', 'boxes')}
+        stats['converted'] += 1
+        stats[record['image_mode']] += 1
+    save_manifest(output_dir, manifest)
+    
+    print(f"转换完成: 新转换 {stats['converted']} 个, 未变化跳过 {stats['skipped']} 个, "
+          f"删除过期输出 {stats['removed']} 个, 失败 {stats['errors']} 个 "
+          f"(图像: 硬链接 {stats['link']}, 复制 {stats['copy']}, 重新编码 {stats['encode']})")
+    return stats
 
 def create_dataset_splits(data_dir, split_ratio=0.8):
     """
     创建训练/验证数据集划分
     
+    同一来源视频的帧总在同一侧，划分结果由文件名哈希决定且增量更新，见 utils.split.split_dataset
+    
     参数:
     data_dir: 包含images和labels子目录的数据目录
     split_ratio: 训练集比例
@@ -100,24 +225,11 @@ def create_dataset_splits(data_dir, split_ratio=0.8):
     images_dir = os.path.join(data_dir, "images")
     
     # 获取所有图像文件
-    image_files = [os.path.basename(f) for f in glob.glob(os.path.join(images_dir, "*.png"))]
-    
-    # 随机打乱
-    import random
-    random.shuffle(image_files)
-    
-    # 划分训练/验证
-    split_idx = int(len(image_files) * split_ratio)
-    train_files = image_files[:split_idx]
-    val_files = image_files[split_idx:]
+    image_files = sorted(glob.glob(os.path.join(images_dir, "*.png")))
     
-    # 创建train.txt和val.txt
-    for name, files in [("train", train_files), ("val", val_files)]:
-        with open(os.path.join(data_dir, f"{name}.txt"), 'w') as f:
-            for img_file in files:
-                f.write(f"{os.path.join(images_dir, img_file)}\n")
+    splits = split_dataset(image_files, data_dir, val_ratio=1 - split_ratio)
     
-    print(f"数据集划分完成: 训练集 {len(train_files)} 张图片, 验证集 {len(val_files)} 张图片")
+    print(f"数据集划分完成: 训练集 {len(splits['train'])} 张图片, 验证集 {len(splits['val'])} 张图片")
 
 if __name__ == "__main__":
     # 示例用法
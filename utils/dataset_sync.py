@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+MANIFEST_NAME = ".sync_manifest.json"
+REPORT_NAME = "consistency_report.json"
+
+# Linux 上 btrfs/xfs 等文件系统的写时复制克隆
+_FICLONE = 0x40049409
+
+
+def file_sha1(path, block_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _reflink(src, dst):
+    import fcntl
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+
+
+def place_file(src, dst, link='hardlink'):
+    """
+    把 src 放到 dst: hardlink 为硬链接，reflink 为写时复制克隆，copy 为普通复制；
+    链接方式不被支持(跨文件系统、Windows等)时退回到复制
+
+    返回:
+    实际使用的方式
+    """
+    if os.path.exists(dst) or os.path.islink(dst):
+        os.remove(dst)
+    if link == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    elif link == 'reflink':
+        try:
+            _reflink(src, dst)
+            return 'reflink'
+        except (OSError, ImportError):
+            if os.path.exists(dst):
+                os.remove(dst)
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def validate_label(text):
+    """
+    检查YOLO标签内容，返回错误描述列表(为空表示有效)
+
+    每行必须是5个数: 非负整数类别、[0, 1] 内的中心坐标和 (0, 1] 内的宽高
+    """
+    errors = []
+    for n, line in enumerate(text.splitlines(), start=1):
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != 5:
+            errors.append(f"第{n}行字段数为{len(parts)}")
+            continue
+        try:
+            values = np.array(parts, dtype=np.float64)
+        except ValueError:
+            errors.append(f"第{n}行包含非数值")
+            continue
+        if values[0] < 0 or values[0] != int(values[0]):
+            errors.append(f"第{n}行类别无效: {parts[0]}")
+        if np.any(values[1:3] < 0) or np.any(values[1:3] > 1):
+            errors.append(f"第{n}行中心坐标超出[0, 1]")
+        if np.any(values[3:] <= 0) or np.any(values[3:] > 1):
+            errors.append(f"第{n}行宽高超出(0, 1]")
+    return errors
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def sync_one(name, image_src, label_src, images_dst, labels_dst, link='hardlink', entry=None):
+    """
+    同步一对图像/标签(在工作进程中运行)
+
+    源文件内容哈希与清单记录相同且目标文件存在时不做任何写入；否则校验图像能否解码、
+    标签是否有效，再链接或复制到目标目录。非PNG图像解码后重新编码为PNG，
+    而不是只改扩展名。
+
+    返回:
+    记录字典，包含 status(unchanged / synced / invalid)、哈希、源文件状态与错误信息
+    """
+    image_dst = os.path.join(images_dst, f"{name}.png")
+    label_dst = os.path.join(labels_dst, f"{name}.txt")
+    record = {'name': name, 'image_src': image_src, 'label_src': label_src,
+              'image_stat': _stat(image_src), 'label_stat': _stat(label_src), 'errors': []}
+    record['image_sha1'] = file_sha1(image_src)
+    with open(label_src, 'r', encoding='utf-8', errors='replace') as f:
+        label_text = f.read()
+    record['label_sha1'] = hashlib.sha1(label_text.encode('utf-8')).hexdigest()
+
+    if (entry is not None and entry.get('image_sha1') == record['image_sha1']
+            and entry.get('label_sha1') == record['label_sha1'] and not entry.get('errors')
+            and os.path.exists(image_dst) and os.path.exists(label_dst)):
+        record['status'] = 'unchanged'
+        return record
+
+    img = cv2.imread(image_src, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        record['errors'].append("图像无法解码")
+    record['errors'].extend(validate_label(label_text))
+    if record['errors']:
+        for p in (image_dst, label_dst):
+            if os.path.exists(p):
+                os.remove(p)
+        record['status'] = 'invalid'
+        return record
+
+    if image_src.lower().endswith('.png'):
+        record['image_mode'] = place_file(image_src, image_dst, link)
+    else:
+        cv2.imwrite(image_dst, img)
+        record['image_mode'] = 'encode'
+    record['label_mode'] = place_file(label_src, label_dst, link)
+    record['status'] = 'synced'
+    return record
+
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def sync_dataset(pairs, dst_dir, link='hardlink', workers=None, verify_all=False, extra_report=None):
+    """
+    把匹配的图像/标签对增量同步到 dst_dir/images 与 dst_dir/labels
+
+    源文件的 mtime 和大小与清单一致且目标存在时直接跳过；变化的文件在工作进程中计算内容哈希、
+    校验并链接/复制。上次清单中有、本次不再有效的对(孤儿)的目标文件会被删除；
+    不在清单中的文件(用户放入的文件、缓存等)保留不动，其中的 .png/.txt 列在报告的 untracked_files 中。
+    结果写入 dst_dir/consistency_report.json
+
+    参数:
+    pairs: [(名称, 图像路径, 标签路径)] 列表
+    dst_dir: 目标数据集目录
+    link: hardlink / reflink / copy
+    workers: 进程数，None表示CPU核数，1表示串行
+    verify_all: 为真时忽略 mtime 快速判断，重新哈希并校验全部文件
+    extra_report: 合并进一致性报告的其他信息(如未匹配的图像)
+
+    返回:
+    一致性报告字典
+    """
+    images_dst = os.path.join(dst_dir, "images")
+    labels_dst = os.path.join(dst_dir, "labels")
+    os.makedirs(images_dst, exist_ok=True)
+    os.makedirs(labels_dst, exist_ok=True)
+    manifest_path = os.path.join(dst_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+
+    todo = []
+    fresh = {}
+    for name, image_src, label_src in pairs:
+        entry = manifest.get(name)
+        # 已知无效且源文件未变的对不再重复校验
+        if (not verify_all and entry is not None
+                and entry['image_src'] == image_src and entry['label_src'] == label_src
+                and entry['image_stat'] == _stat(image_src) and entry['label_stat'] == _stat(label_src)
+                and (entry.get('errors') or (os.path.exists(os.path.join(images_dst, f"{name}.png"))
+                                             and os.path.exists(os.path.join(labels_dst, f"{name}.txt"))))):
+            fresh[name] = entry
+        else:
+            todo.append((name, image_src, label_src, images_dst, labels_dst, link, entry))
+
+    if workers == 1 or len(todo) <= 1:
+        records = [sync_one(*a) for a in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(sync_one, *zip(*todo, strict=True), chunksize=max(1, len(todo) // 64)))
+
+    counts = {'unchanged': len(fresh), 'synced': 0, 'invalid': 0, 'removed': 0,
+              'hardlink': 0, 'reflink': 0, 'copy': 0, 'encode': 0}
+    new_manifest = dict(fresh)
+    for r in records:
+        counts[r['status']] += 1
+        for key in ('image_mode', 'label_mode'):
+            if key in r:
+                counts[r[key]] += 1
+        new_manifest[r['name']] = {k: v for k, v in r.items()
+                                   if k not in ('name', 'status', 'image_mode', 'label_mode')}
+
+    # 删除孤儿: 只删除上次清单中记录、本次不再有效的图像和标签(无效的对已在 sync_one 中删除)
+    keep = {name for name, e in new_manifest.items() if not e.get('errors')}
+    invalid = {name: e['errors'] for name, e in sorted(new_manifest.items()) if e.get('errors')}
+    removed = set()
+    for name in set(manifest) - keep:
+        for path in (os.path.join(images_dst, f"{name}.png"), os.path.join(labels_dst, f"{name}.txt")):
+            if os.path.exists(path):
+                os.remove(path)
+                removed.add(name)
+    counts['removed'] = len(removed - set(invalid))
+    untracked = sorted(
+        os.path.join(os.path.basename(folder), f)
+        for folder, ext in [(images_dst, '.png'), (labels_dst, '.txt')]
+        for f in os.listdir(folder)
+        if f.endswith(ext) and f[:-len(ext)] not in keep
+    )
+
+    _write_json(manifest_path, new_manifest)
+
+    # 内容相同但名称不同的图像(重复抽帧等)
+    by_hash = {}
+    for name in sorted(keep):
+        by_hash.setdefault(new_manifest[name]['image_sha1'], []).append(name)
+    duplicates = [names for names in by_hash.values() if len(names) > 1]
+
+    report = {'pairs': len(pairs), 'valid': len(keep), **counts, 'invalid_pairs': invalid,
+              'duplicate_images': duplicates, 'untracked_files': untracked, **(extra_report or {})}
+    _write_json(os.path.join(dst_dir, REPORT_NAME), report)
+    return report
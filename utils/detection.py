@@ -0,0 +1,138 @@
+import numpy as np
+
+
+class Detections:
+    """
+    单帧检测结果的numpy容器
+
+    提供 conf / cls / xywh 属性以及布尔索引，
+    可以直接传给ultralytics的 BYTETracker / BOTSORT 的 update()。
+    """
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.float32).reshape(-1)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_result(cls, result):
+        """由ultralytics的单帧Results构造"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+        return cls(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy())
+
+    @property
+    def xywh(self):
+        xywh = np.empty_like(self.xyxy)
+        xywh[:, 0] = (self.xyxy[:, 0] + self.xyxy[:, 2]) / 2
+        xywh[:, 1] = (self.xyxy[:, 1] + self.xyxy[:, 3]) / 2
+        xywh[:, 2] = self.xyxy[:, 2] - self.xyxy[:, 0]
+        xywh[:, 3] = self.xyxy[:, 3] - self.xyxy[:, 1]
+        return xywh
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, idx):
+        return Detections(self.xyxy[idx], self.conf[idx], self.cls[idx])
+
+
+def detect_frames(model, frames, profiler=None, **predict_args):
+    """
+    对一批帧执行一次前向推理
+
+    参数:
+    model: YOLO模型
+    frames: BGR图像列表
+    profiler: 可选的 StageProfiler，记录预处理/推理/后处理(NMS)耗时
+    predict_args: 传给 model.predict 的参数(conf, iou, imgsz, device, classes 等)
+
+    返回:
+    与 frames 一一对应的 Detections 列表
+    """
+    if not frames:
+        return []
+    results = model.predict(frames, verbose=False, **predict_args)
+    if profiler is not None:
+        profiler.record_speed(results)
+    return [Detections.from_result(r) for r in results]
+
+
+def make_tracker(tracker_cfg='bytetrack.yaml', frame_rate=30, **static_args):
+    """
+    按ultralytics的追踪器配置文件创建独立的追踪器实例
+
+    参数:
+    tracker_cfg: 追踪器配置文件，如 bytetrack.yaml / botsort.yaml；
+                 为 'static' 时使用内置的静止目标追踪器 StaticTracker
+    frame_rate: 视频帧率，决定丢失轨迹的保留时间
+    static_args: 传给 StaticTracker 的参数
+    """
+    if tracker_cfg == 'static':
+        from utils.static_tracker import StaticTracker
+        return StaticTracker(**static_args)
+
+    from ultralytics.trackers.track import TRACKER_MAP
+    from ultralytics.utils import IterableSimpleNamespace, yaml_load
+    from ultralytics.utils.checks import check_yaml
+
+    args = IterableSimpleNamespace(**yaml_load(check_yaml(tracker_cfg)))
+    if args.tracker_type not in TRACKER_MAP:
+        raise ValueError(f"不支持的追踪器类型: {args.tracker_type}")
+    return TRACKER_MAP[args.tracker_type](args=args, frame_rate=int(round(frame_rate)))
+
+
+def tracks_to_rows(tracks):
+    """
+    将追踪器 update() 的输出转换为 (n, 7) 轨迹行
+
+    追踪器输出每行为 [x1, y1, x2, y2, track_id, score, cls, idx]，
+    返回每行为 [track_id, cls, conf, x1, y1, x2, y2]
+    """
+    tracks = np.asarray(tracks, dtype=np.float64)
+    if tracks.size == 0:
+        return np.empty((0, 7), dtype=np.float64)
+    return np.column_stack([tracks[:, 4], tracks[:, 6], tracks[:, 5], tracks[:, :4]])
+
+
+class FrameDetector:
+    """
+    整帧检测器: 每帧对完整图像运行一次推理
+
+    __call__(frame, prev_rows) 返回 Detections，
+    prev_rows 是上一帧的轨迹行，供子类(如ROI检测器)使用。
+    """
+
+    def __init__(self, model, predict_args):
+        self.model = model
+        self.predict_args = predict_args
+        self.profiler = None
+        self.full_passes = 0
+        self.pixels = 0
+        self.frame_pixels = 0
+
+    def detect_full(self, frame):
+        self.full_passes += 1
+        self.pixels += frame.shape[0] * frame.shape[1]
+        return detect_frames(self.model, [frame], profiler=self.profiler, **self.predict_args)[0]
+
+    def __call__(self, frame, prev_rows=None):
+        self.frame_pixels += frame.shape[0] * frame.shape[1]
+        return self.detect_full(frame)
+
+    def state_dict(self):
+        """返回可序列化的内部状态(不含模型)，用于检查点"""
+        return {k: v for k, v in self.__dict__.items() if k not in ('model', 'predict_args', 'profiler')}
+
+    def load_state_dict(self, state):
+        self.__dict__.update(state)
+
+    def summary(self):
+        """返回实际推理像素数占整帧像素数的比例等统计"""
+        ratio = self.pixels / self.frame_pixels if self.frame_pixels else 0.0
+        return {'full_passes': self.full_passes, 'pixel_ratio': ratio}
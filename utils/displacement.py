@@ -0,0 +1,183 @@
+import numpy as np
+
+from utils.video import iter_frames
+
+
+def extract_patches(gray, centers, size=32):
+    """
+    以各中心为基准一次性截取 n 个 size x size 的小块(越界部分按边缘像素填充)
+
+    参数:
+    gray: 灰度图 (h, w)
+    centers: (n, 2) 中心坐标 (x, y)
+    size: 小块边长
+
+    返回:
+    (小块数组 (n, size, size), 各小块左上角整数坐标 (n, 2))
+    """
+    h, w = gray.shape[:2]
+    origin = np.round(centers).astype(np.int64) - size // 2
+    offsets = np.arange(size)
+    ys = np.clip(origin[:, 1:2] + offsets, 0, h - 1)
+    xs = np.clip(origin[:, 0:1] + offsets, 0, w - 1)
+    patches = gray[ys[:, :, None], xs[:, None, :]].astype(np.float32)
+    return patches, origin
+
+
+def centroid_offsets(patches, polarity='bright'):
+    """
+    灰度加权质心，返回每个小块内目标中心的亚像素坐标 (n, 2)
+
+    以小块均值为背景，只统计高于(或 dark 时低于)背景的像素
+    """
+    if polarity == 'dark':
+        patches = -patches
+    weights = np.clip(patches - patches.mean(axis=(1, 2), keepdims=True), 0, None)
+    total = weights.sum(axis=(1, 2))
+    size = patches.shape[1]
+    grid = np.arange(size, dtype=np.float64)
+    cx = (weights.sum(axis=1) * grid).sum(axis=1) / np.maximum(total, 1e-9)
+    cy = (weights.sum(axis=2) * grid).sum(axis=1) / np.maximum(total, 1e-9)
+    # 没有有效像素时退回小块中心
+    flat = total <= 1e-9
+    cx[flat] = cy[flat] = (size - 1) / 2
+    return np.column_stack([cx, cy])
+
+
+def _parabolic(left, center, right):
+    denom = left - 2 * center + right
+    return np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / np.where(denom == 0, 1, denom), 0.0)
+
+
+def correlation_shifts(ref, cur):
+    """
+    批量互相关，求 cur 相对 ref 的亚像素平移 (n, 2)
+
+    对 n 对小块同时做二维FFT求循环互相关，峰值位置用抛物线插值细化到亚像素
+    """
+    n, size, _ = ref.shape
+    # 不加窗: 小块原点随目标整像素移动，固定窗函数会把亚像素平移拉向0
+    f_ref = np.fft.fft2(ref - ref.mean(axis=(1, 2), keepdims=True))
+    f_cur = np.fft.fft2(cur - cur.mean(axis=(1, 2), keepdims=True))
+    corr = np.real(np.fft.ifft2(f_cur * np.conj(f_ref)))
+
+    peak = corr.reshape(n, -1).argmax(axis=1)
+    py, px = np.divmod(peak, size)
+    rows = np.arange(n)
+    dx = _parabolic(corr[rows, py, (px - 1) % size], corr[rows, py, px], corr[rows, py, (px + 1) % size])
+    dy = _parabolic(corr[rows, (py - 1) % size, px], corr[rows, py, px], corr[rows, (py + 1) % size, px])
+    # 超过一半边长的峰对应负平移
+    px = np.where(px > size // 2, px - size, px)
+    py = np.where(py > size // 2, py - size, py)
+    return np.column_stack([px + dx, py + dy])
+
+
+def refine_track_centers(source, tracks, method='centroid', patch_size=32, polarity='bright'):
+    """
+    对整张轨迹表的目标中心做亚像素细化
+
+    按帧顺序只解码一次视频，每帧内所有框的小块截取和计算都是向量化的，
+    不存在逐框的Python循环。
+
+    参数:
+    source: 视频或图像目录(与追踪时相同)
+    tracks: read_tracks 的返回值
+    method: centroid(灰度质心) / correlation(与首次出现时的小块做互相关) / none(直接用框中心)
+    patch_size: 小块边长(像素)
+    polarity: 标记点比背景亮(bright)还是暗(dark)，仅 centroid 使用
+
+    返回:
+    与 tracks 行对齐的 (cx, cy)
+    """
+    cx = (tracks['x1'] + tracks['x2']) / 2
+    cy = (tracks['y1'] + tracks['y2']) / 2
+    if method == 'none' or len(cx) == 0:
+        return cx, cy
+
+    import cv2
+
+    cx, cy = cx.copy(), cy.copy()
+    order = np.argsort(tracks['frame'], kind='stable')
+    frames_sorted = tracks['frame'][order]
+    frame_ids, starts = np.unique(frames_sorted, return_index=True)
+    ends = np.r_[starts[1:], len(order)]
+    bounds = dict(zip(frame_ids.tolist(), zip(starts.tolist(), ends.tolist(), strict=True), strict=True))
+
+    # correlation 方法: 每条轨迹首次出现时的小块作为参考
+    ids, id_index = np.unique(tracks['track_id'], return_inverse=True)
+    ref_patches = np.zeros((len(ids), patch_size, patch_size), dtype=np.float32)
+    ref_centers = np.zeros((len(ids), 2))
+    ref_origin = np.zeros((len(ids), 2), dtype=np.int64)
+    has_ref = np.zeros(len(ids), dtype=bool)
+
+    for frame_idx, frame in iter_frames(source, int(frame_ids[0]), int(frame_ids[-1]) + 1):
+        if frame_idx not in bounds:
+            continue
+        s, e = bounds[frame_idx]
+        rows = order[s:e]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        centers = np.column_stack([cx[rows], cy[rows]])
+        patches, origin = extract_patches(gray, centers, patch_size)
+
+        if method == 'centroid':
+            refined = origin + centroid_offsets(patches, polarity)
+        elif method == 'correlation':
+            k = id_index[rows]
+            new = ~has_ref[k]
+            ref_patches[k[new]] = patches[new]
+            ref_origin[k[new]] = origin[new]
+            ref_centers[k[new]] = centers[new]
+            has_ref[k[new]] = True
+            shift = correlation_shifts(ref_patches[k], patches)
+            refined = ref_centers[k] + (origin - ref_origin[k]) + shift
+        else:
+            raise ValueError(f"未知的亚像素方法: {method}")
+
+        cx[rows], cy[rows] = refined[:, 0], refined[:, 1]
+    return cx, cy
+
+
+def to_world(x, y, pixel_to_mm=1.0, homography=None):
+    """把像素坐标转换为物理坐标(mm)，给定 3x3 单应矩阵时优先使用单应变换"""
+    if homography is not None:
+        h = np.asarray(homography, dtype=np.float64).reshape(3, 3)
+        pts = np.stack([x, y, np.ones_like(x)])
+        wx, wy, ww = h @ pts.reshape(3, -1)
+        return (wx / ww).reshape(np.shape(x)), (wy / ww).reshape(np.shape(y))
+    return x * pixel_to_mm, y * pixel_to_mm
+
+
+def displacement_series(tracks, cx, cy, pixel_to_mm=1.0, homography=None):
+    """
+    把轨迹表整理为每个目标的位移时间序列
+
+    参数:
+    tracks: read_tracks 的返回值
+    cx, cy: 与 tracks 行对齐的(细化后)中心坐标
+    pixel_to_mm: 像素到毫米的比例
+    homography: 可选的 3x3 单应矩阵(像素 -> 毫米)
+
+    返回:
+    字典: track_ids (m,), frames (f,), x/y (m, f) 物理坐标,
+    dx/dy (m, f) 相对该目标首次出现位置的位移，缺失处为 NaN
+    """
+    valid = tracks['track_id'] >= 0
+    ids, row = np.unique(tracks['track_id'][valid], return_inverse=True)
+    frames, col = np.unique(tracks['frame'][valid], return_inverse=True)
+    wx, wy = to_world(cx[valid], cy[valid], pixel_to_mm, homography)
+
+    x = np.full((len(ids), len(frames)), np.nan)
+    y = np.full((len(ids), len(frames)), np.nan)
+    x[row, col] = wx
+    y[row, col] = wy
+
+    first = np.argmax(~np.isnan(x), axis=1) if len(frames) else np.zeros(len(ids), dtype=np.int64)
+    ref = np.arange(len(ids))
+    return {
+        'track_ids': ids,
+        'frames': frames,
+        'x': x,
+        'y': y,
+        'dx': x - x[ref, first][:, None],
+        'dy': y - y[ref, first][:, None],
+    }
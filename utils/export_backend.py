@@ -0,0 +1,296 @@
+import importlib.util
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from utils.boxes import match_predictions
+from utils.detection import detect_frames
+
+# 可选的推理后端: pt 为原始 PyTorch 权重(fp32参考)，其余为导出的CPU格式
+BACKENDS = ('pt', 'torchscript', 'onnx', 'onnx_int8')
+EXPORT_SUFFIX = {'torchscript': '.torchscript', 'onnx': '.onnx', 'onnx_int8': '.int8.onnx'}
+# 按动态输入导出、可接受任意 imgsz 与批大小的后端；torchscript 不支持动态导出，只能按导出时的 imgsz 推理
+DYNAMIC_BACKENDS = ('onnx', 'onnx_int8')
+
+
+def _stat(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _manifest_path(weights):
+    return f"{os.path.splitext(weights)[0]}.exports.json"
+
+
+def artifact_path(weights, backend, imgsz):
+    """导出文件放在权重旁边: best.pt -> best_1024.onnx / best_1024.int8.onnx / best_1024.torchscript"""
+    return f"{os.path.splitext(weights)[0]}_{imgsz}{EXPORT_SUFFIX[backend]}"
+
+
+def _require_onnx():
+    """onnx 后端依赖可选的 onnx / onnxruntime (pip install .[onnx])，缺少时给出包名而不是让 ultralytics 自动安装"""
+    missing = [name for name in ('onnx', 'onnxruntime') if importlib.util.find_spec(name) is None]
+    if missing:
+        raise ImportError(f"onnx 后端需要安装 {' 和 '.join(missing)}: pip install {' '.join(missing)}")
+
+
+def _export_ultralytics(weights, backend, imgsz, out_path):
+    from ultralytics import YOLO
+
+    path = YOLO(weights).export(format=backend, imgsz=imgsz, device='cpu', half=False,
+                                dynamic=backend in DYNAMIC_BACKENDS)
+    os.replace(path, out_path)
+
+
+def _quantize_onnx(fp32_path, out_path):
+    """onnxruntime 动态量化: 权重为int8，激活在运行时量化；保留 ultralytics 写入的模型元数据"""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp = f"{out_path}.tmp.onnx"
+    quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QUInt8)
+    src, dst = onnx.load(fp32_path), onnx.load(tmp)
+    if not dst.metadata_props:
+        dst.metadata_props.extend(src.metadata_props)
+        onnx.save(dst, tmp)
+    os.replace(tmp, out_path)
+
+
+def export_backend(weights, backend, imgsz):
+    """
+    导出(或复用已导出的)推理后端文件，权重文件变化后重新导出
+
+    参数:
+    weights: .pt 权重路径
+    backend: BACKENDS 之一
+    imgsz: 导出尺寸；torchscript 只能按这个尺寸推理，onnx 按动态输入导出
+
+    返回:
+    可直接传给 YOLO() 的模型路径
+    """
+    if backend == 'pt':
+        return weights
+    if backend in DYNAMIC_BACKENDS:
+        _require_onnx()
+    manifest_path = _manifest_path(weights)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    if manifest.get('weights_stat') != _stat(weights):
+        manifest = {'weights_stat': _stat(weights), 'artifacts': {}}
+
+    # 键中记录是否动态导出，旧版本按固定形状导出的 onnx 文件会被重新导出
+    key = f"{backend}@{imgsz}:{'dynamic' if backend in DYNAMIC_BACKENDS else 'static'}"
+    out_path = artifact_path(weights, backend, imgsz)
+    if manifest['artifacts'].get(key) == out_path and os.path.exists(out_path):
+        return out_path
+
+    t0 = time.perf_counter()
+    if backend == 'onnx_int8':
+        _quantize_onnx(export_backend(weights, 'onnx', imgsz), out_path)
+        # 递归导出fp32时可能更新了清单
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    else:
+        _export_ultralytics(weights, backend, imgsz, out_path)
+    print(f"导出 {backend} (imgsz={imgsz}) -> {out_path}, 耗时 {time.perf_counter() - t0:.1f} 秒")
+
+    manifest['artifacts'][key] = out_path
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path)
+    return out_path
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """
+    比较两组逐帧检测结果
+
+    返回:
+    (F1, 匹配框中心的平均偏移像素)；以 reference 为真值，按类别匹配
+    """
+    tp = n_ref = n_cand = 0
+    shifts = []
+    for ref, cand in zip(reference, candidate, strict=True):
+        n_ref += len(ref)
+        n_cand += len(cand)
+        if not len(ref) or not len(cand):
+            continue
+        index = match_predictions(cand.xyxy, ref.xyxy, iou_threshold, pred_cls=cand.cls, gt_cls=ref.cls,
+                                  return_index=True)
+        hit = index >= 0
+        tp += int(hit.sum())
+        # 每个命中的候选框与它匹配到的参考框之间的中心偏移
+        c_cand = (cand.xyxy[hit, :2] + cand.xyxy[hit, 2:]) / 2
+        c_ref = (ref.xyxy[index[hit], :2] + ref.xyxy[index[hit], 2:]) / 2
+        shifts.extend(np.hypot(*(c_cand - c_ref).T).tolist())
+    if n_ref == 0 and n_cand == 0:
+        return 1.0, 0.0
+    f1 = 2 * tp / (n_ref + n_cand)
+    return f1, float(np.mean(shifts)) if shifts else 0.0
+
+
+def benchmark_backends(models, frames, predict_args, reference='pt', repeats=3):
+    """
+    在样本帧上测量各后端的单帧延迟，并与参考后端(fp32)的检测结果比较
+
+    参数:
+    models: {后端名: 已加载的模型}，必须包含 reference
+    frames: BGR样本帧列表
+    predict_args: 传给 model.predict 的参数(conf, iou, imgsz 等)
+    repeats: 计时轮数，取最快一轮
+
+    返回:
+    {后端名: {'latency_ms', 'f1', 'shift_px'}}
+    """
+    detections = {}
+    report = {}
+    for name, model in models.items():
+        detect_frames(model, frames[:1], **predict_args)  # 预热
+        best = float('inf')
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            dets = [detect_frames(model, [f], **predict_args)[0] for f in frames]
+            best = min(best, time.perf_counter() - t0)
+        detections[name] = dets
+        report[name] = {'latency_ms': best / max(len(frames), 1) * 1000}
+    for name in models:
+        report[name]['f1'], report[name]['shift_px'] = compare_detections(detections[reference], detections[name])
+    return report
+
+
+def choose_backend(report, min_f1=0.98, max_shift_px=0.5, reference='pt'):
+    """检测结果与参考一致(F1 >= min_f1 且平均中心偏移 <= max_shift_px)的后端中最快的一个"""
+    accepted = [name for name, r in report.items()
+                if name == reference or (r['f1'] >= min_f1 and r['shift_px'] <= max_shift_px)]
+    return min(accepted, key=lambda name: report[name]['latency_ms'])
+
+
+def input_sizes(config, imgsz):
+    """
+    当前追踪模式实际送入模型的输入尺寸，第一个为主尺寸
+
+    切片模式只用 tile_size；ROI模式同时用整帧尺寸和 roi_imgsz；其余模式只用 imgsz
+    """
+    if config.get('tile_mode', False):
+        return [config.get('tile_size', 640)]
+    roi_imgsz = config.get('roi_imgsz', 320)
+    if config.get('roi_mode', False) and roi_imgsz and roi_imgsz != imgsz:
+        return [imgsz, roi_imgsz]
+    return [imgsz]
+
+
+def check_shapes(model, sizes, batch_size=8):
+    """
+    用全零帧在每个输入尺寸下分别按 1 张和 batch_size 张推理一次，
+    确认导出的后端能处理追踪时的全部 (imgsz, 批大小) 组合
+
+    返回:
+    第一个失败的 (imgsz, 批大小, 错误信息)，全部成功时为 None
+    """
+    frame = np.zeros((max(sizes), max(sizes), 3), dtype=np.uint8)
+    for imgsz in sizes:
+        for n in sorted({1, batch_size}):
+            try:
+                model.predict([frame] * n, verbose=False, imgsz=imgsz, device='cpu')
+            except Exception as e:
+                return imgsz, n, str(e).splitlines()[0] if str(e) else type(e).__name__
+    return None
+
+
+def sample_frames(paths, count=8):
+    """从图像路径列表中均匀取 count 张样本帧"""
+    if not paths:
+        return []
+    idx = np.unique(np.linspace(0, len(paths) - 1, min(count, len(paths))).astype(int))
+    frames = [cv2.imread(paths[i]) for i in idx]
+    return [f for f in frames if f is not None]
+
+
+def resolve_backend(config, class_names=None, load_model=None, export=None):
+    """
+    按 inference_backend 选择推理后端
+
+    pt 时原样返回配置；指定某个导出格式时导出(或复用缓存)并使用它；
+    auto 时导出 inference_backends 中的全部格式，在验证集样本帧上测速，
+    选择检测结果与fp32一致的最快后端。
+
+    ROI模式需要两种输入尺寸，固定尺寸的 torchscript 无法使用: 指定时退回 pt，auto 时不参与比较。
+    每个导出的后端先按 input_sizes 与 batch_size 试推理，失败的同样退回 pt 或不参与比较。
+
+    返回:
+    替换了 track_model(导出文件路径)与 track_imgsz 的配置副本
+    """
+    backend = config.get('inference_backend', 'pt')
+    if backend == 'pt':
+        return config
+    if backend not in BACKENDS and backend != 'auto':
+        raise ValueError(f"未知的推理后端: {backend}，可选 {', '.join(BACKENDS)} 或 auto")
+    if load_model is None:
+        from ultralytics import YOLO
+
+        def load_model(path):
+            return YOLO(path, task='detect')
+    export = export or export_backend
+
+    weights = config.get('track_model', 'runs/detect/train_improved4/weights/best.pt')
+    reference = load_model(weights)
+    imgsz = config.get('track_imgsz') or getattr(reference.model, 'args', {}).get('imgsz', config.get('imgsz', 640))
+    sizes = input_sizes(config, imgsz)
+    batch_size = config.get('batch_size', 8)
+
+    def usable(name):
+        """导出并加载后端，返回 (路径, 模型)；无法处理当前模式的输入形状时返回 None"""
+        if name not in DYNAMIC_BACKENDS and len(sizes) > 1:
+            print(f"警告: {name} 后端只能按导出尺寸推理，而当前模式需要输入尺寸 {sizes}")
+            return None
+        path = export(weights, name, sizes[0])
+        model = load_model(path)
+        failed = check_shapes(model, sizes, batch_size)
+        if failed:
+            print(f"警告: {name} 后端无法按 imgsz={failed[0]}、批大小 {failed[1]} 推理: {failed[2]}")
+            return None
+        return path, model
+
+    if backend != 'auto':
+        loaded = usable(backend)
+        if loaded is None:
+            print("改用 pt 后端")
+            return config
+        print(f"推理后端: {backend} ({loaded[0]})")
+        return dict(config, track_model=loaded[0], track_imgsz=imgsz)
+
+    from utils.train_cache import dataset_split_files
+
+    paths = []
+    if os.path.exists(config.get('data', '')):
+        paths = dataset_split_files(config['data']).get('val', [])
+    frames = sample_frames(paths, config.get('backend_samples', 8))
+    if not frames:
+        print("警告: 没有可用于比较后端的验证集图像，使用 pt 后端")
+        return config
+
+    models, paths = {'pt': reference}, {'pt': weights}
+    for name in config.get('inference_backends', ['torchscript', 'onnx', 'onnx_int8']):
+        try:
+            loaded = usable(name)
+        except Exception as e:
+            print(f"警告: 无法导出或加载 {name} 后端: {e}")
+            continue
+        if loaded is not None:
+            paths[name], models[name] = loaded
+
+    predict_args = {'conf': config.get('conf', 0.05), 'iou': config.get('iou', 0.5), 'imgsz': sizes[0],
+                    'device': 'cpu', 'classes': list(class_names.keys()) if class_names else None}
+    report = benchmark_backends(models, frames, predict_args)
+    chosen = choose_backend(report, config.get('backend_min_f1', 0.98), config.get('backend_max_shift_px', 0.5))
+    print(f"{'后端':<14}{'延迟ms':>10}{'F1':>8}{'偏移px':>10}")
+    for name, r in report.items():
+        mark = '  <-- 使用' if name == chosen else ''
+        print(f"{name:<14}{r['latency_ms']:>10.1f}{r['f1']:>8.3f}{r['shift_px']:>10.3f}{mark}")
+    return dict(config, track_model=paths[chosen], track_imgsz=imgsz)
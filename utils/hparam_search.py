@@ -0,0 +1,268 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import yaml
+
+STATE_NAME = "sweep_state.json"
+LEADERBOARD_NAME = "leaderboard.csv"
+MAP50_COLUMN = "metrics/mAP50(B)"
+MAP50_95_COLUMN = "metrics/mAP50-95(B)"
+
+
+def expand_space(space, trials=0, seed=0):
+    """
+    把搜索空间展开为参数组合列表
+
+    参数:
+    space: {配置键: 取值列表}，或 {配置键: {low: a, high: b}} 表示均匀分布的连续范围
+    trials: 0 表示完整网格(只允许列表)；否则随机抽取 trials 组(网格不重复抽样)
+    seed: 随机种子，相同的种子得到相同的试验集合，便于断点续跑
+
+    返回:
+    参数字典列表
+    """
+    keys = sorted(space)
+    rng = random.Random(seed)
+    if all(isinstance(space[k], (list, tuple)) for k in keys):
+        grid = [dict(zip(keys, values, strict=True)) for values in itertools.product(*(space[k] for k in keys))]
+        if not trials or trials >= len(grid):
+            return grid
+        return rng.sample(grid, trials)
+    if not trials:
+        raise ValueError("搜索空间包含连续范围时必须指定试验次数")
+    combos = []
+    for _ in range(trials):
+        params = {}
+        for k in keys:
+            v = space[k]
+            params[k] = rng.choice(list(v)) if isinstance(v, (list, tuple)) else round(rng.uniform(v['low'], v['high']), 6)
+        combos.append(params)
+    return combos
+
+
+def trial_id(params):
+    """由参数得到稳定的试验名称"""
+    text = json.dumps(params, sort_keys=True, default=str)
+    return f"trial_{hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]}"
+
+
+def read_results(path):
+    """
+    读取 ultralytics 的 results.csv(训练中也可以读取)
+
+    返回:
+    (epochs, mAP50, mAP50-95) 三个数组；文件不存在时为空数组
+    """
+    if not os.path.exists(path):
+        return np.empty(0, dtype=int), np.empty(0), np.empty(0)
+    epochs, map50, map50_95 = [], [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        if MAP50_COLUMN not in header:
+            return np.empty(0, dtype=int), np.empty(0), np.empty(0)
+        i_ep, i50, i5095 = header.index('epoch'), header.index(MAP50_COLUMN), header.index(MAP50_95_COLUMN)
+        for row in reader:
+            # 正在写入的最后一行可能不完整
+            try:
+                values = int(float(row[i_ep])), float(row[i50]), float(row[i5095])
+            except (ValueError, IndexError):
+                continue
+            epochs.append(values[0])
+            map50.append(values[1])
+            map50_95.append(values[2])
+    return np.array(epochs, dtype=int), np.array(map50), np.array(map50_95)
+
+
+def best_at(curve, epoch):
+    """曲线(每个epoch的mAP50列表)在前 epoch 个epoch内的最好值，曲线长度不足时返回 None"""
+    if len(curve) < epoch:
+        return None
+    return max(curve[:epoch])
+
+
+def should_prune(curve, others, warmup=5, percentile=50.0, min_trials=3):
+    """
+    中位数剪枝: 在当前epoch上，本试验的最好mAP50低于其他试验同一epoch最好值的指定分位数时剪枝
+
+    参数:
+    curve: 本试验每个epoch的mAP50
+    others: 其他试验的曲线列表(运行中、已完成或已剪枝的都参与比较)
+    warmup: 前 warmup 个epoch不剪枝
+    percentile: 比较的分位数(50为中位数)
+    min_trials: 同一epoch至少有这么多其他试验的结果才剪枝
+    """
+    epoch = len(curve)
+    if epoch < max(warmup, 1):
+        return False
+    peers = [b for b in (best_at(c, epoch) for c in others) if b is not None]
+    if len(peers) < min_trials:
+        return False
+    return best_at(curve, epoch) < np.percentile(peers, percentile)
+
+
+def write_leaderboard(path, trials, keys):
+    """按最好mAP50降序写出排行榜CSV"""
+    rows = sorted(trials.values(), key=lambda t: (t.get('best_map50', -1), t.get('best_map50_95', -1)), reverse=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['rank', 'trial', 'status', 'epochs', 'best_map50', 'best_map50_95', *keys, 'run_dir'])
+        for rank, t in enumerate(rows, start=1):
+            writer.writerow([rank, t['id'], t['status'], len(t.get('curve', [])),
+                             f"{t.get('best_map50', 0.0):.4f}", f"{t.get('best_map50_95', 0.0):.4f}",
+                             *[t['params'].get(k) for k in keys], t['run_dir']])
+    return rows
+
+
+class SweepRunner:
+    """
+    超参数搜索调度器: 每个试验写出一份覆盖了搜索参数的配置，作为 train.py 子进程运行，
+    同时最多运行 parallel 个，每个子进程限制为 threads 个计算线程。
+
+    运行中定期读取各试验的 results.csv，按中位数规则剪枝落后的试验；状态保存在
+    sweep_state.json 中，重新运行时跳过已完成和已剪枝的试验，中断的试验从头重新训练。
+    """
+
+    def __init__(self, base_config, space, out_dir, trials=0, seed=0, parallel=None, threads=None,
+                 epochs=None, warmup=5, percentile=50.0, min_trials=3, poll=10.0, command=None):
+        self.base_config = base_config
+        self.space = space
+        self.out_dir = out_dir
+        self.keys = sorted(space)
+        cpus = os.cpu_count() or 1
+        self.parallel = parallel or max(1, cpus // (threads or 4))
+        self.threads = threads or max(1, cpus // self.parallel)
+        self.epochs = epochs
+        self.warmup = warmup
+        self.percentile = percentile
+        self.min_trials = min_trials
+        self.poll = poll
+        self.command = command or [sys.executable, os.path.abspath('train.py')]
+        self.running = {}
+
+        self.state = self._load_state()
+        for params in expand_space(space, trials, seed):
+            tid = trial_id(params)
+            trial = self.state['trials'].setdefault(tid, {
+                'id': tid, 'params': params, 'status': 'pending', 'curve': [], 'curve_95': [],
+                'run_dir': os.path.join(out_dir, tid),
+            })
+            # 上次中断时正在运行的试验重新开始
+            if trial['status'] == 'running':
+                trial['status'] = 'pending'
+                trial['curve'], trial['curve_95'] = [], []
+
+    def _load_state(self):
+        path = os.path.join(self.out_dir, STATE_NAME)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'space': self.space, 'trials': {}}
+
+    def save(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = os.path.join(self.out_dir, f"{STATE_NAME}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp, os.path.join(self.out_dir, STATE_NAME))
+        return write_leaderboard(os.path.join(self.out_dir, LEADERBOARD_NAME), self.state['trials'], self.keys)
+
+    def trial_config(self, trial):
+        """试验的完整配置: 基础配置 + 搜索参数，输出到 out_dir/<试验名>"""
+        config = dict(self.base_config)
+        config.update(trial['params'])
+        if self.epochs:
+            config['epochs'] = self.epochs
+        config['project'] = self.out_dir
+        config['name'] = trial['id']
+        config['exist_ok'] = True
+        if config.get('train_cache'):
+            # 不同 imgsz 的试验使用各自的训练缓存
+            config['train_cache_dir'] = f"{self.base_config.get('train_cache_dir', 'data/train_cache')}_{config['imgsz']}"
+        return config
+
+    def launch(self, trial):
+        os.makedirs(trial['run_dir'], exist_ok=True)
+        config_path = os.path.join(trial['run_dir'], 'sweep_config.yaml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(self.trial_config(trial), f, allow_unicode=True, sort_keys=False)
+        # 重新开始时清除上次中断留下的结果
+        results = os.path.join(trial['run_dir'], 'results.csv')
+        if os.path.exists(results):
+            os.remove(results)
+        env = dict(os.environ)
+        for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            env[var] = str(self.threads)
+        log = open(os.path.join(trial['run_dir'], 'train.log'), 'w', encoding='utf-8')
+        proc = subprocess.Popen(self.command + [config_path], stdout=log, stderr=subprocess.STDOUT, env=env)
+        self.running[trial['id']] = (proc, log)
+        trial['status'] = 'running'
+        trial['started'] = time.time()
+        print(f"启动 {trial['id']}: {trial['params']}")
+
+    def stop(self, tid):
+        proc, log = self.running.pop(tid)
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        log.close()
+        return proc.returncode
+
+    def update(self, trial):
+        """读取试验的 results.csv 更新曲线"""
+        _, map50, map50_95 = read_results(os.path.join(trial['run_dir'], 'results.csv'))
+        trial['curve'], trial['curve_95'] = map50.tolist(), map50_95.tolist()
+        if len(map50):
+            trial['best_map50'] = float(map50.max())
+            trial['best_map50_95'] = float(map50_95.max())
+
+    def step(self):
+        """检查运行中的试验: 更新曲线、剪枝、回收结束的进程，再启动等待中的试验"""
+        trials = self.state['trials']
+        for tid in list(self.running):
+            trial = trials[tid]
+            self.update(trial)
+            proc = self.running[tid][0]
+            if proc.poll() is not None:
+                code = self.stop(tid)
+                trial['status'] = 'done' if code == 0 else 'failed'
+                print(f"{tid} {'完成' if code == 0 else f'失败(返回码 {code})'}, "
+                      f"最好 mAP50 {trial.get('best_map50', 0.0):.4f}")
+                continue
+            others = [t['curve'] for k, t in trials.items() if k != tid and t['curve']]
+            if should_prune(trial['curve'], others, self.warmup, self.percentile, self.min_trials):
+                self.stop(tid)
+                trial['status'] = 'pruned'
+                print(f"剪枝 {tid}: 第 {len(trial['curve'])} 个epoch最好 mAP50 "
+                      f"{best_at(trial['curve'], len(trial['curve'])):.4f} 落后于其他试验")
+
+        pending = [t for t in trials.values() if t['status'] == 'pending']
+        while pending and len(self.running) < self.parallel:
+            self.launch(pending.pop(0))
+        self.save()
+        return bool(self.running)
+
+    def run(self):
+        """运行直到所有试验结束，返回排行榜(按最好mAP50降序的试验列表)"""
+        print(f"共 {len(self.state['trials'])} 个试验, 同时运行 {self.parallel} 个, 每个 {self.threads} 线程")
+        try:
+            while self.step():
+                time.sleep(self.poll)
+        finally:
+            # 被中断时结束子进程，状态保持为 running，下次运行时重新开始
+            for tid in list(self.running):
+                self.stop(tid)
+            leaderboard = self.save()
+        return leaderboard
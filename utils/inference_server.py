@@ -0,0 +1,663 @@
+import gc
+import http.client
+import io
+import ipaddress
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from utils.detection import Detections
+
+# 远程 predict 允许的参数；保存/显示等参数只在本进程加载的模型上有意义
+PREDICT_KEYS = ('conf', 'iou', 'imgsz', 'classes', 'max_det', 'device', 'agnostic_nms', 'half', 'augment')
+
+
+def parse_address(address):
+    """
+    解析服务地址
+
+    返回:
+    ('unix', 套接字路径) 或 ('tcp', (主机, 端口))；'unix:/tmp/x.sock'、'127.0.0.1:8765'、'http://127.0.0.1:8765' 均可
+    """
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    if address.startswith('http://'):
+        address = address[len('http://'):].rstrip('/')
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"无法解析推理服务地址: {address}，应为 host:port 或 unix:/path")
+    return 'tcp', (host, int(port))
+
+
+def is_loopback(host):
+    """主机名是否为本机回环地址(localhost / 127.0.0.0/8 / ::1)"""
+    host = host.strip('[]')
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _host_of(header):
+    """Host 请求头中的主机名: 'localhost:8765' -> 'localhost'，'[::1]:8765' -> '::1'"""
+    if header.startswith('['):
+        return header[1:].partition(']')[0]
+    return header.rpartition(':')[0] if ':' in header else header
+
+
+def _json_default(o):
+    # numpy 标量和数组(如类别列表中的 np.int64)
+    return o.tolist()
+
+
+def _percentiles(values):
+    if not values:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    a = np.asarray(values)
+    return {'mean': float(a.mean()), 'p50': float(np.percentile(a, 50)),
+            'p95': float(np.percentile(a, 95)), 'p99': float(np.percentile(a, 99))}
+
+
+def _load_yolo(weights):
+    from ultralytics import YOLO
+
+    return YOLO(weights, task='detect')
+
+
+class _Item:
+    """队列中的一张图像"""
+
+    def __init__(self, image, args):
+        self.image = image
+        self.args = args
+        self.key = json.dumps(args, sort_keys=True, default=_json_default)
+        self.enqueued = time.perf_counter()
+        self.future = Future()
+
+
+class _ModelSlot:
+    """常驻的一个模型及其请求队列和批处理线程"""
+
+    def __init__(self, weights, model):
+        self.weights = weights
+        self.model = model
+        self.queue = queue.Queue()
+        self.pending = 0
+        self.batches = 0
+        self.images = 0
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        self.stopped = threading.Event()
+        self.thread = None
+
+
+class InferenceServer:
+    """
+    常驻的本地推理服务: 模型加载并预热一次后留在内存中，
+    并发请求中的图像在延迟预算内合并为微批次，一次前向推理后分发回各请求。
+
+    每个模型有一个批处理线程: 取到第一张图像后最多再等待 max_wait_ms 收集同一模型、
+    相同推理参数的图像(最多 max_batch 张)。空闲超过 idle_timeout 秒的模型被卸载，
+    下次请求时重新加载。
+
+    加载 .pt 权重等同于反序列化 pickle，所以服务默认只监听本机: TCP 地址必须是回环地址
+    (allow_remote 为真时除外)，Unix 套接字权限为 0600，HTTP 请求的 Host 必须是本机、
+    Content-Type 必须与接口一致(浏览器中的网页无法伪造这样的跨站请求)。
+    model_roots 不为 None 时只加载这些目录(或文件)下的模型。
+    """
+
+    def __init__(self, loader=None, max_batch=8, max_wait_ms=10.0, idle_timeout=600.0, history=2048,
+                 model_roots=None, allow_remote=False):
+        self.loader = loader or _load_yolo
+        self.model_roots = None if model_roots is None else [os.path.realpath(r) for r in model_roots]
+        self.allow_remote = allow_remote
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000
+        self.idle_timeout = idle_timeout
+        self.slots = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latencies = deque(maxlen=history)
+        self.queue_waits = deque(maxlen=history)
+        self.batch_sizes = deque(maxlen=history)
+        self.requests = 0
+        self.errors = 0
+        self.evictions = 0
+        self.max_queue_depth = 0
+        self.httpd = None
+        self.address = None
+        self._closed = threading.Event()
+        self._threads = []
+
+    # ---------- 模型 ----------
+
+    def check_model(self, weights):
+        """model_roots 之外的权重抛出 PermissionError"""
+        if self.model_roots is None:
+            return
+        path = os.path.realpath(weights)
+        if not any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in self.model_roots):
+            raise PermissionError(f"不允许加载 {weights}: 只能加载 {', '.join(self.model_roots)} 下的模型")
+
+    def _slot(self, weights):
+        """
+        取常驻模型，不在内存中时加载并预热
+
+        加载在 self.lock 之外进行，不阻塞其他模型的请求和状态查询；
+        同一权重的并发请求等待同一次加载(self.loading 中的 Future)，加载完成后才放入 self.slots
+        """
+        weights = os.path.abspath(weights)
+        self.check_model(weights)
+        with self.lock:
+            if self._closed.is_set():
+                raise RuntimeError("推理服务已停止")
+            slot = self.slots.get(weights)
+            if slot is not None:
+                slot.last_used = time.monotonic()
+                return slot
+            loading = self.loading.get(weights)
+            owner = loading is None
+            if owner:
+                loading = self.loading[weights] = Future()
+        if not owner:
+            return loading.result()
+
+        try:
+            if not os.path.exists(weights):
+                raise FileNotFoundError(f"模型文件 {weights} 不存在")
+            t0 = time.perf_counter()
+            model = self.loader(weights)
+            # 预热: 第一次推理会构建预测器
+            model.predict([np.zeros((64, 64, 3), dtype=np.uint8)], verbose=False)
+        except Exception as e:
+            with self.lock:
+                del self.loading[weights]
+            loading.set_exception(e)
+            raise
+        slot = _ModelSlot(weights, model)
+        slot.thread = threading.Thread(target=self._batch_loop, args=(slot,), name=f"batch:{weights}", daemon=True)
+        slot.thread.start()
+        with self.lock:
+            self.slots[weights] = slot
+            del self.loading[weights]
+        loading.set_result(slot)
+        print(f"加载模型 {weights}, 耗时 {time.perf_counter() - t0:.2f} 秒")
+        return slot
+
+    def load(self, weights):
+        """加载(或复用)模型，返回 {'weights', 'task', 'names', 'imgsz'}"""
+        slot = self._slot(weights)
+        model = slot.model
+        args = getattr(getattr(model, 'model', None), 'args', None) or {}
+        return {'weights': slot.weights, 'task': getattr(model, 'task', 'detect'),
+                'names': getattr(model, 'names', {}), 'imgsz': args.get('imgsz')}
+
+    def evict_idle(self, now=None):
+        """卸载空闲超过 idle_timeout 且没有排队请求的模型，返回卸载的权重路径列表"""
+        if not self.idle_timeout:
+            return []
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            idle = [w for w, s in self.slots.items() if s.pending == 0 and now - s.last_used > self.idle_timeout]
+            slots = [self.slots.pop(w) for w in idle]
+            self.evictions += len(slots)
+        for slot in slots:
+            slot.stopped.set()
+            slot.thread.join()
+            print(f"卸载空闲模型 {slot.weights} (处理了 {slot.images} 张图像)")
+        if slots:
+            del slots
+            gc.collect()
+        return idle
+
+    # ---------- 批处理 ----------
+
+    def submit(self, weights, images, args):
+        """
+        把一个请求的图像放入模型队列
+
+        参数:
+        weights: 权重路径
+        images: BGR图像列表
+        args: predict 参数
+
+        返回:
+        与 images 一一对应的 Future，结果为 (Detections, speed, 排队毫秒数)
+        """
+        items = [_Item(img, args) for img in images]
+        while True:
+            slot = self._slot(weights)
+            with self.lock:
+                if self._closed.is_set():
+                    raise RuntimeError("推理服务已停止")
+                # 取到模型后、入队前它可能刚好被当作空闲模型卸载，此时重新加载
+                if self.slots.get(slot.weights) is not slot:
+                    continue
+                slot.pending += len(items)
+                slot.last_used = time.monotonic()
+                for item in items:
+                    slot.queue.put(item)
+                depth = sum(s.pending for s in self.slots.values())
+                self.max_queue_depth = max(self.max_queue_depth, depth)
+            return [item.future for item in items]
+
+    def _batch_loop(self, slot):
+        while not slot.stopped.is_set():
+            try:
+                first = slot.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = first.enqueued + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(slot.queue.get(timeout=remaining) if remaining > 0 else slot.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(slot, batch)
+
+    def _run_batch(self, slot, batch):
+        """按推理参数分组，每组一次前向推理"""
+        groups = {}
+        for item in batch:
+            groups.setdefault(item.key, []).append(item)
+        for items in groups.values():
+            start = time.perf_counter()
+            try:
+                results = slot.model.predict([it.image for it in items], verbose=False, **items[0].args)
+                outputs = [(Detections.from_result(r), dict(getattr(r, 'speed', {}) or {})) for r in results]
+            except Exception as e:  # 把推理错误返回给请求方
+                for it in items:
+                    it.future.set_exception(e)
+                outputs = None
+            with self.lock:
+                slot.pending -= len(items)
+                slot.last_used = time.monotonic()
+                if outputs is not None:
+                    slot.batches += 1
+                    slot.images += len(items)
+                    self.batch_sizes.append(len(items))
+                    self.queue_waits.extend((start - it.enqueued) * 1000 for it in items)
+            if outputs is not None:
+                for it, (dets, speed) in zip(items, outputs, strict=True):
+                    it.future.set_result((dets, speed, (start - it.enqueued) * 1000))
+
+    def predict(self, weights, images, args, timeout=None):
+        """提交并等待结果，记录请求延迟"""
+        t0 = time.perf_counter()
+        try:
+            out = [f.result(timeout) for f in self.submit(weights, images, args)]
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            raise
+        with self.lock:
+            self.requests += 1
+            self.latencies.append((time.perf_counter() - t0) * 1000)
+        return out
+
+    def stats(self):
+        """服务状态: 请求延迟分位数、排队等待、平均批大小、当前与最大队列深度、常驻模型"""
+        now = time.monotonic()
+        with self.lock:
+            return {
+                'address': self.address,
+                'uptime_s': time.time() - self.started,
+                'requests': self.requests,
+                'errors': self.errors,
+                'latency_ms': _percentiles(list(self.latencies)),
+                'queue_wait_ms': _percentiles(list(self.queue_waits)),
+                'mean_batch': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+                'queue_depth': sum(s.pending for s in self.slots.values()),
+                'max_queue_depth': self.max_queue_depth,
+                'evictions': self.evictions,
+                'models': [{'weights': s.weights, 'idle_s': now - s.last_used, 'queued': s.pending,
+                            'batches': s.batches, 'images': s.images} for s in self.slots.values()],
+            }
+
+    # ---------- 服务 ----------
+
+    def start(self, address):
+        """
+        在后台线程中开始服务
+
+        参数:
+        address: 'host:port'(端口为0时自动分配) 或 'unix:/path/to.sock'；
+                 host 必须是回环地址，除非 allow_remote 为真
+
+        返回:
+        实际监听的地址
+        """
+        kind, addr = parse_address(address)
+        if kind == 'tcp' and not is_loopback(addr[0]):
+            if not self.allow_remote:
+                raise ValueError(f"推理服务只允许监听本机回环地址(如 127.0.0.1)，{addr[0]} 会让其他机器"
+                                 f"可以让本服务加载任意权重文件；确需远程访问时设置 allow_remote")
+            print(f"警告: 推理服务监听 {addr[0]}，不检查请求来源，网络中的其他机器都可以访问")
+        if kind == 'unix':
+            self.httpd = _UnixHTTPServer(addr, _Handler)
+            self.address = f"unix:{addr}"
+        else:
+            self.httpd = ThreadingHTTPServer(addr, _Handler)
+            self.address = f"{addr[0]}:{self.httpd.server_address[1]}"
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+        self._threads = [threading.Thread(target=self.httpd.serve_forever, name='http', daemon=True),
+                         threading.Thread(target=self._reap_loop, name='reaper', daemon=True)]
+        for t in self._threads:
+            t.start()
+        return self.address
+
+    def _reap_loop(self):
+        interval = min(max(self.idle_timeout / 4, 0.05), 5.0) if self.idle_timeout else 5.0
+        while not self._closed.wait(interval):
+            self.evict_idle()
+
+    def close(self):
+        """停止服务: 不再接受新请求，队列中尚未推理的图像以错误结束，使等待的客户端立即返回"""
+        self._closed.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+        with self.lock:
+            slots = list(self.slots.values())
+            self.slots.clear()
+        for slot in slots:
+            slot.stopped.set()
+            slot.thread.join()
+            while True:
+                try:
+                    item = slot.queue.get_nowait()
+                except queue.Empty:
+                    break
+                item.future.set_exception(RuntimeError("推理服务已停止"))
+        if self.httpd is not None:
+            self.httpd.server_close()
+            if isinstance(self.httpd, _UnixHTTPServer) and os.path.exists(self.httpd.server_address):
+                os.remove(self.httpd.server_address)
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # 上次异常退出留下的套接字文件
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        # 只有当前用户可以连接
+        os.chmod(self.server_address, 0o600)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        return str(self.client_address)
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _forbidden(self, content_type=None):
+        """
+        拒绝不是来自本机客户端的请求(DNS重绑定、网页跨站请求)，返回是否已回复错误
+
+        Host 必须是回环地址；POST 的 Content-Type 必须是 content_type，
+        浏览器不经预检无法发送 application/json 与 application/octet-stream
+        """
+        if not self.server.app.allow_remote and not is_loopback(_host_of(self.headers.get('Host', ''))):
+            self._reply(403, {'error': "只接受 Host 为本机的请求"})
+            return True
+        if content_type and self.headers.get('Content-Type', '').split(';')[0].strip() != content_type:
+            self._reply(415, {'error': f"{self.path} 的 Content-Type 必须是 {content_type}"})
+            return True
+        return False
+
+    def do_GET(self):
+        app = self.server.app
+        if self._forbidden():
+            return
+        if self.path == '/health':
+            self._reply(200, {'ok': True, 'models': [s['weights'] for s in app.stats()['models']]})
+        elif self.path == '/stats':
+            self._reply(200, app.stats())
+        else:
+            self._reply(404, {'error': f"未知路径 {self.path}"})
+
+    def do_POST(self):
+        app = self.server.app
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        content_type = {'/load': 'application/json', '/predict': 'application/octet-stream'}.get(self.path)
+        if self._forbidden(content_type):
+            return
+        try:
+            if self.path == '/load':
+                self._reply(200, app.load(json.loads(body)['model']))
+            elif self.path == '/predict':
+                weights, images, args = _decode_request(body)
+                out = app.predict(weights, images, args)
+                self._reply(200, {'results': [
+                    {'xyxy': d.xyxy.tolist(), 'conf': d.conf.tolist(), 'cls': d.cls.tolist(), 'speed': speed,
+                     'queue_ms': wait, 'orig_shape': list(img.shape[:2])}
+                    for (d, speed, wait), img in zip(out, images, strict=True)]})
+            else:
+                self._reply(404, {'error': f"未知路径 {self.path}"})
+        except PermissionError as e:
+            self._reply(403, {'error': str(e)})
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            self._reply(400, {'error': str(e)})
+        except Exception as e:  # 推理出错时服务继续运行
+            self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+
+def _encode_request(weights, sources, args):
+    """请求体为 npz: 'request' 为JSON(模型、参数、图像路径)，数组图像为 image_<i>"""
+    arrays, paths = {}, []
+    for i, src in enumerate(sources):
+        if isinstance(src, (str, os.PathLike)):
+            paths.append(os.path.abspath(src))
+        else:
+            paths.append(None)
+            arrays[f"image_{i}"] = np.ascontiguousarray(src)
+    request = json.dumps({'model': weights, 'args': args, 'paths': paths}, default=_json_default)
+    buf = io.BytesIO()
+    np.savez(buf, request=np.array(request), **arrays)
+    return buf.getvalue()
+
+
+def _decode_request(body):
+    """解析请求体，图像路径在服务端读取(客户端和服务端在同一台机器上)"""
+    with np.load(io.BytesIO(body), allow_pickle=False) as data:
+        request = json.loads(str(data['request']))
+        images = []
+        for i, path in enumerate(request['paths']):
+            if path is None:
+                images.append(data[f"image_{i}"])
+                continue
+            img = cv2.imread(path)
+            if img is None:
+                raise FileNotFoundError(f"无法读取图像 {path}")
+            images.append(img)
+    return request['model'], images, request['args']
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class InferenceClient:
+    """推理服务的客户端，每个线程保持一个长连接"""
+
+    def __init__(self, address, timeout=120.0):
+        self.address = address
+        self.kind, self.addr = parse_address(address)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, fresh=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            if self.kind == 'unix':
+                conn = _UnixHTTPConnection(self.addr, self.timeout)
+            else:
+                conn = http.client.HTTPConnection(*self.addr, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, body=None, content_type='application/json'):
+        headers = {'Content-Type': content_type} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection(fresh=attempt > 0)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # 服务端关闭了空闲的长连接，重连一次
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"推理服务错误 ({response.status}): {payload.get('error')}")
+        return payload
+
+    def available(self):
+        """服务是否在运行"""
+        try:
+            return bool(self._request('GET', '/health').get('ok'))
+        except (OSError, ValueError, RuntimeError, http.client.HTTPException):
+            return False
+
+    def stats(self):
+        return self._request('GET', '/stats')
+
+    def load(self, weights):
+        return self._request('POST', '/load', json.dumps({'model': os.path.abspath(weights)}).encode('utf-8'))
+
+    def predict(self, weights, sources, **args):
+        """
+        远程推理
+
+        参数:
+        weights: 权重路径
+        sources: 图像路径或BGR数组列表
+        args: predict 参数(PREDICT_KEYS)
+
+        返回:
+        与 sources 一一对应的 RemoteResult 列表
+        """
+        unknown = set(args) - set(PREDICT_KEYS)
+        if unknown:
+            raise ValueError(f"推理服务不支持参数: {', '.join(sorted(unknown))}")
+        body = _encode_request(os.path.abspath(weights), sources, args)
+        payload = self._request('POST', '/predict', body, content_type='application/octet-stream')
+        return [RemoteResult(r) for r in payload['results']]
+
+
+class _HostArray(np.ndarray):
+    """带 .cpu() / .numpy() 的numpy数组，使远程结果的用法与 torch 张量相同"""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.view(np.ndarray)
+
+
+class RemoteBoxes:
+    """与 ultralytics Boxes 用法相同的检测框(xyxy / conf / cls，可迭代出单个框)"""
+
+    def __init__(self, dets):
+        self.dets = dets
+        self.xyxy = dets.xyxy.view(_HostArray)
+        self.conf = dets.conf.view(_HostArray)
+        self.cls = dets.cls.view(_HostArray)
+        self.id = None
+
+    def __len__(self):
+        return len(self.dets)
+
+    def __iter__(self):
+        for i in range(len(self.dets)):
+            yield RemoteBoxes(self.dets[i:i + 1])
+
+
+class RemoteResult:
+    """单帧远程推理结果"""
+
+    def __init__(self, payload):
+        self.boxes = RemoteBoxes(Detections(payload['xyxy'], payload['conf'], payload['cls']))
+        self.speed = payload['speed']
+        self.queue_ms = payload['queue_ms']
+        self.orig_shape = tuple(payload['orig_shape'])
+
+
+class RemoteModel:
+    """
+    瘦客户端模型: predict 由推理服务执行，可以代替 YOLO 对象传给
+    detect_frames、FrameDetector、RoiDetector、TiledDetector 和 PredictionCache
+    """
+
+    def __init__(self, client, weights):
+        self.client = client
+        self.weights = weights
+        info = client.load(weights)
+        self.task = info.get('task', 'detect')
+        self.names = {int(k): v for k, v in (info.get('names') or {}).items()}
+        self.model = SimpleNamespace(args={'imgsz': info['imgsz']}) if info.get('imgsz') else None
+
+    def predict(self, source=None, stream=False, verbose=False, **kwargs):
+        sources = source if isinstance(source, (list, tuple)) else [source]
+        return self.client.predict(self.weights, list(sources), **kwargs)
+
+    def __call__(self, source=None, **kwargs):
+        return self.predict(source, **kwargs)
+
+
+def load_model(config, weights):
+    """
+    加载推理模型: 配置了 inference_server 且服务在运行时返回 RemoteModel(不在本进程加载和预热模型)，
+    否则在本进程中加载 YOLO 模型
+
+    RemoteModel 本身不导入 ultralytics/torch；调用方若还使用 ultralytics 的追踪器等组件，仍会在本进程中导入
+    """
+    address = config.get('inference_server')
+    if address:
+        client = InferenceClient(address)
+        if client.available():
+            print(f"使用推理服务 {address}")
+            return RemoteModel(client, weights)
+        print(f"警告: 推理服务 {address} 不可用，在本进程中加载模型")
+    return _load_yolo(weights)
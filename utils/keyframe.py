@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+
+def propagate_centers(prev_gray, gray, centers, win_size=15, max_level=2, fb_threshold=1.0):
+    """
+    用金字塔Lucas-Kanade光流把框中心从上一帧传播到当前帧
+
+    参数:
+    prev_gray: 上一帧灰度图
+    gray: 当前帧灰度图
+    centers: (n, 2) 框中心坐标
+    win_size: LK搜索窗口边长(像素)，只在中心附近的小块内计算
+    max_level: 金字塔层数
+    fb_threshold: 前向-后向误差阈值(像素)，超过则视为传播失败
+
+    返回:
+    (新中心坐标, 每个点是否传播成功的布尔数组)
+    """
+    if len(centers) == 0:
+        return np.empty((0, 2), dtype=np.float64), np.zeros(0, dtype=bool)
+
+    p0 = centers.astype(np.float32).reshape(-1, 1, 2)
+    lk_params = {
+        'winSize': (win_size, win_size),
+        'maxLevel': max_level,
+        'criteria': (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.01),
+    }
+    p1, st, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, **lk_params)
+    p0r, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, p1, None, **lk_params)
+
+    fb_error = np.linalg.norm((p0 - p0r).reshape(-1, 2), axis=1)
+    ok = (st.reshape(-1) == 1) & (st_back.reshape(-1) == 1) & (fb_error < fb_threshold)
+    return p1.reshape(-1, 2).astype(np.float64), ok
+
+
+class KeyframeScheduler:
+    """
+    关键帧调度器: 每 interval 帧运行一次检测器，
+    其余帧用LK光流把上一帧的轨迹框平移到当前位置。
+    传播成功率低于 min_confidence 时立即要求重新检测。
+    """
+
+    def __init__(self, interval=5, min_confidence=0.8, win_size=15, max_level=2, fb_threshold=1.0):
+        self.interval = max(1, int(interval))
+        self.min_confidence = min_confidence
+        self.win_size = win_size
+        self.max_level = max_level
+        self.fb_threshold = fb_threshold
+        self.prev_gray = None
+        self.rows = None
+        self.since_keyframe = 0
+
+    def need_detection(self):
+        """当前帧是否需要运行检测器"""
+        return self.rows is None or len(self.rows) == 0 or self.since_keyframe + 1 >= self.interval
+
+    def reset(self, gray, rows):
+        """在关键帧上用检测+追踪的结果重置传播状态"""
+        self.prev_gray = gray
+        self.rows = rows
+        self.since_keyframe = 0
+
+    def propagate(self, gray):
+        """
+        把上一帧的轨迹行传播到当前帧
+
+        返回:
+        (传播后的轨迹行, 传播置信度即成功点的比例)
+        """
+        rows = self.rows.copy()
+        centers = np.column_stack([(rows[:, 3] + rows[:, 5]) / 2, (rows[:, 4] + rows[:, 6]) / 2])
+        new_centers, ok = propagate_centers(
+            self.prev_gray, gray, centers,
+            win_size=self.win_size, max_level=self.max_level, fb_threshold=self.fb_threshold,
+        )
+        shift = np.where(ok[:, None], new_centers - centers, 0.0)
+        rows[:, [3, 5]] += shift[:, :1]
+        rows[:, [4, 6]] += shift[:, 1:]
+
+        self.prev_gray = gray
+        self.rows = rows
+        self.since_keyframe += 1
+        return rows, float(ok.mean())
@@ -0,0 +1,170 @@
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import yaml
+
+# 原 visualize_labels.py 的配色(BGR)，更多类别按色相均匀取色
+BASE_COLORS = [(0, 255, 0), (0, 0, 255), (255, 0, 0)]
+CAPTION_HEIGHT = 14
+
+
+def read_class_names(dataset_yaml):
+    """
+    从YOLO数据集配置读取类别名称
+
+    names 可以是列表或 {id: name} 字典，统一返回 {int: str}；文件不存在或没有 names 时返回空字典
+    """
+    if not dataset_yaml or not os.path.exists(dataset_yaml):
+        return {}
+    with open(dataset_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    names = data.get('names') or {}
+    if isinstance(names, (list, tuple)):
+        names = dict(enumerate(names))
+    return {int(k): str(v) for k, v in names.items()}
+
+
+def class_palette(num_classes):
+    """(num_classes, 3) 的 uint8 BGR 调色板"""
+    palette = list(BASE_COLORS[:num_classes])
+    for i in range(len(palette), num_classes):
+        hsv = np.uint8([[[(i * 47) % 180, 220, 255]]])
+        palette.append(tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0]))
+    return np.array(palette, dtype=np.uint8).reshape(-1, 3)
+
+
+def render_sheet(out_path, items, thumb, cols, palette, names):
+    """
+    把一组图像缩成缩略图拼成一张拼图并画出标签框(在工作进程中运行)
+
+    框坐标已经是归一化 xyxy，对每张缩略图只做一次向量化的缩放和平移，
+    在缩略图上画框而不是在原图上画完再缩小。
+
+    参数:
+    out_path: 拼图输出路径
+    items: [(图像路径, 名称, (k, 4) 归一化 xyxy, (k,) 类别)] 列表，类别为 None 表示没有标签文件
+    thumb: 缩略图边长(像素)
+    cols: 每行的缩略图数
+    palette: class_palette() 的调色板
+    names: {类别: 名称}
+
+    返回:
+    (图像数, 无法读取的图像数)
+    """
+    rows = -(-len(items) // cols)
+    cell_h = thumb + CAPTION_HEIGHT
+    sheet = np.full((rows * cell_h, cols * thumb, 3), 32, dtype=np.uint8)
+    unreadable = 0
+    for i, (path, name, xyxyn, cls) in enumerate(items):
+        x0, y0 = (i % cols) * thumb, (i // cols) * cell_h
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            unreadable += 1
+            cv2.putText(sheet, "unreadable", (x0 + 4, y0 + thumb // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.4, (0, 0, 255), 1)
+        else:
+            h, w = img.shape[:2]
+            scale = thumb / max(h, w)
+            tw, th = max(1, round(w * scale)), max(1, round(h * scale))
+            ox, oy = x0 + (thumb - tw) // 2, y0 + (thumb - th) // 2
+            sheet[oy:oy + th, ox:ox + tw] = cv2.resize(img, (tw, th), interpolation=cv2.INTER_AREA)
+            if cls is None:
+                # 没有标签文件: 红色边框
+                cv2.rectangle(sheet, (x0, y0), (x0 + thumb - 1, y0 + thumb - 1), (0, 0, 255), 2)
+            elif len(cls):
+                pts = np.rint(xyxyn * [tw, th, tw, th] + [ox, oy, ox, oy]).astype(np.int32)
+                colors = palette[np.minimum(cls, len(palette) - 1)].tolist()
+                for (x1, y1, x2, y2), color, c in zip(pts.tolist(), colors, cls.tolist(), strict=True):
+                    cv2.rectangle(sheet, (x1, y1), (x2, y2), color, 1)
+                    if thumb >= 192:
+                        cv2.putText(sheet, names.get(c, str(c)), (x1, max(y1 - 2, y0 + 8)),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.3, color, 1)
+        cv2.putText(sheet, name[:thumb // 7], (x0 + 2, y0 + thumb + CAPTION_HEIGHT - 4),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.35, (220, 220, 220), 1)
+    cv2.imwrite(out_path, sheet, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return len(items), unreadable
+
+
+def render_contact_sheets(image_paths, labels, out_dir, names=None, thumb=256, cols=8, rows=6, workers=None):
+    """
+    把整个数据集渲染为带标签框的缩略图拼图(sheet_0000.jpg ...)，并写出 index.csv 记录每张图像的位置
+
+    所有框的坐标换算在主进程中对 LabelStore 的数组一次性完成，拼图在进程池中并行渲染，
+    渲染过程中报告进度和吞吐量。
+
+    参数:
+    image_paths: 图像路径列表
+    labels: LabelStore
+    out_dir: 输出目录(旧的拼图会被删除)
+    names: {类别: 名称}，为空时显示类别编号
+    thumb: 缩略图边长(像素)
+    cols, rows: 每张拼图的列数和行数
+    workers: 进程数，None表示CPU核数，1表示串行
+
+    返回:
+    统计字典: images, sheets, boxes, missing_labels, unreadable, seconds, images_per_s
+    """
+    names = names or {}
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, "sheet_*.jpg")):
+        os.remove(old)
+
+    xyxyn = labels.xyxyn()
+    cls_all = np.asarray(labels.data[:, 1], dtype=np.int64)
+    num_classes = max([len(names), int(cls_all.max()) + 1 if len(cls_all) else 0, 1])
+    palette = class_palette(num_classes)
+
+    items = []
+    missing = 0
+    for path in image_paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in labels:
+            i = labels.index(name)
+            s, e = labels.offsets[i], labels.offsets[i + 1]
+            items.append((path, name, xyxyn[s:e], cls_all[s:e]))
+        else:
+            missing += 1
+            items.append((path, name, None, None))
+
+    per_sheet = cols * rows
+    jobs = []
+    with open(os.path.join(out_dir, "index.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['sheet', 'row', 'col', 'image', 'boxes'])
+        for k in range(0, len(items), per_sheet):
+            sheet = os.path.join(out_dir, f"sheet_{k // per_sheet:04d}.jpg")
+            chunk = items[k:k + per_sheet]
+            jobs.append((sheet, chunk, thumb, cols, palette, names))
+            for j, (path, _name, _, cls) in enumerate(chunk):
+                writer.writerow([os.path.basename(sheet), j // cols, j % cols, path,
+                                 '' if cls is None else len(cls)])
+
+    start = time.perf_counter()
+    done = unreadable = 0
+    step = max(1, len(jobs) // 20)
+    pool = None if workers == 1 or len(jobs) <= 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        if pool is None:
+            results = (render_sheet(*job) for job in jobs)
+        else:
+            results = pool.map(render_sheet, *zip(*jobs, strict=True))
+        for n, (count, bad) in enumerate(results, start=1):
+            done += count
+            unreadable += bad
+            if n % step == 0 or n == len(jobs):
+                elapsed = time.perf_counter() - start
+                print(f"进度: {n}/{len(jobs)} 张拼图, {done}/{len(items)} 张图像 "
+                      f"({done / max(elapsed, 1e-9):.1f} 张/秒)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    seconds = time.perf_counter() - start
+    return {'images': len(items), 'sheets': len(jobs), 'boxes': sum(len(it[3]) for it in items if it[3] is not None),
+            'missing_labels': missing, 'unreadable': unreadable, 'seconds': seconds,
+            'images_per_s': len(items) / seconds if seconds > 0 else 0.0}
@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+
+# 标签数组的列顺序
+LABEL_COLUMNS = ('img_idx', 'cls', 'cx', 'cy', 'w', 'h')
+
+
+def _scan(labels_dir):
+    """返回按文件名排序的标签文件名(不含扩展名)列表和目录签名(目录mtime、文件数、最新文件mtime)"""
+    names = []
+    latest = 0
+    with os.scandir(labels_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.txt') and entry.is_file():
+                names.append(entry.name[:-4])
+                latest = max(latest, entry.stat().st_mtime_ns)
+    names.sort()
+    signature = [os.stat(labels_dir).st_mtime_ns, len(names), latest]
+    return names, signature
+
+
+def _parse(text):
+    """把一个标签文件的内容解析为数值字符串列表(每框5个)，跳过字段数不是5的行"""
+    out = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 5:
+            out.extend(parts)
+    return out
+
+
+class LabelStore:
+    """
+    整个YOLO标签目录的向量化存储
+
+    所有框保存在一个连续的 (n, 6) float32 数组中，列为 img_idx, cls, cx, cy, w, h(归一化坐标)，
+    offsets[i]:offsets[i+1] 是第 i 个标签文件的框。load() 会把数组缓存为可内存映射的 .npy 文件，
+    目录mtime、文件数或最新文件mtime变化时重新解析。
+    """
+
+    def __init__(self, labels_dir, names, data, offsets):
+        self.labels_dir = labels_dir
+        self.names = list(names)
+        self.data = data
+        self.offsets = offsets
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @staticmethod
+    def cache_dir(labels_dir):
+        """缓存放在标签目录旁边(<labels_dir>.store)，不影响标签目录本身的mtime"""
+        labels_dir = os.path.normpath(os.path.abspath(labels_dir))
+        return f"{labels_dir}.store"
+
+    @classmethod
+    def build(cls, labels_dir, names=None):
+        """读取并解析目录中的全部标签文件"""
+        if names is None:
+            names, _ = _scan(labels_dir)
+        tokens = []
+        counts = np.zeros(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            with open(os.path.join(labels_dir, f"{name}.txt"), 'r') as f:
+                parsed = _parse(f.read())
+            tokens.extend(parsed)
+            counts[i] = len(parsed) // 5
+        boxes = np.array(tokens, dtype=np.float32).reshape(-1, 5)
+        data = np.column_stack([np.repeat(np.arange(len(names)), counts).astype(np.float32), boxes])
+        offsets = np.r_[0, np.cumsum(counts)]
+        return cls(labels_dir, names, data, offsets)
+
+    @classmethod
+    def load(cls, labels_dir, use_cache=True):
+        """
+        加载标签目录，缓存有效时直接内存映射缓存文件
+
+        参数:
+        labels_dir: YOLO标签(.txt)目录
+        use_cache: 是否读写缓存
+        """
+        names, signature = _scan(labels_dir)
+        cache = cls.cache_dir(labels_dir)
+        meta_path = os.path.join(cache, 'meta.json')
+        if use_cache and os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta['signature'] == signature and meta['names'] == names:
+                    data = np.load(os.path.join(cache, 'data.npy'), mmap_mode='r')
+                    offsets = np.load(os.path.join(cache, 'offsets.npy'))
+                    return cls(labels_dir, names, data, offsets)
+            except (OSError, ValueError, KeyError):
+                pass
+
+        store = cls.build(labels_dir, names)
+        if use_cache:
+            store.save(cache, signature)
+        return store
+
+    def save(self, cache, signature):
+        """写出缓存文件: 先写数组，最后原子地替换 meta.json"""
+        os.makedirs(cache, exist_ok=True)
+        for name, arr in [('data', self.data), ('offsets', self.offsets)]:
+            tmp = os.path.join(cache, f"{name}.tmp.npy")
+            np.save(tmp, np.ascontiguousarray(arr))
+            os.replace(tmp, os.path.join(cache, f"{name}.npy"))
+        tmp = os.path.join(cache, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'names': self.names}, f)
+        os.replace(tmp, os.path.join(cache, 'meta.json'))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def num_boxes(self):
+        return int(self.offsets[-1])
+
+    def index(self, name):
+        return self._index[name]
+
+    def boxes(self, key):
+        """第 key 个(或文件名为 key 的)标签文件的 (k, 5) 框数组: cls, cx, cy, w, h"""
+        i = self._index[key] if isinstance(key, str) else key
+        return self.data[self.offsets[i]:self.offsets[i + 1], 1:]
+
+    def xyxy(self, key, width, height):
+        """像素坐标的 (k, 4) xyxy 框与 (k,) 类别"""
+        b = np.asarray(self.boxes(key), dtype=np.float64)
+        cx, cy = b[:, 1] * width, b[:, 2] * height
+        w, h = b[:, 3] * width, b[:, 4] * height
+        return np.column_stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]), b[:, 0].astype(np.int64)
+
+    def xyxyn(self):
+        """全部框的归一化 (n, 4) xyxy 数组，行顺序与 data 相同(用 offsets 切分到各文件)"""
+        b = np.asarray(self.data[:, 2:6], dtype=np.float32)
+        half = b[:, 2:] / 2
+        return np.hstack([b[:, :2] - half, b[:, :2] + half])
+
+    def counts(self):
+        """每个标签文件的框数"""
+        return np.diff(self.offsets)
+
+    def empty(self):
+        """没有任何框的标签文件名"""
+        return [self.names[i] for i in np.flatnonzero(self.counts() == 0)]
+
+    def class_counts(self):
+        """{类别: 框数}"""
+        cls = np.asarray(self.data[:, 1], dtype=np.int64)
+        values, counts = np.unique(cls, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist(), strict=True))
+
+    def size_histogram(self, bins=10):
+        """归一化框宽、高的直方图，返回 (宽度计数, 高度计数, 分箱边界)"""
+        edges = np.histogram_bin_edges(np.asarray(self.data[:, 4:6]), bins=bins, range=(0, 1))
+        return np.histogram(self.data[:, 4], edges)[0], np.histogram(self.data[:, 5], edges)[0], edges
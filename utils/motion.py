@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    运动门控: 用降采样后的帧差判断画面是否静止
+
+    与上一次真正处理(检测或光流传播)的帧相比，平均灰度差低于 threshold 时认为静止，
+    本帧跳过检测，沿用上一帧的轨迹并标记为 held。
+    roi_only 为真时只统计目标框(外扩 pad 像素)内的差异，背景中的无关运动不会触发检测。
+    为避免缓慢漂移被一直忽略，连续跳过 max_hold 帧后强制处理一帧。
+    """
+
+    def __init__(self, threshold=2.0, scale=0.25, roi_only=True, pad=32, max_hold=300):
+        self.threshold = threshold
+        self.scale = scale
+        self.roi_only = roi_only
+        self.pad = pad
+        self.max_hold = max_hold
+        self.reference = None
+        self.held = 0
+        self.skipped = 0
+        self.last_diff = 0.0
+
+    def _small(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _mask(self, shape, rows):
+        """把轨迹框(外扩后)映射到降采样图像上的掩码"""
+        mask = np.zeros(shape, dtype=bool)
+        h, w = shape
+        boxes = np.round(rows[:, 3:7] * self.scale).astype(np.int64)
+        pad = int(round(self.pad * self.scale))
+        x1 = np.clip(boxes[:, 0] - pad, 0, w)
+        y1 = np.clip(boxes[:, 1] - pad, 0, h)
+        x2 = np.clip(boxes[:, 2] + pad + 1, 0, w)
+        y2 = np.clip(boxes[:, 3] + pad + 1, 0, h)
+        for a, b, c, d in zip(x1, y1, x2, y2, strict=True):
+            mask[b:d, a:c] = True
+        return mask
+
+    def is_static(self, frame, rows):
+        """
+        判断当前帧相对参考帧是否静止；静止时计数并返回 True，否则把当前帧设为新的参考帧
+
+        参数:
+        frame: 当前BGR帧
+        rows: 上一帧的轨迹行，没有轨迹时总是返回 False
+        """
+        small = self._small(frame)
+        if self.reference is None or rows is None or len(rows) == 0 or self.held >= self.max_hold:
+            self._accept(small)
+            return False
+
+        diff = np.abs(small - self.reference)
+        if self.roi_only:
+            mask = self._mask(small.shape, rows)
+            self.last_diff = float(diff[mask].mean()) if mask.any() else 0.0
+        else:
+            self.last_diff = float(diff.mean())
+
+        if self.last_diff < self.threshold:
+            self.held += 1
+            self.skipped += 1
+            return True
+        self._accept(small)
+        return False
+
+    def _accept(self, small):
+        self.reference = small
+        self.held = 0
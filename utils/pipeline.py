@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+
+# 队列结束标记
+_END = object()
+
+
+class _Stage(threading.Thread):
+    """在线程中运行的流水线阶段，异常会被保存下来由主线程重新抛出"""
+
+    def __init__(self, target, name):
+        super().__init__(name=name, daemon=True)
+        self._target_fn = target
+        self.error = None
+
+    def run(self):
+        try:
+            self._target_fn()
+        except BaseException as e:  # 需要把任何异常带回主线程
+            self.error = e
+
+
+def _put(q, item, stop, consumer=None):
+    """向有界队列放入数据，stop被设置或消费线程已退出时放弃等待"""
+    while not stop.is_set():
+        if consumer is not None and not consumer.is_alive():
+            return False
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_pipeline(frames, process_batch, sinks, batch_size=8, queue_depth=32):
+    """
+    解码 / 推理 / 写出 三段式线程流水线
+
+    - 解码线程: 消费 frames 迭代器(如 cv2.VideoCapture 读帧)，放入有界队列
+    - 推理阶段(调用线程): 把帧按 batch_size 组批，调用 process_batch
+    - 写出线程: 按帧顺序把结果交给每个 sink
+
+    只有一个解码线程和一个写出线程，批次按顺序处理，因此追踪器看到的帧顺序不变。
+
+    参数:
+    frames: (帧号, 图像) 的迭代器
+    process_batch: 接收 [(帧号, 图像), ...]，返回 [(帧号, 图像, 轨迹行), ...]
+    sinks: 可调用对象列表，签名为 sink(帧号, 图像, 轨迹行)
+    batch_size: 每批推理的帧数
+    queue_depth: 解码队列和写出队列的最大长度
+
+    返回:
+    包含帧数、耗时、FPS以及各阶段等待时间的字典
+    """
+    decode_q = queue.Queue(maxsize=queue_depth)
+    write_q = queue.Queue(maxsize=queue_depth)
+    stop = threading.Event()
+    stats = {'frames': 0, 'batches': 0, 'infer_s': 0.0, 'decode_wait_s': 0.0}
+
+    def decode():
+        try:
+            for item in frames:
+                if not _put(decode_q, item, stop):
+                    return
+        finally:
+            _put(decode_q, _END, stop)
+
+    def write():
+        while True:
+            item = write_q.get()
+            if item is _END:
+                return
+            frame_idx, frame, rows = item
+            for sink in sinks:
+                sink(frame_idx, frame, rows)
+
+    decoder = _Stage(decode, 'decoder')
+    writer = _Stage(write, 'writer')
+    start = time.perf_counter()
+    decoder.start()
+    writer.start()
+
+    try:
+        finished = False
+        while not finished:
+            batch = []
+            wait_start = time.perf_counter()
+            while len(batch) < batch_size:
+                item = decode_q.get()
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+            stats['decode_wait_s'] += time.perf_counter() - wait_start
+            if decoder.error is not None:
+                raise decoder.error
+            if not batch:
+                break
+
+            infer_start = time.perf_counter()
+            outputs = process_batch(batch)
+            stats['infer_s'] += time.perf_counter() - infer_start
+            stats['batches'] += 1
+
+            for output in outputs:
+                if not _put(write_q, output, stop, consumer=writer):
+                    raise writer.error or RuntimeError("写出线程已停止")
+            stats['frames'] += len(outputs)
+    finally:
+        stop.set()
+        # 写出线程必须把已入队的结果全部写完
+        if writer.is_alive():
+            write_q.put(_END)
+        writer.join()
+        decoder.join()
+
+    if writer.error is not None:
+        raise writer.error
+    if decoder.error is not None:
+        raise decoder.error
+
+    stats['elapsed_s'] = time.perf_counter() - start
+    stats['fps'] = stats['frames'] / stats['elapsed_s'] if stats['elapsed_s'] > 0 else 0.0
+    return stats
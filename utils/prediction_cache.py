@@ -0,0 +1,180 @@
+import hashlib
+import os
+
+import numpy as np
+
+from utils.boxes import nms
+from utils.detection import Detections
+
+
+def file_hash(path, block_size=1 << 20):
+    """文件内容的 sha1"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def image_hash(image):
+    """图像内容哈希: 路径按文件字节计算，数组按像素数据和尺寸计算"""
+    if isinstance(image, (str, os.PathLike)):
+        return file_hash(image)
+    image = np.ascontiguousarray(image)
+    h = hashlib.sha1(str(image.shape).encode())
+    h.update(image.data)
+    return h.hexdigest()
+
+
+def filter_detections(dets, conf=0.25, iou=0.7, classes=None):
+    """
+    对缓存的低阈值原始检测按新的 conf / iou / 类别重新过滤
+
+    参数:
+    dets: 原始 Detections(低置信度阈值、未做NMS)
+    conf: 置信度阈值
+    iou: NMS的IoU阈值(按类别分别抑制)
+    classes: 保留的类别列表，None表示全部
+    """
+    keep = dets.conf >= conf
+    if classes is not None:
+        keep &= np.isin(dets.cls, classes)
+    dets = dets[keep]
+    if len(dets) == 0:
+        return dets
+    return dets[nms(dets.xyxy, dets.conf, iou, cls=dets.cls)]
+
+
+class PredictionCache:
+    """
+    磁盘上的预测结果缓存
+
+    以 权重文件哈希 + 图像内容哈希 + imgsz + device 为键，保存低置信度阈值、
+    NMS之前(raw_iou=1.0 不抑制任何框)的原始检测；之后不同 conf / iou 的运行只需重新过滤缓存结果，
+    不再运行模型，过滤时的按类别NMS与直接推理相同。缓存总大小超过 max_size_mb 时按最近使用时间(文件mtime)淘汰。
+
+    每张图像最多缓存 max_det 个框(按置信度)。条目被截断时，只有 conf 不低于其中最低置信度的
+    过滤结果与直接推理一致，predict 把这种情况计入 truncated。
+    """
+
+    def __init__(self, cache_dir, max_size_mb=2048, raw_conf=0.001, raw_iou=1.0, max_det=1000):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.raw_conf = raw_conf
+        self.raw_iou = raw_iou
+        self.max_det = max_det
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.truncated = 0
+        self._weights = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.size_bytes = sum(os.path.getsize(p) for p in self._entries())
+
+    def _entries(self):
+        return [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if f.endswith('.npz')]
+
+    def weights_hash(self, weights):
+        """权重文件哈希，同一进程内按 (路径, 大小, mtime) 只计算一次"""
+        st = os.stat(weights)
+        key = (os.path.abspath(weights), st.st_size, st.st_mtime_ns)
+        if key not in self._weights:
+            self._weights[key] = file_hash(weights)
+        return self._weights[key]
+
+    def key(self, weights_hash, image, imgsz, device):
+        raw = f"{weights_hash}|{image_hash(image)}|{imgsz}|{device}|{self.raw_conf}|{self.raw_iou}|{self.max_det}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """读取一条缓存，命中时更新其最近使用时间"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                dets = Detections(data['xyxy'], data['conf'], data['cls'])
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        return dets
+
+    def put(self, key, dets):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, xyxy=dets.xyxy, conf=dets.conf, cls=dets.cls)
+        os.replace(tmp, path)
+        self.size_bytes += os.path.getsize(path)
+        if self.size_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """按mtime从旧到新删除条目，直到总大小降到上限的90%以下"""
+        entries = []
+        for p in self._entries():
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self.size_bytes = total
+
+    def predict_raw(self, model, images, weights, imgsz=640, device='cpu', batch_size=16):
+        """
+        返回每张图像的原始(低阈值)检测，未命中的图像按 batch_size 组批推理后写入缓存
+
+        参数:
+        model: YOLO模型
+        images: 图像路径或BGR数组的列表
+        weights: 模型权重文件路径，用于计算缓存键
+        imgsz: 推理尺寸
+        device: 推理设备
+        batch_size: 未命中图像每批推理的数量
+        """
+        wh = self.weights_hash(weights)
+        keys = [self.key(wh, img, imgsz, device) for img in images]
+        out = [self.get(k) for k in keys]
+        missing = [i for i, d in enumerate(out) if d is None]
+        self.hits += len(images) - len(missing)
+        self.misses += len(missing)
+
+        for s in range(0, len(missing), batch_size):
+            idx = missing[s:s + batch_size]
+            results = model.predict([images[i] for i in idx], conf=self.raw_conf, iou=self.raw_iou,
+                                    imgsz=imgsz, device=device, max_det=self.max_det, verbose=False)
+            for i, r in zip(idx, results, strict=True):
+                out[i] = Detections.from_result(r)
+                self.put(keys[i], out[i])
+        return out
+
+    def predict(self, model, images, weights, imgsz=640, device='cpu', conf=0.25, iou=0.7,
+                classes=None, batch_size=16):
+        """与 predict_raw 相同，但按 conf / iou / classes 过滤后返回"""
+        raw = self.predict_raw(model, images, weights, imgsz=imgsz, device=device, batch_size=batch_size)
+        self.truncated += sum(len(d) >= self.max_det and conf < d.conf.min() for d in raw)
+        return [filter_detections(d, conf, iou, classes) for d in raw]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'truncated': self.truncated,
+            'size_mb': self.size_bytes / 1024 / 1024,
+        }
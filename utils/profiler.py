@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def peak_rss_mb():
+    """进程的峰值常驻内存(MB)，取不到峰值时返回当前值"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为KB，macOS 为字节
+        return peak / 1024 / (1024 if os.uname().sysname == 'Darwin' else 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+    except ImportError:
+        return float('nan')
+
+
+class StageProfiler:
+    """
+    分阶段计时器: 记录各阶段(解码、预处理、推理、NMS、追踪、写出等)的墙钟时间和CPU时间，
+    以及每帧延迟的分位数、FPS和峰值内存，并输出为JSON/CSV报告。
+
+    enabled 为 False 时所有方法都是空操作，可以无条件地插在处理循环中。
+    各阶段可以在不同线程中计时(CPU时间按线程统计)。
+    ultralytics 的 r.speed 细分耗时已包含在外层的 predict/detect 阶段中，单独记在 breakdown 里，不计入占比。
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.breakdown = {}
+        self.frame_latencies = []
+        self._pending = 0.0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add(self, name, wall, cpu=0.0, calls=1, breakdown=False):
+        if not self.enabled:
+            return
+        with self._lock:
+            table = self.breakdown if breakdown else self.stages
+            s = table.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            s['wall_s'] += wall
+            s['cpu_s'] += cpu
+            s['calls'] += calls
+
+    @contextmanager
+    def stage(self, name):
+        """对 with 块内的代码计时"""
+        if not self.enabled:
+            yield
+            return
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0, time.thread_time() - c0)
+
+    def iterate(self, iterable, name='decode'):
+        """包装迭代器，把每次取下一项的耗时记为 name 阶段(如读帧解码)"""
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        while True:
+            t0, c0 = time.perf_counter(), time.thread_time()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            wall = time.perf_counter() - t0
+            self.add(name, wall, time.thread_time() - c0)
+            self._pending += wall
+            yield item
+
+    @contextmanager
+    def frame(self):
+        """对一帧的处理计时；之前 iterate() 记录的解码时间也计入该帧延迟"""
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.frame_done(time.perf_counter() - t0 + self._pending)
+            self._pending = 0.0
+
+    def frame_done(self, latency, count=1):
+        """直接记录 count 帧、每帧 latency 秒的延迟"""
+        if self.enabled:
+            with self._lock:
+                self.frame_latencies.extend([latency] * count)
+
+    def batch_done(self, elapsed, count):
+        """一批 count 帧共耗时 elapsed 秒: 每帧延迟按批耗时平摊记录，与逐帧处理的延迟可以直接比较"""
+        if count:
+            self.frame_done(elapsed / count, count=count)
+
+    def record_speed(self, results):
+        """记录ultralytics结果中的 preprocess / inference / postprocess(NMS) 细分耗时(不计入阶段占比)"""
+        if not self.enabled:
+            return
+        for r in results:
+            for name, ms in getattr(r, 'speed', {}).items():
+                if ms is not None:
+                    self.add(name, ms / 1000, breakdown=True)
+
+    def report(self):
+        elapsed = time.perf_counter() - self._start
+        latency = np.array(self.frame_latencies) * 1000
+        frames = len(latency)
+        return {
+            'elapsed_s': elapsed,
+            'frames': frames,
+            'fps': frames / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'mean': float(latency.mean()) if frames else float('nan'),
+                'p50': float(np.percentile(latency, 50)) if frames else float('nan'),
+                'p95': float(np.percentile(latency, 95)) if frames else float('nan'),
+                'p99': float(np.percentile(latency, 99)) if frames else float('nan'),
+            },
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': {
+                name: dict(s, mean_ms=s['wall_s'] / s['calls'] * 1000 if s['calls'] else 0.0,
+                           share=s['wall_s'] / elapsed if elapsed > 0 else 0.0)
+                for name, s in self.stages.items()
+            },
+            'breakdown': {
+                name: dict(s, mean_ms=s['wall_s'] / s['calls'] * 1000 if s['calls'] else 0.0)
+                for name, s in self.breakdown.items()
+            },
+        }
+
+    def save(self, out_dir, name='profile'):
+        """把报告写成 out_dir/<name>.json 和 out_dir/<name>.csv，并打印摘要"""
+        if not self.enabled:
+            return None
+        report = self.report()
+        os.makedirs(out_dir, exist_ok=True)
+        json_path = os.path.join(out_dir, f"{name}.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        with open(os.path.join(out_dir, f"{name}.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'calls', 'wall_s', 'cpu_s', 'mean_ms', 'share', 'kind'])
+            for stage, s in report['stages'].items():
+                writer.writerow([stage, s['calls'], f"{s['wall_s']:.6f}", f"{s['cpu_s']:.6f}",
+                                 f"{s['mean_ms']:.3f}", f"{s['share']:.4f}", 'stage'])
+            for stage, s in report['breakdown'].items():
+                writer.writerow([stage, s['calls'], f"{s['wall_s']:.6f}", f"{s['cpu_s']:.6f}",
+                                 f"{s['mean_ms']:.3f}", '', 'breakdown'])
+
+        lat = report['latency_ms']
+        print(f"\n性能分析: {report['frames']} 帧, {report['fps']:.2f} FPS, "
+              f"延迟 p50 {lat['p50']:.1f}ms / p95 {lat['p95']:.1f}ms / p99 {lat['p99']:.1f}ms, "
+              f"峰值内存 {report['peak_rss_mb']:.0f}MB")
+        for stage, s in sorted(report['stages'].items(), key=lambda x: -x[1]['wall_s']):
+            print(f"  {stage:<12} {s['wall_s']:>9.2f}s  CPU {s['cpu_s']:>9.2f}s  "
+                  f"{s['mean_ms']:>8.2f}ms/次  {s['share']:>6.1%}")
+        if report['breakdown']:
+            print("  其中 ultralytics 细分(已含在上面的推理阶段中):")
+            for stage, s in report['breakdown'].items():
+                print(f"    {stage:<10} {s['wall_s']:>9.2f}s  {s['mean_ms']:>22.2f}ms/次")
+        print(f"性能报告已保存到 {json_path}")
+        return report
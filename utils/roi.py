@@ -0,0 +1,70 @@
+import numpy as np
+
+from utils.boxes import expand_windows, merge_windows, nms
+from utils.detection import Detections, FrameDetector
+
+
+class RoiDetector(FrameDetector):
+    """
+    ROI裁剪检测器: 在上一帧轨迹框周围裁剪带边距的区域，
+    将所有裁剪块打包成一个batch推理，再把框映射回整帧坐标。
+
+    以下情况退回整帧推理:
+    - 没有上一帧轨迹
+    - 距上次整帧推理已达 full_interval 帧
+    - ROI内检测到的目标数少于上一帧轨迹数(认为有轨迹丢失)
+    """
+
+    def __init__(self, model, predict_args, pad=64, min_size=160, full_interval=30, roi_imgsz=320):
+        super().__init__(model, predict_args)
+        self.pad = pad
+        self.min_size = min_size
+        self.full_interval = full_interval
+        self.roi_imgsz = roi_imgsz
+        self.roi_passes = 0
+        self.fallbacks = 0
+        self._since_full = 0
+
+    def detect_rois(self, frame, prev_rows):
+        """在上一帧轨迹周围的ROI内检测"""
+        windows = merge_windows(expand_windows(prev_rows[:, 3:7], frame.shape, self.pad, self.min_size))
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        args = dict(self.predict_args)
+        if self.roi_imgsz:
+            args['imgsz'] = self.roi_imgsz
+        results = self.model.predict(crops, verbose=False, **args)
+        if self.profiler is not None:
+            self.profiler.record_speed(results)
+
+        xyxy, conf, cls = [], [], []
+        for (x1, y1, _, _), r in zip(windows, results, strict=True):
+            det = Detections.from_result(r)
+            xyxy.append(det.xyxy + np.array([x1, y1, x1, y1], dtype=np.float32))
+            conf.append(det.conf)
+            cls.append(det.cls)
+        self.roi_passes += 1
+        self.pixels += int(((windows[:, 2] - windows[:, 0]) * (windows[:, 3] - windows[:, 1])).sum())
+
+        dets = Detections(np.vstack(xyxy), np.concatenate(conf), np.concatenate(cls))
+        # 合并后的窗口之间仍可能有少量重叠，去除重复框
+        keep = nms(dets.xyxy, dets.conf, self.predict_args.get('iou', 0.5), cls=dets.cls)
+        return dets[keep]
+
+    def __call__(self, frame, prev_rows=None):
+        self.frame_pixels += frame.shape[0] * frame.shape[1]
+        if prev_rows is None or len(prev_rows) == 0 or self._since_full >= self.full_interval:
+            self._since_full = 0
+            return self.detect_full(frame)
+
+        dets = self.detect_rois(frame, prev_rows)
+        if len(dets) < len(prev_rows):
+            self.fallbacks += 1
+            self._since_full = 0
+            return self.detect_full(frame)
+        self._since_full += 1
+        return dets
+
+    def summary(self):
+        stats = super().summary()
+        stats.update({'roi_passes': self.roi_passes, 'fallbacks': self.fallbacks})
+        return stats
@@ -0,0 +1,364 @@
+import csv
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import yaml
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    run_dir TEXT NOT NULL,
+    model TEXT,
+    data TEXT,
+    imgsz INTEGER,
+    epochs INTEGER,
+    args TEXT,
+    source_stat TEXT,
+    epochs_done INTEGER,
+    best_epoch INTEGER,
+    precision REAL,
+    recall REAL,
+    map50 REAL,
+    map50_95 REAL,
+    weights TEXT,
+    weights_stat TEXT
+);
+CREATE TABLE IF NOT EXISTS latency (
+    weights TEXT NOT NULL,
+    weights_stat TEXT NOT NULL,
+    imgsz INTEGER NOT NULL,
+    threads INTEGER NOT NULL,
+    mean_ms REAL,
+    p50_ms REAL,
+    p95_ms REAL,
+    measured_at REAL,
+    PRIMARY KEY (weights, weights_stat, imgsz, threads)
+);
+CREATE TABLE IF NOT EXISTS accuracy (
+    weights TEXT NOT NULL,
+    weights_stat TEXT NOT NULL,
+    imgsz INTEGER NOT NULL,
+    precision REAL,
+    recall REAL,
+    map50 REAL,
+    map50_95 REAL,
+    source TEXT,
+    measured_at REAL,
+    PRIMARY KEY (weights, weights_stat, imgsz)
+);
+"""
+
+# 与 ultralytics 选择 best.pt 相同的综合指标权重: 0.1 * mAP50 + 0.9 * mAP50-95
+FITNESS_WEIGHTS = (0.1, 0.9)
+
+
+def _stat(path):
+    """文件的 'mtime_ns:size'，不存在时为空字符串"""
+    if not os.path.exists(path):
+        return ''
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def read_best_epoch(results_csv):
+    """
+    读取 results.csv 中 best.pt 对应的epoch(综合指标最高)的指标
+
+    返回:
+    {epochs_done, best_epoch, precision, recall, map50, map50_95}，没有有效行时返回 None
+    """
+    if not os.path.exists(results_csv):
+        return None
+    with open(results_csv, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        rows = []
+        for row in reader:
+            try:
+                rows.append({k: float(v) for k, v in zip(header, row, strict=True)})
+            except ValueError:
+                continue
+    cols = ['metrics/precision(B)', 'metrics/recall(B)', 'metrics/mAP50(B)', 'metrics/mAP50-95(B)']
+    rows = [r for r in rows if all(c in r for c in cols)]
+    if not rows:
+        return None
+    fitness = [FITNESS_WEIGHTS[0] * r[cols[2]] + FITNESS_WEIGHTS[1] * r[cols[3]] for r in rows]
+    best = rows[int(np.argmax(fitness))]
+    return {'epochs_done': len(rows), 'best_epoch': int(best.get('epoch', 0)), 'precision': best[cols[0]],
+            'recall': best[cols[1]], 'map50': best[cols[2]], 'map50_95': best[cols[3]]}
+
+
+def time_inference(model, imgsz, runs=20, warmup=3, seed=0):
+    """在随机图像上测量CPU单张推理延迟，返回 (mean_ms, p50_ms, p95_ms)"""
+    img = np.random.default_rng(seed).integers(0, 256, (imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(warmup):
+        model.predict(img, imgsz=imgsz, device='cpu', verbose=False)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        model.predict(img, imgsz=imgsz, device='cpu', verbose=False)
+        times.append((time.perf_counter() - t0) * 1000)
+    return float(np.mean(times)), float(np.percentile(times, 50)), float(np.percentile(times, 95))
+
+
+def validate_model(model, data, imgsz):
+    """在验证集上以 imgsz 验证模型，返回 {precision, recall, map50, map50_95}"""
+    metrics = model.val(data=data, imgsz=imgsz, device='cpu', plots=False, verbose=False)
+    return {'precision': float(metrics.box.mp), 'recall': float(metrics.box.mr),
+            'map50': float(metrics.box.map50), 'map50_95': float(metrics.box.map)}
+
+
+def registry_requirements(config):
+    """配置中选择模型的精度要求"""
+    return {'min_map50': config.get('registry_min_map50', 0.0),
+            'min_recall': config.get('registry_min_recall', 0.0),
+            'min_map50_95': config.get('registry_min_map50_95', 0.0)}
+
+
+def _meets(metrics, min_map50=0.0, min_recall=0.0, min_map50_95=0.0):
+    return (metrics is not None and metrics['map50'] >= min_map50 and metrics['recall'] >= min_recall
+            and metrics['map50_95'] >= min_map50_95)
+
+
+def _load_yolo(path):
+    from ultralytics import YOLO
+
+    return YOLO(path)
+
+
+def _torch_threads():
+    try:
+        import torch
+        return torch.get_num_threads()
+    except ImportError:
+        return os.cpu_count() or 1
+
+
+class RunRegistry:
+    """
+    训练结果登记表(SQLite): 索引 runs/detect/*/args.yaml 与 results.csv，
+    缓存各 best.pt 在不同 imgsz 下的验证精度和CPU推理延迟，并按精度要求选择最快的 (模型, imgsz)。
+
+    索引是增量的: args.yaml、results.csv、best.pt 的 mtime 和大小都没变的运行不再重新解析；
+    训练尺寸下的精度取自 results.csv，其他尺寸用 model.val 验证；精度按权重文件的 mtime 和大小、imgsz 缓存，
+    延迟另按线程数缓存，权重更新后自动重新验证和测量。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def index(self, runs_root):
+        """
+        增量索引 runs_root 下所有含 args.yaml 的运行目录，删除已不存在的运行
+
+        返回:
+        {'indexed': 重新解析的运行数, 'unchanged': 未变化的运行数, 'removed': 删除的运行数}
+        """
+        known = {r['name']: r['source_stat'] for r in self.conn.execute("SELECT name, source_stat FROM runs")}
+        seen = set()
+        stats = {'indexed': 0, 'unchanged': 0, 'removed': 0}
+        for name in sorted(os.listdir(runs_root)) if os.path.isdir(runs_root) else []:
+            run_dir = os.path.join(runs_root, name)
+            args_path = os.path.join(run_dir, 'args.yaml')
+            if not os.path.exists(args_path):
+                continue
+            seen.add(name)
+            results_path = os.path.join(run_dir, 'results.csv')
+            weights = os.path.join(run_dir, 'weights', 'best.pt')
+            source_stat = '|'.join(_stat(p) for p in (args_path, results_path, weights))
+            if known.get(name) == source_stat:
+                stats['unchanged'] += 1
+                continue
+
+            with open(args_path, 'r', encoding='utf-8') as f:
+                args = yaml.safe_load(f) or {}
+            best = read_best_epoch(results_path) or {}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, run_dir, str(args.get('model')), str(args.get('data')), args.get('imgsz'), args.get('epochs'),
+                 json.dumps(args, default=str), source_stat, best.get('epochs_done', 0), best.get('best_epoch'),
+                 best.get('precision'), best.get('recall'), best.get('map50'), best.get('map50_95'),
+                 weights if os.path.exists(weights) else None, _stat(weights)))
+            # best.pt 在训练尺寸下的验证精度就是 results.csv 中最好epoch的指标
+            if best and os.path.exists(weights) and args.get('imgsz'):
+                self.conn.execute("INSERT OR REPLACE INTO accuracy VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (weights, _stat(weights), args['imgsz'], best['precision'], best['recall'],
+                                   best['map50'], best['map50_95'], 'train', time.time()))
+            stats['indexed'] += 1
+
+        for name in set(known) - seen:
+            self.conn.execute("DELETE FROM runs WHERE name = ?", (name,))
+            stats['removed'] += 1
+        self.conn.commit()
+        return stats
+
+    def runs(self):
+        """全部运行记录(字典列表)，按 mAP50 降序"""
+        rows = self.conn.execute("SELECT * FROM runs ORDER BY map50 IS NULL, map50 DESC, name")
+        return [dict(r) for r in rows]
+
+    def accuracy(self, run, imgsz):
+        """缓存的 imgsz 下的验证精度，没有时返回 None"""
+        row = self.conn.execute(
+            "SELECT * FROM accuracy WHERE weights = ? AND weights_stat = ? AND imgsz = ?",
+            (run['weights'], run['weights_stat'], imgsz)).fetchone()
+        return dict(row) if row else None
+
+    def validate(self, imgsz_list, data=None, names=None, load_model=None):
+        """
+        在验证集上验证(缓存中没有的)各 best.pt 在每个 imgsz 下的精度
+
+        参数:
+        imgsz_list: 推理尺寸列表
+        data: 数据集配置文件，None表示使用各运行 args.yaml 中的 data
+        names: 只验证这些运行，None表示全部有权重的运行
+        load_model: 加载模型的函数(默认 ultralytics YOLO)
+
+        返回:
+        新验证的 (运行名, imgsz) 数
+        """
+        load_model = load_model or _load_yolo
+        validated = 0
+        for run in self.runs():
+            if not run['weights'] or (names is not None and run['name'] not in names):
+                continue
+            missing = [s for s in imgsz_list if self.accuracy(run, s) is None]
+            if not missing:
+                continue
+            run_data = data or run['data']
+            if not run_data or not os.path.exists(run_data):
+                print(f"警告: 找不到 {run['name']} 的数据集配置 {run_data}，无法在 {missing} 尺寸下验证")
+                continue
+            model = load_model(run['weights'])
+            for imgsz in missing:
+                m = validate_model(model, run_data, imgsz)
+                self.conn.execute("INSERT OR REPLACE INTO accuracy VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (run['weights'], run['weights_stat'], imgsz, m['precision'], m['recall'],
+                                   m['map50'], m['map50_95'], 'val', time.time()))
+                validated += 1
+            self.conn.commit()
+        return validated
+
+    def latency(self, run, imgsz, threads=None):
+        """缓存的延迟记录，没有时返回 None"""
+        threads = threads or _torch_threads()
+        row = self.conn.execute(
+            "SELECT * FROM latency WHERE weights = ? AND weights_stat = ? AND imgsz = ? AND threads = ?",
+            (run['weights'], run['weights_stat'], imgsz, threads)).fetchone()
+        return dict(row) if row else None
+
+    def benchmark(self, imgsz_list, runs=20, warmup=3, names=None, load_model=None, threads=None,
+                  requirements=None):
+        """
+        测量(缓存中没有的)各 best.pt 在每个 imgsz 下的CPU推理延迟
+
+        参数:
+        imgsz_list: 推理尺寸列表
+        runs, warmup: 每个尺寸的计时次数和预热次数
+        names: 只测量这些运行，None表示全部有权重的运行
+        load_model: 加载模型的函数(默认 ultralytics YOLO)
+        threads: 记录的线程数(默认 torch 当前线程数)
+        requirements: 精度要求(registry_requirements)，给出时只测量该尺寸下验证精度满足要求的组合
+
+        返回:
+        新测量的 (运行名, imgsz) 数
+        """
+        load_model = load_model or _load_yolo
+        threads = threads or _torch_threads()
+        measured = 0
+        for run in self.runs():
+            if not run['weights'] or (names is not None and run['name'] not in names):
+                continue
+            missing = [s for s in imgsz_list if self.latency(run, s, threads) is None
+                       and (requirements is None or _meets(self.accuracy(run, s), **requirements))]
+            if not missing:
+                continue
+            model = load_model(run['weights'])
+            for imgsz in missing:
+                mean_ms, p50_ms, p95_ms = time_inference(model, imgsz, runs, warmup)
+                self.conn.execute("INSERT OR REPLACE INTO latency VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (run['weights'], run['weights_stat'], imgsz, threads,
+                                   mean_ms, p50_ms, p95_ms, time.time()))
+                measured += 1
+            self.conn.commit()
+        return measured
+
+    def candidates(self, min_map50=0.0, min_recall=0.0, min_map50_95=0.0, imgsz_list=None, threads=None):
+        """
+        在该 imgsz 下验证精度满足要求且有延迟记录的 (运行, imgsz) 组合，按平均延迟升序
+
+        返回:
+        字典列表，每项为运行记录加上 infer_imgsz、mean_ms、p50_ms、p95_ms；
+        precision / recall / map50 / map50_95 为 infer_imgsz 下的验证精度
+        """
+        threads = threads or _torch_threads()
+        rows = self.conn.execute(
+            "SELECT runs.name, runs.run_dir, runs.model, runs.data, runs.imgsz, runs.epochs, runs.args, "
+            "runs.epochs_done, runs.best_epoch, runs.weights, runs.weights_stat, "
+            "accuracy.precision, accuracy.recall, accuracy.map50, accuracy.map50_95, "
+            "latency.imgsz AS infer_imgsz, latency.mean_ms, latency.p50_ms, latency.p95_ms "
+            "FROM runs JOIN latency ON runs.weights = latency.weights AND runs.weights_stat = latency.weights_stat "
+            "JOIN accuracy ON accuracy.weights = latency.weights AND accuracy.weights_stat = latency.weights_stat "
+            "AND accuracy.imgsz = latency.imgsz "
+            "WHERE latency.threads = ? AND accuracy.map50 >= ? AND accuracy.recall >= ? AND accuracy.map50_95 >= ? "
+            "ORDER BY latency.mean_ms",
+            (threads, min_map50, min_recall, min_map50_95))
+        out = [dict(r) for r in rows]
+        if imgsz_list:
+            out = [r for r in out if r['infer_imgsz'] in imgsz_list]
+        return out
+
+    def select(self, min_map50=0.0, min_recall=0.0, min_map50_95=0.0, imgsz_list=None, threads=None):
+        """满足精度要求的最快 (运行, imgsz)，没有时返回 None"""
+        rows = self.candidates(min_map50, min_recall, min_map50_95, imgsz_list, threads)
+        return rows[0] if rows else None
+
+
+def resolve_model(config):
+    """
+    track_model 为 'registry' 时通过登记表选择模型: 索引运行目录、在各候选尺寸下验证精度、
+    测量缺少的延迟，选出在该尺寸下满足 registry_min_map50 / registry_min_recall 的最快 (best.pt, imgsz)
+
+    返回:
+    替换了 track_model 并设置 track_imgsz(推理尺寸)的配置副本；track_model 不是 'registry' 时原样返回；没有满足要求的模型时返回 None
+    """
+    if config.get('track_model') != 'registry':
+        return config
+    imgsz_list = config.get('registry_imgsz') or [config.get('track_imgsz') or config.get('imgsz', 640)]
+    with RunRegistry(config.get('registry_path', 'runs/registry.sqlite')) as registry:
+        stats = registry.index(config.get('registry_runs', 'runs/detect'))
+        print(f"登记表: 新索引 {stats['indexed']} 个运行, 未变化 {stats['unchanged']} 个, 删除 {stats['removed']} 个")
+        requirements = registry_requirements(config)
+        validated = registry.validate(imgsz_list, data=config.get('registry_val_data') or None)
+        if validated:
+            print(f"验证了 {validated} 组 (模型, imgsz) 的精度")
+        # 只测量在该尺寸下满足精度要求的组合
+        measured = registry.benchmark(imgsz_list, runs=config.get('registry_latency_runs', 20),
+                                      requirements=requirements)
+        if measured:
+            print(f"测量了 {measured} 组推理延迟")
+        best = registry.select(imgsz_list=imgsz_list, **requirements)
+    if best is None:
+        print(f"错误: 登记表中没有满足要求的模型 ({requirements})")
+        return None
+    print(f"登记表选择 {best['name']}: imgsz={best['infer_imgsz']}, 延迟 {best['mean_ms']:.1f} ms, "
+          f"mAP50 {best['map50']:.3f}, 召回率 {best['recall']:.3f}")
+    return dict(config, track_model=best['weights'], track_imgsz=best['infer_imgsz'])
@@ -0,0 +1,131 @@
+import numpy as np
+
+
+def plan_shards(frame_count, n_shards, overlap=60):
+    """
+    把一个视频划分为相互重叠的帧区间
+
+    每个分片负责核心区间 [core_start, core_stop)，实际处理区间向前多取 overlap 帧，
+    这段重叠既用来预热追踪器，也用来和前一个分片的轨迹做ID拼接。
+
+    参数:
+    frame_count: 视频总帧数
+    n_shards: 分片数
+    overlap: 重叠帧数
+
+    返回:
+    字典列表，包含 start, stop, core_start, core_stop
+    """
+    n_shards = max(1, min(n_shards, frame_count))
+    bounds = np.linspace(0, frame_count, n_shards + 1).round().astype(int)
+    return [
+        {
+            'start': int(max(0, bounds[i] - overlap)) if i > 0 else 0,
+            'stop': int(bounds[i + 1]),
+            'core_start': int(bounds[i]),
+            'core_stop': int(bounds[i + 1]),
+        }
+        for i in range(n_shards)
+    ]
+
+
+def match_track_ids(prev, nxt, max_distance=10.0):
+    """
+    在重叠帧内把后一分片的track_id匹配到前一分片的track_id
+
+    统计每对ID在重叠帧中中心距离小于 max_distance 的帧数作为票数，
+    再用匈牙利算法求票数最大的一一对应。
+
+    参数:
+    prev: 前一分片在重叠帧内的轨迹列字典
+    nxt: 后一分片在重叠帧内的轨迹列字典
+
+    返回:
+    {后一分片ID: 前一分片ID} 的字典
+    """
+    from scipy.optimize import linear_sum_assignment
+    from scipy.spatial import cKDTree
+
+    if len(prev['frame']) == 0 or len(nxt['frame']) == 0:
+        return {}
+
+    def _points(tracks):
+        cx = (tracks['x1'] + tracks['x2']) / 2
+        cy = (tracks['y1'] + tracks['y2']) / 2
+        return np.column_stack([tracks['frame'] * (max_distance * 10 + 1e4), cx, cy])
+
+    dist, idx = cKDTree(_points(prev)).query(_points(nxt), distance_upper_bound=max_distance)
+    ok = np.isfinite(dist)
+    if not ok.any():
+        return {}
+
+    prev_ids, prev_inv = np.unique(prev['track_id'], return_inverse=True)
+    next_ids, next_inv = np.unique(nxt['track_id'], return_inverse=True)
+    votes = np.zeros((len(next_ids), len(prev_ids)), dtype=np.int64)
+    np.add.at(votes, (next_inv[ok], prev_inv[idx[ok]]), 1)
+
+    rows, cols = linear_sum_assignment(-votes)
+    return {
+        int(next_ids[r]): int(prev_ids[c])
+        for r, c in zip(rows, cols, strict=True) if votes[r, c] > 0
+    }
+
+
+def _select(tracks, mask):
+    return {col: tracks[col][mask] for col in tracks}
+
+
+def stitch_shards(shard_tracks, plans, max_distance=10.0):
+    """
+    拼接各分片的轨迹，使同一物理目标在全片中只有一个全局ID
+
+    参数:
+    shard_tracks: 各分片的轨迹列字典(read_tracks 的返回值)，帧号为全局帧号
+    plans: plan_shards 的返回值
+    max_distance: 重叠帧内认为是同一目标的最大中心距离(像素)
+
+    返回:
+    拼接后的轨迹列字典，每帧只保留负责该帧的分片(核心区间)的结果
+    """
+    merged = []
+    prev_core = None
+    prev_map = {}
+    next_global = 0
+
+    for tracks, plan in zip(shard_tracks, plans, strict=True):
+        id_map = {}
+        if prev_core is None:
+            # 第一个分片保留原有ID
+            ids = np.unique(tracks['track_id']).tolist()
+            id_map = {tid: tid for tid in ids}
+            next_global = max([0] + ids) + 1
+        else:
+            overlap_mask = tracks['frame'] < plan['core_start']
+            prev_overlap = _select(prev_core, prev_core['frame'] >= plan['start'])
+            local = match_track_ids(prev_overlap, _select(tracks, overlap_mask), max_distance)
+            # 前一分片的局部ID -> 全局ID
+            id_map = {nid: prev_map[pid] for nid, pid in local.items() if pid in prev_map}
+
+        core = _select(tracks, (tracks['frame'] >= plan['core_start']) & (tracks['frame'] < plan['core_stop']))
+        for tid in np.unique(tracks['track_id']).tolist():
+            if tid in id_map:
+                continue
+            if tid < 0:
+                id_map[tid] = -1
+            else:
+                id_map[tid] = next_global
+                next_global += 1
+
+        keys = np.array(list(id_map.keys()), dtype=np.int64)
+        values = np.array(list(id_map.values()), dtype=np.int64)
+        order = np.argsort(keys)
+        mapped = dict(core)
+        if len(core['track_id']):
+            mapped['track_id'] = values[order][np.searchsorted(keys[order], core['track_id'])]
+        merged.append(mapped)
+
+        # 保存原始(局部ID)核心结果供下一个分片匹配
+        prev_core = _select(tracks, tracks['frame'] >= plan['core_start'])
+        prev_map = id_map
+
+    return {col: np.concatenate([m[col] for m in merged]) for col in merged[0]}
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import re
+
+MANIFEST_NAME = "split_manifest.json"
+
+# 视频抽帧的文件名形如 GX010355_0240: 去掉末尾的帧号即为来源视频
+DEFAULT_GROUP_PATTERN = r'^(.+?)_\d+$'
+
+
+def group_of(name, pattern=DEFAULT_GROUP_PATTERN):
+    """由文件名(不含扩展名)得到分组键，不匹配时每个文件自成一组"""
+    m = re.match(pattern, name)
+    return m.group(1) if m else name
+
+
+def hash_score(key, seed=''):
+    """把分组键稳定地映射到 [0, 1)"""
+    digest = hashlib.sha1(f"{seed}:{key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def load_split_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def split_dataset(image_paths, out_dir, val_ratio=0.2, seed='disp_track', group_pattern=DEFAULT_GROUP_PATTERN):
+    """
+    确定性、按来源视频分组的训练/验证集划分
+
+    同一视频的帧总在同一侧，避免几乎相同的相邻帧同时出现在训练集和验证集中。
+    新分组按 hash(seed, 分组键) < val_ratio 分到验证集；已经划分过的分组沿用清单中的结果，
+    所以修改 val_ratio 或增加新帧都不会移动已有的图像，新图像只追加到列表末尾。
+    划分结果写入 out_dir/train.txt、val.txt 和 split_manifest.json
+
+    参数:
+    image_paths: 图像路径列表
+    out_dir: 输出目录
+    val_ratio: 新分组进入验证集的比例
+    seed: 哈希种子，改变种子会得到另一种划分(需删除清单)
+    group_pattern: 从文件名提取分组键的正则，第1个捕获组为分组键
+
+    返回:
+    {'train': [...], 'val': [...]} 路径列表
+    """
+    manifest = load_split_manifest(out_dir) or {'seed': seed, 'groups': {}, 'train': [], 'val': []}
+    groups = manifest['groups']
+    current = set(image_paths)
+
+    # 已有图像保持原来的顺序，已删除的图像移出列表
+    splits = {name: [p for p in manifest[name] if p in current] for name in ('train', 'val')}
+    known = set(splits['train']) | set(splits['val'])
+
+    new_paths = sorted(p for p in image_paths if p not in known)
+    new_groups = sorted({group_of(os.path.splitext(os.path.basename(p))[0], group_pattern) for p in new_paths}
+                        - set(groups))
+    for g in new_groups:
+        groups[g] = 'val' if hash_score(g, manifest['seed']) < val_ratio else 'train'
+    # 分组较少时哈希可能把所有分组都分到训练集，保证验证集至少有一个分组
+    if new_groups and len(groups) > 1 and 'val' not in groups.values():
+        groups[min(new_groups, key=lambda g: hash_score(g, manifest['seed']))] = 'val'
+
+    for p in new_paths:
+        splits[groups[group_of(os.path.splitext(os.path.basename(p))[0], group_pattern)]].append(p)
+
+    for name in ('train', 'val'):
+        with open(os.path.join(out_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+            f.writelines(f"{p}\n" for p in splits[name])
+    manifest.update(splits)
+    tmp = os.path.join(out_dir, f"{MANIFEST_NAME}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST_NAME))
+    return splits
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class StaticTracker:
+    """
+    面向近静止标记点的轻量追踪器，可替代 ByteTrack
+
+    每条轨迹有一个锚点(首次出现时的中心，可按 anchor_momentum 缓慢更新)，
+    每帧用KD树找出锚点 max_displacement 范围内的检测，再用匈牙利算法(或贪心)一一分配。
+    没有卡尔曼预测和两阶段关联，因此不会因为预测偏差产生ID切换。
+
+    update() 的输入输出与ultralytics的 BYTETracker 相同，
+    输出每行为 [x1, y1, x2, y2, track_id, score, cls, idx]。
+    """
+
+    def __init__(self, max_displacement=15.0, max_lost=30, new_track_thresh=0.25,
+                 anchor_momentum=0.0, assignment='hungarian'):
+        self.max_displacement = max_displacement
+        self.max_lost = max_lost
+        self.new_track_thresh = new_track_thresh
+        self.anchor_momentum = anchor_momentum
+        self.assignment = assignment
+        self.anchors = np.empty((0, 2), dtype=np.float64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.cls = np.empty(0, dtype=np.float64)
+        self.lost = np.empty(0, dtype=np.int64)
+        self.frame_id = 0
+        self._next_id = 1
+
+    def reset(self):
+        self.__init__(self.max_displacement, self.max_lost, self.new_track_thresh,
+                      self.anchor_momentum, self.assignment)
+
+    def _assign(self, centers, det_cls):
+        """返回 (检测索引, 锚点索引) 的匹配对"""
+        from scipy.optimize import linear_sum_assignment
+        from scipy.spatial import cKDTree
+
+        if len(centers) == 0 or len(self.anchors) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        pairs = cKDTree(centers).sparse_distance_matrix(
+            cKDTree(self.anchors), self.max_displacement, output_type='ndarray')
+        # 不同类别之间不匹配
+        pairs = pairs[det_cls[pairs['i']] == self.cls[pairs['j']]]
+        if len(pairs) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        if self.assignment == 'greedy':
+            order = np.argsort(pairs['v'], kind='stable')
+            used_d, used_a = set(), set()
+            det_idx, anchor_idx = [], []
+            for i, j in zip(pairs['i'][order], pairs['j'][order], strict=True):
+                if i in used_d or j in used_a:
+                    continue
+                used_d.add(i)
+                used_a.add(j)
+                det_idx.append(i)
+                anchor_idx.append(j)
+            return np.asarray(det_idx, dtype=np.int64), np.asarray(anchor_idx, dtype=np.int64)
+
+        # 只在有候选的检测和锚点上构造代价矩阵
+        di, dinv = np.unique(pairs['i'], return_inverse=True)
+        ai, ainv = np.unique(pairs['j'], return_inverse=True)
+        big = self.max_displacement * 1e3
+        cost = np.full((len(di), len(ai)), big)
+        cost[dinv, ainv] = pairs['v']
+        r, c = linear_sum_assignment(cost)
+        ok = cost[r, c] < big
+        return di[r[ok]], ai[c[ok]]
+
+    def update(self, results, img=None, feats=None):
+        """
+        用一帧的检测结果更新轨迹
+
+        参数:
+        results: 具有 xyxy / conf / cls 属性的检测结果(如 Detections)
+
+        返回:
+        (n, 8) 数组 [x1, y1, x2, y2, track_id, score, cls, idx]
+        """
+        self.frame_id += 1
+        xyxy = np.asarray(results.xyxy, dtype=np.float64).reshape(-1, 4)
+        conf = np.asarray(results.conf, dtype=np.float64).reshape(-1)
+        det_cls = np.asarray(results.cls, dtype=np.float64).reshape(-1)
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+
+        det_idx, anchor_idx = self._assign(centers, det_cls)
+        det_ids = np.full(len(xyxy), -1, dtype=np.int64)
+        det_ids[det_idx] = self.ids[anchor_idx]
+
+        # 匹配上的锚点清零丢失计数，并按动量更新锚点位置
+        self.lost += 1
+        self.lost[anchor_idx] = 0
+        if self.anchor_momentum > 0:
+            self.anchors[anchor_idx] = (self.anchor_momentum * centers[det_idx]
+                                        + (1 - self.anchor_momentum) * self.anchors[anchor_idx])
+
+        # 未匹配且置信度足够的检测创建新轨迹
+        new = (det_ids < 0) & (conf >= self.new_track_thresh)
+        n_new = int(new.sum())
+        if n_new:
+            new_ids = np.arange(self._next_id, self._next_id + n_new, dtype=np.int64)
+            self._next_id += n_new
+            det_ids[new] = new_ids
+            self.anchors = np.vstack([self.anchors, centers[new]])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.cls = np.concatenate([self.cls, det_cls[new]])
+            self.lost = np.concatenate([self.lost, np.zeros(n_new, dtype=np.int64)])
+
+        # 删除长时间丢失的轨迹
+        keep = self.lost <= self.max_lost
+        if not keep.all():
+            self.anchors, self.ids = self.anchors[keep], self.ids[keep]
+            self.cls, self.lost = self.cls[keep], self.lost[keep]
+
+        out = det_ids >= 0
+        idx = np.flatnonzero(out)
+        return np.column_stack([xyxy[out], det_ids[out], conf[out], det_cls[out], idx]).astype(np.float64)
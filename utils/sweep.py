@@ -0,0 +1,95 @@
+import csv
+
+import numpy as np
+
+from utils.boxes import match_predictions, nms
+
+
+def sweep_thresholds(raw_dets, gt_boxes, conf_grid, iou_grid, match_iou=0.5):
+    """
+    在 conf x iou 网格上一次性计算检测数、精确率、召回率和F1
+
+    每个NMS阈值只对原始检测做一次NMS和一次真值匹配；贪心NMS与贪心匹配中，
+    一个框的结果只取决于得分更高的框，所以先NMS/匹配再按置信度截断，
+    与先按置信度过滤再NMS/匹配的结果相同，各 conf 的计数可以用排序后的累加向量化得到。
+
+    参数:
+    raw_dets: 每张图像的低阈值原始 Detections 列表
+    gt_boxes: 与 raw_dets 对齐的真值框列表，每项为 (m, 4) xyxy 数组或 (xyxy, cls)
+    conf_grid: 置信度阈值数组
+    iou_grid: NMS的IoU阈值数组
+    match_iou: 判定检测命中的IoU阈值
+
+    返回:
+    字典，包含 conf, iou 网格及形状为 (len(iou_grid), len(conf_grid)) 的
+    detections, tp, fp, fn, precision, recall, f1
+    """
+    conf_grid = np.asarray(conf_grid, dtype=np.float64)
+    iou_grid = np.asarray(iou_grid, dtype=np.float64)
+    n_gt = 0
+    scores = [[] for _ in iou_grid]
+    hits = [[] for _ in iou_grid]
+    for dets, gt in zip(raw_dets, gt_boxes, strict=True):
+        gt_xyxy, gt_cls = gt if isinstance(gt, tuple) else (gt, None)
+        n_gt += len(gt_xyxy)
+        for k, iou in enumerate(iou_grid):
+            keep = nms(dets.xyxy, dets.conf, iou, cls=dets.cls)  # 按置信度降序
+            tp = match_predictions(dets.xyxy[keep], gt_xyxy, match_iou,
+                                   pred_cls=dets.cls[keep] if gt_cls is not None else None, gt_cls=gt_cls)
+            scores[k].append(dets.conf[keep])
+            hits[k].append(tp)
+
+    shape = (len(iou_grid), len(conf_grid))
+    detections = np.zeros(shape, dtype=np.int64)
+    tp = np.zeros(shape, dtype=np.int64)
+    for k in range(len(iou_grid)):
+        conf = np.concatenate(scores[k]) if scores[k] else np.empty(0)
+        hit = np.concatenate(hits[k]) if hits[k] else np.empty(0, dtype=bool)
+        order = np.argsort(conf, kind='stable')
+        conf, hit = conf[order], hit[order]
+        # 置信度 >= c 的检测是排序后数组的后缀
+        first = np.searchsorted(conf, conf_grid, side='left')
+        tp_suffix = np.r_[np.cumsum(hit[::-1])[::-1], 0]
+        detections[k] = len(conf) - first
+        tp[k] = tp_suffix[first]
+
+    fp = detections - tp
+    fn = n_gt - tp
+    precision = np.divide(tp, detections, out=np.zeros(shape), where=detections > 0)
+    recall = tp / n_gt if n_gt else np.zeros(shape)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(shape),
+                   where=(precision + recall) > 0)
+    return {'conf': conf_grid, 'iou': iou_grid, 'gt': n_gt, 'detections': detections, 'tp': tp,
+            'fp': fp, 'fn': fn, 'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def best_operating_point(table, min_recall=0.0):
+    """
+    F1最高的 (conf, iou)；min_recall > 0 时只在召回率达标的组合中选择，
+    F1相同时取置信度更高的组合
+    """
+    f1 = np.where(table['recall'] >= min_recall, table['f1'], -1.0)
+    # 置信度网格升序，反向取argmax使并列时选择更高的置信度
+    flat = f1[:, ::-1].argmax()
+    k, j = np.unravel_index(flat, f1.shape)
+    j = f1.shape[1] - 1 - j
+    if f1[k, j] < 0:
+        return None
+    return {
+        'conf': float(table['conf'][j]), 'iou': float(table['iou'][k]),
+        'precision': float(table['precision'][k, j]), 'recall': float(table['recall'][k, j]),
+        'f1': float(table['f1'][k, j]),
+        'tp': int(table['tp'][k, j]), 'fp': int(table['fp'][k, j]), 'fn': int(table['fn'][k, j]),
+    }
+
+
+def write_sweep_csv(path, table):
+    """把网格结果写成一行一个 (iou, conf) 组合的CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['iou', 'conf', 'detections', 'tp', 'fp', 'fn', 'precision', 'recall', 'f1'])
+        for k, iou in enumerate(table['iou']):
+            for j, conf in enumerate(table['conf']):
+                writer.writerow([f"{iou:.3f}", f"{conf:.4f}", table['detections'][k, j], table['tp'][k, j],
+                                 table['fp'][k, j], table['fn'][k, j], f"{table['precision'][k, j]:.4f}",
+                                 f"{table['recall'][k, j]:.4f}", f"{table['f1'][k, j]:.4f}"])
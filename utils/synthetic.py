@@ -0,0 +1,169 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from utils.video import IMAGE_EXTS
+
+
+def render_markers(shape, centers, sigma=3.0, amplitude=200, background=30, noise=2.0, rng=None):
+    """
+    渲染亚像素位置的高斯标记点
+
+    参数:
+    shape: 图像尺寸 (h, w)
+    centers: (n, 2) 标记点中心 (x, y)，可以是小数
+    sigma: 高斯半径(像素)
+    amplitude: 标记点峰值亮度
+    background: 背景灰度
+    noise: 高斯噪声标准差
+    rng: numpy 随机数发生器
+
+    返回:
+    BGR uint8 图像
+    """
+    h, w = shape
+    img = np.full((h, w), float(background))
+    r = int(np.ceil(4 * sigma))
+    for cx, cy in np.asarray(centers, dtype=np.float64).reshape(-1, 2):
+        x0, x1 = max(int(cx) - r, 0), min(int(cx) + r + 2, w)
+        y0, y1 = max(int(cy) - r, 0), min(int(cy) + r + 2, h)
+        yy, xx = np.mgrid[y0:y1, x0:x1]
+        img[y0:y1, x0:x1] += amplitude * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * sigma ** 2))
+    if noise and rng is not None:
+        img += rng.normal(0, noise, img.shape)
+    gray = np.clip(np.round(img), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def marker_trajectories(frames, markers=6, shape=(480, 640), amplitude=3.0, period=50.0, seed=0):
+    """
+    生成已知亚像素位移的标记点轨迹: 标记点排成网格，各自以不同相位做正弦振动
+
+    返回:
+    (frames, markers, 2) 的中心坐标数组
+    """
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    cols = int(np.ceil(np.sqrt(markers * w / h)))
+    rows = int(np.ceil(markers / cols))
+    gx, gy = np.meshgrid((np.arange(cols) + 0.5) * w / cols, (np.arange(rows) + 0.5) * h / rows)
+    base = np.column_stack([gx.ravel(), gy.ravel()])[:markers] + rng.uniform(-0.5, 0.5, (markers, 2))
+    phase = rng.uniform(0, 2 * np.pi, markers)
+    t = np.arange(frames)[:, None]
+    dx = amplitude * np.sin(2 * np.pi * t / period + phase)
+    dy = 0.5 * amplitude * np.cos(2 * np.pi * t / period + phase)
+    return base[None] + np.stack([dx, dy], axis=2)
+
+
+def write_marker_video(path, centers, shape=(480, 640), fps=30.0, sigma=3.0, seed=0):
+    """
+    把标记点轨迹渲染成视频(.mp4/.avi)或无损PNG图像序列(其他路径视为目录)
+
+    有损视频编码会引入误差，位移精度测试应使用PNG序列。
+    """
+    rng = np.random.default_rng(seed)
+    if path.lower().endswith(('.mp4', '.avi')):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fourcc = cv2.VideoWriter_fourcc(*('mp4v' if path.lower().endswith('.mp4') else 'MJPG'))
+        writer = cv2.VideoWriter(path, fourcc, fps, (shape[1], shape[0]))
+        try:
+            for c in centers:
+                writer.write(render_markers(shape, c, sigma=sigma, rng=rng))
+        finally:
+            writer.release()
+    else:
+        os.makedirs(path, exist_ok=True)
+        for i, c in enumerate(centers):
+            cv2.imwrite(os.path.join(path, f"{i:06d}.png"), render_markers(shape, c, sigma=sigma, rng=rng))
+    return path
+
+
+def boxes_from_centers(centers, box_size=16):
+    """以整像素取整后的中心生成检测框，模拟只有整像素精度的检测器"""
+    c = np.round(np.asarray(centers, dtype=np.float64).reshape(-1, 2))
+    half = box_size / 2
+    return np.hstack([c - half, c + half])
+
+
+def tracks_from_centers(centers, box_size=16):
+    """
+    把 (frames, markers, 2) 的真值轨迹转换为 read_tracks 格式的轨迹表，
+    框中心取整到像素，轨迹ID为标记点序号+1
+    """
+    frames, markers = centers.shape[:2]
+    xyxy = boxes_from_centers(centers.reshape(-1, 2), box_size)
+    return {
+        'frame': np.repeat(np.arange(frames), markers),
+        'track_id': np.tile(np.arange(1, markers + 1), frames),
+        'cls': np.zeros(frames * markers),
+        'conf': np.ones(frames * markers),
+        'x1': xyxy[:, 0], 'y1': xyxy[:, 1], 'x2': xyxy[:, 2], 'y2': xyxy[:, 3],
+        'held': np.zeros(frames * markers, dtype=bool),
+    }
+
+
+def make_yolo_dataset(out_dir, images=100, markers=6, shape=(480, 640), box_size=16, videos=4, seed=0):
+    """
+    生成YOLO格式的合成数据集: out_dir/images/*.png 与 out_dir/labels/*.txt
+
+    文件名模仿视频抽帧的命名(如 GX010001_00012)，每 images/videos 张来自同一个"视频"
+    """
+    names = _write_images(os.path.join(out_dir, 'images'), images, markers, shape, videos, seed)
+    labels_dir = os.path.join(out_dir, 'labels')
+    os.makedirs(labels_dir, exist_ok=True)
+    h, w = shape
+    for name, centers in names:
+        with open(os.path.join(labels_dir, f"{name}.txt"), 'w') as f:
+            for cx, cy in centers:
+                f.write(f"0 {cx / w:.6f} {cy / h:.6f} {box_size / w:.6f} {box_size / h:.6f}\n")
+    return out_dir
+
+
+def make_labelme_dataset(out_dir, images=100, markers=6, shape=(480, 640), box_size=16, videos=4, seed=0):
+    """
+    生成LabelMe格式的合成数据集: out_dir/images/*.png 与 out_dir/json/*.json(矩形标注)
+    """
+    names = _write_images(os.path.join(out_dir, 'images'), images, markers, shape, videos, seed)
+    json_dir = os.path.join(out_dir, 'json')
+    os.makedirs(json_dir, exist_ok=True)
+    half = box_size / 2
+    for name, centers in names:
+        data = {
+            'version': '5.0.1',
+            'flags': {},
+            'shapes': [
+                {'label': 'track_point', 'points': [[cx - half, cy - half], [cx + half, cy + half]],
+                 'group_id': None, 'shape_type': 'rectangle', 'flags': {}}
+                for cx, cy in centers
+            ],
+            'imagePath': f"../images/{name}.png",
+            'imageData': None,
+            'imageHeight': shape[0],
+            'imageWidth': shape[1],
+        }
+        with open(os.path.join(json_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    return out_dir
+
+
+def _write_images(images_dir, images, markers, shape, videos, seed):
+    """渲染数据集图像，返回 [(文件名, 标记点中心)]"""
+    os.makedirs(images_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    per_video = max(1, int(np.ceil(images / videos)))
+    centers = marker_trajectories(images, markers, shape, seed=seed)
+    names = []
+    for i in range(images):
+        name = f"GX01{i // per_video:04d}_{i % per_video:05d}"
+        cv2.imwrite(os.path.join(images_dir, f"{name}.png"), render_markers(shape, centers[i], rng=rng))
+        names.append((name, centers[i]))
+    return names
+
+
+def is_dataset_complete(path, count):
+    """合成数据(图像序列目录或视频文件)是否已经存在，用于跳过重复生成"""
+    if os.path.isdir(path):
+        return sum(f.lower().endswith(IMAGE_EXTS) for f in os.listdir(path)) >= count
+    return os.path.exists(path)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from utils.boxes import nms
+from utils.detection import Detections, FrameDetector
+
+
+def tile_grid(frame_shape, tile_size=640, overlap=0.2):
+    """
+    生成覆盖整帧、相互重叠的切片窗口
+
+    参数:
+    frame_shape: 图像的 shape (h, w, ...)
+    tile_size: 切片边长(像素)
+    overlap: 相邻切片的重叠比例
+
+    返回:
+    (k, 4) 整数窗口 [x1, y1, x2, y2]
+    """
+    h, w = frame_shape[:2]
+    step = max(1, int(tile_size * (1 - overlap)))
+
+    def _starts(length):
+        if length <= tile_size:
+            return np.array([0])
+        starts = np.arange(0, length - tile_size, step)
+        # 最后一个切片贴齐图像边缘
+        return np.unique(np.r_[starts, length - tile_size])
+
+    xs, ys = np.meshgrid(_starts(w), _starts(h))
+    x1, y1 = xs.ravel(), ys.ravel()
+    return np.column_stack([x1, y1, np.minimum(x1 + tile_size, w), np.minimum(y1 + tile_size, h)])
+
+
+class TiledDetector(FrameDetector):
+    """
+    切片检测器: 把整帧切成相互重叠的切片，所有切片在一次前向中批量推理，
+    再把框映射回整帧坐标，用向量化NMS合并切片之间的重复框。
+    小目标不必随整帧一起缩小到 imgsz，因此召回更高。
+    """
+
+    def __init__(self, model, predict_args, tile_size=640, overlap=0.2):
+        super().__init__(model, predict_args)
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tiles = 0
+
+    def __call__(self, frame, prev_rows=None):
+        self.frame_pixels += frame.shape[0] * frame.shape[1]
+        windows = tile_grid(frame.shape, self.tile_size, self.overlap)
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+        args = dict(self.predict_args, imgsz=self.tile_size)
+        results = self.model.predict(crops, verbose=False, **args)
+        if self.profiler is not None:
+            self.profiler.record_speed(results)
+
+        dets = [Detections.from_result(r) for r in results]
+        offsets = np.repeat(windows[:, [0, 1, 0, 1]], [len(d) for d in dets], axis=0)
+        merged = Detections(
+            np.vstack([d.xyxy for d in dets]) + offsets,
+            np.concatenate([d.conf for d in dets]),
+            np.concatenate([d.cls for d in dets]),
+        )
+        self.tiles += len(windows)
+        self.pixels += int(((windows[:, 2] - windows[:, 0]) * (windows[:, 3] - windows[:, 1])).sum())
+        keep = nms(merged.xyxy, merged.conf, self.predict_args.get('iou', 0.5), cls=merged.cls)
+        return merged[keep]
+
+    def summary(self):
+        stats = super().summary()
+        stats['tiles'] = self.tiles
+        return stats
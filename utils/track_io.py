@@ -0,0 +1,228 @@
+import glob
+import os
+
+import numpy as np
+
+# 轨迹表的列顺序（按列分块存储）
+# held 表示该帧跳过了检测，框沿用上一帧的结果
+TRACK_COLUMNS = ('frame', 'track_id', 'cls', 'conf', 'x1', 'y1', 'x2', 'y2', 'held')
+
+
+def results_to_rows(result):
+    """
+    将ultralytics的单帧Results转换为 (n, 7) 数组
+
+    参数:
+    result: model.track / model.predict 产生的单帧结果
+
+    返回:
+    每行为 [track_id, cls, conf, x1, y1, x2, y2]，没有跟踪ID时 track_id 为 -1
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 7), dtype=np.float64)
+
+    n = len(boxes)
+    ids = boxes.id.cpu().numpy() if boxes.id is not None else np.full(n, -1.0)
+    return np.column_stack([
+        ids,
+        boxes.cls.cpu().numpy(),
+        boxes.conf.cpu().numpy(),
+        boxes.xyxy.cpu().numpy(),
+    ]).astype(np.float64)
+
+
+def truncate_chunks(out_dir, keep_chunks=0):
+    """删除编号不小于 keep_chunks 的块文件(以及未完成的临时文件)"""
+    removed = 0
+    for chunk_file in glob.glob(os.path.join(out_dir, "chunk_*.npz*")):
+        index = int(os.path.basename(chunk_file)[len('chunk_'):].split('.')[0])
+        if index >= keep_chunks or chunk_file.endswith('.tmp'):
+            os.remove(chunk_file)
+            removed += 1
+    return removed
+
+
+class TrackWriter:
+    """
+    逐帧追加轨迹并按列分块写入磁盘
+
+    每累计 chunk_size 行写出一个 chunk_XXXXXX.npz 文件，
+    内存中最多只保留一个块的数据，因此峰值内存与视频长度无关。
+    目录中编号不小于 start_chunk 的旧块会被删除，从检查点恢复时传入已写出的块数即可续写。
+    """
+
+    def __init__(self, out_dir, chunk_size=10000, start_chunk=0, start_rows=0):
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.chunks_written = start_chunk
+        self.rows_written = start_rows
+        self._buffer = []
+        self._buffered_rows = 0
+        os.makedirs(out_dir, exist_ok=True)
+        truncate_chunks(out_dir, start_chunk)
+
+    def write(self, frame_idx, rows, held=False):
+        """
+        追加一帧的轨迹，rows 为 (n, 7) 数组
+
+        frame_idx 和 held 也可以是逐行的数组，held 为真表示该帧沿用了上一帧的框
+        """
+        if len(rows) == 0:
+            return
+        n = len(rows)
+        frame_col = np.broadcast_to(np.asarray(frame_idx, dtype=np.float64).reshape(-1, 1), (n, 1))
+        held_col = np.broadcast_to(np.asarray(held, dtype=np.float64).reshape(-1, 1), (n, 1))
+        self._buffer.append(np.hstack([frame_col, rows, held_col]))
+        self._buffered_rows += len(rows)
+        if self._buffered_rows >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """将缓冲区写成一个新的块文件"""
+        if not self._buffer:
+            return
+        data = np.vstack(self._buffer)
+        columns = {
+            'frame': data[:, 0].astype(np.int64),
+            'track_id': data[:, 1].astype(np.int64),
+            'cls': data[:, 2].astype(np.int32),
+            'conf': data[:, 3].astype(np.float32),
+            'x1': data[:, 4],
+            'y1': data[:, 5],
+            'x2': data[:, 6],
+            'y2': data[:, 7],
+            'held': data[:, 8].astype(bool),
+        }
+        chunk_path = os.path.join(self.out_dir, f"chunk_{self.chunks_written:06d}.npz")
+        # 先写临时文件再改名，避免中断时留下损坏的块
+        tmp_path = chunk_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, chunk_path)
+        self.chunks_written += 1
+        self.rows_written += len(data)
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_tracks(out_dir, columns=TRACK_COLUMNS):
+    """
+    读取 TrackWriter 写出的全部块并按列拼接
+
+    参数:
+    out_dir: 块文件所在目录
+    columns: 需要读取的列
+
+    返回:
+    列名到一维数组的字典
+    """
+    chunk_files = sorted(glob.glob(os.path.join(out_dir, "chunk_*.npz")))
+    parts = {col: [] for col in columns}
+    for chunk_file in chunk_files:
+        with np.load(chunk_file) as data:
+            for col in columns:
+                if col == 'held' and col not in data:
+                    # 早期的块文件没有 held 列
+                    parts[col].append(np.zeros(len(data['frame']), dtype=bool))
+                else:
+                    parts[col].append(data[col])
+
+    empty = {'frame': np.int64, 'track_id': np.int64, 'cls': np.int32, 'conf': np.float32, 'held': bool}
+    return {
+        col: np.concatenate(parts[col]) if parts[col] else np.empty(0, dtype=empty.get(col, np.float64))
+        for col in columns
+    }
+
+
+def track_drift(reference, candidate, max_distance=20.0):
+    """
+    比较两份轨迹表中同一帧内目标中心的偏差(漂移)
+
+    两次运行的track_id不一定一致，因此按帧内最近中心匹配。
+    把帧号乘以一个大偏移量作为第三维坐标，用一棵KD树一次性完成全部帧的匹配。
+
+    参数:
+    reference: 参考轨迹表(如逐帧完整检测的结果)，read_tracks 的返回值
+    candidate: 待评估轨迹表
+    max_distance: 最大匹配距离(像素)
+
+    返回:
+    包含匹配数、未匹配数以及平均/p95/最大漂移的字典
+    """
+    from scipy.spatial import cKDTree
+
+    def _points(tracks):
+        cx = (tracks['x1'] + tracks['x2']) / 2
+        cy = (tracks['y1'] + tracks['y2']) / 2
+        # 帧间距离远大于 max_distance，保证只在同一帧内匹配
+        return np.column_stack([tracks['frame'] * (max_distance * 10 + 1e4), cx, cy])
+
+    ref_pts = _points(reference)
+    cand_pts = _points(candidate)
+    if len(ref_pts) == 0 or len(cand_pts) == 0:
+        return {'matched': 0, 'unmatched': int(len(cand_pts)),
+                'mean_px': float('nan'), 'p95_px': float('nan'), 'max_px': float('nan')}
+
+    dist, _ = cKDTree(ref_pts).query(cand_pts, distance_upper_bound=max_distance)
+    matched = np.isfinite(dist)
+    d = dist[matched]
+    return {
+        'matched': int(matched.sum()),
+        'unmatched': int((~matched).sum()),
+        'mean_px': float(d.mean()) if len(d) else float('nan'),
+        'p95_px': float(np.percentile(d, 95)) if len(d) else float('nan'),
+        'max_px': float(d.max()) if len(d) else float('nan'),
+    }
+
+
+def write_tracks(out_dir, tracks, chunk_size=10000):
+    """把完整的轨迹列字典按帧顺序重新写成分块文件"""
+    order = np.argsort(tracks['frame'], kind='stable')
+    data = np.column_stack([tracks[col][order] for col in TRACK_COLUMNS]).astype(np.float64)
+    with TrackWriter(out_dir, chunk_size=chunk_size) as writer:
+        for start in range(0, len(data), chunk_size):
+            block = data[start:start + chunk_size]
+            writer.write(block[:, 0], block[:, 1:8], held=block[:, 8])
+    return writer.rows_written
+
+
+def id_switch_stats(tracks, jump_threshold=10.0):
+    """
+    统计轨迹表中的ID切换迹象(适用于近静止目标)
+
+    - new_ids: 第一帧之后新出现的ID数，静止目标理想情况下为0
+    - jumps: 同一ID相邻两次出现之间中心位移超过 jump_threshold 的次数(位移尖峰)
+
+    参数:
+    tracks: read_tracks 的返回值
+    jump_threshold: 判定位移尖峰的阈值(像素)
+    """
+    valid = tracks['track_id'] >= 0
+    frame = tracks['frame'][valid]
+    tid = tracks['track_id'][valid]
+    if len(tid) == 0:
+        return {'ids': 0, 'new_ids': 0, 'jumps': 0}
+
+    cx = ((tracks['x1'] + tracks['x2']) / 2)[valid]
+    cy = ((tracks['y1'] + tracks['y2']) / 2)[valid]
+    order = np.lexsort((frame, tid))
+    tid, frame, cx, cy = tid[order], frame[order], cx[order], cy[order]
+
+    same = tid[1:] == tid[:-1]
+    step = np.hypot(np.diff(cx), np.diff(cy))
+    first_seen = frame[np.r_[True, ~same]]
+    return {
+        'ids': int(len(first_seen)),
+        'new_ids': int((first_seen > frame.min()).sum()),
+        'jumps': int((same & (step > jump_threshold)).sum()),
+    }
@@ -0,0 +1,380 @@
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from utils.label_store import LabelStore
+from utils.profiler import peak_rss_mb
+
+META_NAME = "meta.json"
+
+
+def _stat(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def img2label_path(path):
+    """与 ultralytics 相同的约定: 路径中最后一个 /images/ 换成 /labels/，扩展名换成 .txt"""
+    sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    path = os.path.normpath(path)
+    if sa in path:
+        head, tail = path.rsplit(sa, 1)
+        path = f"{head}{sb}{tail}"
+    elif path.startswith(f"images{os.sep}"):
+        path = f"labels{os.sep}{path[len('images') + 1:]}"
+    return os.path.splitext(path)[0] + ".txt"
+
+
+def read_image_list(source):
+    """读取 ultralytics 数据集中的 train/val 项: .txt 文件列表(./ 开头的路径相对于该文件)或图像目录"""
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, f) for f in os.listdir(source)
+                      if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')))
+    parent = os.path.dirname(source)
+    with open(source, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return [os.path.join(parent, p[2:]) if p.startswith('./') else p for p in lines]
+
+
+def dataset_split_files(data_yaml):
+    """
+    读取 ultralytics 数据集配置，返回 {'train': [...], 'val': [...]} 图像路径列表
+    (train/val 相对于 path，path 为空时相对于配置文件所在目录)
+    """
+    import yaml
+
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    root = data.get('path') or os.path.dirname(data_yaml)
+    if not os.path.isabs(root) and not os.path.exists(root):
+        root = os.path.join(os.path.dirname(data_yaml), root)
+    splits = {}
+    for name in ('train', 'val'):
+        source = data.get(name)
+        if source:
+            splits[name] = read_image_list(source if os.path.isabs(source) else os.path.join(root, source))
+    return splits
+
+
+def resize_long_side(img, imgsz):
+    """按长边缩放到 imgsz，与 ultralytics BaseDataset.load_image(rect_mode=True) 的结果一致"""
+    h0, w0 = img.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_LINEAR)
+    return img
+
+
+def build_shard(path, files, imgsz):
+    """
+    解码一组图像，缩放后放入 (k, imgsz, imgsz, 3) uint8 内存映射数组的左上角(在工作进程中运行)
+
+    返回:
+    ((k, 4) int32 数组 [原高, 原宽, 缩放后高, 缩放后宽], 解码耗时秒)
+    """
+    tmp = path.replace('.npy', f'.{os.getpid()}.tmp.npy')
+    shard = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.uint8, shape=(len(files), imgsz, imgsz, 3))
+    shapes = np.zeros((len(files), 4), dtype=np.int32)
+    decode = 0.0
+    for i, f in enumerate(files):
+        t0 = time.perf_counter()
+        img = cv2.imread(f, cv2.IMREAD_COLOR)
+        decode += time.perf_counter() - t0
+        if img is None:
+            raise OSError(f"无法读取图像: {f}")
+        h0, w0 = img.shape[:2]
+        img = resize_long_side(img, imgsz)
+        h, w = img.shape[:2]
+        shard[i, :h, :w] = img
+        shapes[i] = (h0, w0, h, w)
+    shard.flush()
+    del shard
+    os.replace(tmp, path)
+    return shapes, decode
+
+
+class TrainCache:
+    """
+    预处理后的训练图像缓存(一个划分一个目录)
+
+    每张图像只解码、缩放一次，按 shard_size 张一组存为 shard_NNNN.npy 内存映射数组，
+    标签以 LabelStore 相同的 (n, 5) cls, cx, cy, w, h 数组和 offsets 存在旁边。
+    meta.json 记录图像列表、每个文件的 mtime_ns:size 与 imgsz: 某个分片对应的文件、
+    文件内容或 imgsz 变化时只重建该分片，所以划分清单只追加新帧时已有的分片全部沿用。标签每次 prepare 时从 LabelStore 重新写出。
+    """
+
+    def __init__(self, cache_dir, files, imgsz, shard_size, shapes, labels, offsets, file_stats=None):
+        self.cache_dir = cache_dir
+        self.files = list(files)
+        self.file_stats = file_stats
+        self.imgsz = imgsz
+        self.shard_size = shard_size
+        self.shapes = shapes
+        self.label_data = labels
+        self.offsets = offsets
+        self._shards = {}
+
+    @staticmethod
+    def shard_path(cache_dir, k):
+        return os.path.join(cache_dir, f"shard_{k:04d}.npy")
+
+    @classmethod
+    def load(cls, cache_dir):
+        """加载已准备好的缓存，不存在或不完整时返回 None"""
+        meta_path = os.path.join(cache_dir, META_NAME)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            shapes = np.load(os.path.join(cache_dir, 'shapes.npy'))
+            labels = np.load(os.path.join(cache_dir, 'labels.npy'))
+            offsets = np.load(os.path.join(cache_dir, 'offsets.npy'))
+        except (OSError, ValueError):
+            return None
+        if len(shapes) != len(meta['files']) or len(offsets) != len(meta['files']) + 1:
+            return None
+        if 'stats' in meta and len(meta['stats']) != len(meta['files']):
+            return None
+        return cls(cache_dir, meta['files'], meta['imgsz'], meta['shard_size'], shapes, labels, offsets,
+                   meta.get('stats'))
+
+    @classmethod
+    def prepare(cls, files, cache_dir, imgsz, shard_size=256, workers=None):
+        """
+        为图像列表准备缓存，只重建文件列表、文件内容(mtime_ns:size)或 imgsz 发生变化的分片
+
+        参数:
+        files: 图像路径列表(顺序即数据集索引)
+        cache_dir: 缓存目录
+        imgsz: 训练尺寸(长边)
+        shard_size: 每个分片的图像数
+        workers: 进程数，None表示CPU核数，1表示串行
+
+        返回:
+        (TrainCache, 统计字典: images, shards, built, reused, seconds, decode_ms, size_mb)
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        start = time.perf_counter()
+        old = cls.load(cache_dir)
+        # 旧版本的 meta.json 没有记录文件状态，无法判断图像是否被改写，全部重建
+        if old is not None and (old.imgsz != imgsz or old.shard_size != shard_size or old.file_stats is None):
+            old = None
+        file_stats = [_stat(f) for f in files]
+
+        n_shards = -(-len(files) // shard_size)
+        shapes = np.zeros((len(files), 4), dtype=np.int32)
+        todo = []
+        for k in range(n_shards):
+            part = slice(k * shard_size, min((k + 1) * shard_size, len(files)))
+            chunk = files[part]
+            if (old is not None and old.files[part] == chunk and old.file_stats[part] == file_stats[part]
+                    and os.path.exists(cls.shard_path(cache_dir, k))):
+                shapes[part] = old.shapes[part]
+            else:
+                todo.append((k, chunk))
+
+        # 先删除 meta.json，构建中断时不会留下看似有效的缓存
+        if todo and os.path.exists(os.path.join(cache_dir, META_NAME)):
+            os.remove(os.path.join(cache_dir, META_NAME))
+        args = [(cls.shard_path(cache_dir, k), chunk, imgsz) for k, chunk in todo]
+        if workers == 1 or len(args) <= 1:
+            results = [build_shard(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(build_shard, *zip(*args, strict=True)))
+        decode = 0.0
+        for (k, chunk), (chunk_shapes, seconds) in zip(todo, results, strict=True):
+            shapes[k * shard_size:k * shard_size + len(chunk)] = chunk_shapes
+            decode += seconds
+        for f in os.listdir(cache_dir):
+            if f.startswith('shard_') and f.endswith('.npy') and f[6:10].isdigit() and int(f[6:10]) >= n_shards:
+                os.remove(os.path.join(cache_dir, f))
+
+        labels, offsets = cls._collect_labels(files)
+        for name, arr in [('shapes', shapes), ('labels', labels), ('offsets', offsets)]:
+            tmp = os.path.join(cache_dir, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(cache_dir, f"{name}.npy"))
+        tmp = os.path.join(cache_dir, f"{META_NAME}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'imgsz': imgsz, 'shard_size': shard_size, 'files': list(files), 'stats': file_stats}, f)
+        os.replace(tmp, os.path.join(cache_dir, META_NAME))
+
+        built = sum(len(chunk) for _, chunk in todo)
+        size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+        stats = {'images': len(files), 'shards': n_shards, 'built': built, 'reused': len(files) - built,
+                 'seconds': time.perf_counter() - start,
+                 'decode_ms': decode / built * 1000 if built else float('nan'), 'size_mb': size / 1024 / 1024}
+        return cls(cache_dir, files, imgsz, shard_size, shapes, labels, offsets, file_stats), stats
+
+    @staticmethod
+    def _collect_labels(files):
+        """按图像顺序收集标签，标签目录用 LabelStore 加载；没有标签文件的图像没有框"""
+        stores = {}
+        boxes = []
+        counts = np.zeros(len(files), dtype=np.int64)
+        for i, f in enumerate(files):
+            label_path = img2label_path(f)
+            labels_dir, name = os.path.dirname(label_path), os.path.basename(label_path)[:-4]
+            if labels_dir not in stores:
+                stores[labels_dir] = LabelStore.load(labels_dir) if os.path.isdir(labels_dir) else None
+            store = stores[labels_dir]
+            if store is not None and name in store:
+                b = np.asarray(store.boxes(name), dtype=np.float32)
+                boxes.append(b)
+                counts[i] = len(b)
+        data = np.concatenate(boxes) if boxes else np.zeros((0, 5), dtype=np.float32)
+        return data, np.r_[0, np.cumsum(counts)]
+
+    def __len__(self):
+        return len(self.files)
+
+    def _shard(self, k):
+        if k not in self._shards:
+            self._shards[k] = np.load(self.shard_path(self.cache_dir, k), mmap_mode='r')
+        return self._shards[k]
+
+    def image(self, i):
+        """
+        第 i 张缩放后的图像(可写的副本)，返回值与 ultralytics load_image 相同:
+        (图像, (原高, 原宽), (缩放后高, 缩放后宽))
+        """
+        h0, w0, h, w = self.shapes[i].tolist()
+        k, j = divmod(i, self.shard_size)
+        return np.array(self._shard(k)[j, :h, :w]), (h0, w0), (h, w)
+
+    def labels(self, i):
+        """第 i 张图像的 (k, 5) 标签: cls, cx, cy, w, h(归一化)"""
+        return self.label_data[self.offsets[i]:self.offsets[i + 1]]
+
+
+def measure_read(cache, count=32):
+    """比较直接解码原图与读取缓存分片的单张耗时(毫秒)，返回 (decode_ms, cache_ms)"""
+    idx = np.linspace(0, len(cache) - 1, min(count, len(cache))).astype(int)
+    t0 = time.perf_counter()
+    for i in idx:
+        resize_long_side(cv2.imread(cache.files[i], cv2.IMREAD_COLOR), cache.imgsz)
+    t1 = time.perf_counter()
+    for i in idx:
+        cache.image(i)
+    t2 = time.perf_counter()
+    return (t1 - t0) / len(idx) * 1000, (t2 - t1) / len(idx) * 1000
+
+
+def cached_dataset_class():
+    """返回从 TrainCache 读取图像和标签的 ultralytics YOLODataset 子类(延迟导入 ultralytics)"""
+    from ultralytics.data.dataset import YOLODataset
+
+    class CachedYOLODataset(YOLODataset):
+        def __init__(self, *args, train_cache=None, **kwargs):
+            self.train_cache = train_cache
+            super().__init__(*args, **kwargs)
+
+        def get_img_files(self, img_path):
+            return list(self.train_cache.files)
+
+        def get_labels(self):
+            labels = []
+            for i, f in enumerate(self.train_cache.files):
+                b = np.asarray(self.train_cache.labels(i), dtype=np.float32)
+                h0, w0 = self.train_cache.shapes[i, :2].tolist()
+                labels.append({'im_file': f, 'shape': (h0, w0), 'cls': b[:, :1], 'bboxes': b[:, 1:],
+                               'segments': [], 'keypoints': None, 'normalized': True, 'bbox_format': 'xywh'})
+            return labels
+
+        def load_image(self, i, rect_mode=True):
+            if self.ims[i] is not None:
+                return self.ims[i], self.im_hw0[i], self.im_hw[i]
+            im, (h0, w0), _ = self.train_cache.image(i)
+            if not rect_mode and not (im.shape[0] == im.shape[1] == self.imgsz):
+                im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+            # 与 BaseDataset.load_image 相同的缓冲区维护: Mosaic / MixUp 从 self.buffer 中抽取其余图像
+            if self.augment:
+                self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+                self.buffer.append(i)
+                if 1 < len(self.buffer) >= self.max_buffer_length:
+                    j = self.buffer.pop(0)
+                    if self.cache != 'ram':
+                        self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+            return im, (h0, w0), im.shape[:2]
+
+    return CachedYOLODataset
+
+
+def cached_trainer_class(cache_dir):
+    """
+    返回 build_dataset 改为读取 cache_dir/train、cache_dir/val 的 DetectionTrainer 子类，
+    用法: model.train(trainer=cached_trainer_class(cache_dir), ...)；某个划分没有缓存时使用原来的数据集
+    """
+    from ultralytics.models.yolo.detect import DetectionTrainer
+    from ultralytics.utils import colorstr
+    from ultralytics.utils.torch_utils import de_parallel
+
+    dataset_class = cached_dataset_class()
+
+    class CachedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode='train', batch=None):
+            cache = TrainCache.load(os.path.join(cache_dir, 'train' if mode == 'train' else 'val'))
+            if cache is None:
+                return super().build_dataset(img_path, mode, batch)
+            gs = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+            cfg = self.args
+            return dataset_class(
+                train_cache=cache, img_path=img_path, imgsz=cfg.imgsz, batch_size=batch,
+                augment=mode == 'train', hyp=cfg, rect=cfg.rect or mode == 'val', cache=None,
+                single_cls=cfg.single_cls or False, stride=gs, pad=0.0 if mode == 'train' else 0.5,
+                prefix=colorstr(f"{mode}: "), task=cfg.task, classes=cfg.classes, data=self.data, fraction=1.0,
+            )
+
+    return CachedDetectionTrainer
+
+
+class EpochMonitor:
+    """
+    记录每个epoch的墙钟时间和内存(作为 ultralytics 回调)，训练结束后写出 epoch_stats.csv，
+    用于比较使用与不使用训练缓存时的epoch耗时和常驻内存
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._start = None
+
+    def on_train_epoch_start(self, trainer):
+        self._start = time.perf_counter()
+
+    def on_fit_epoch_end(self, trainer):
+        if self._start is None:
+            return
+        rss = float('nan')
+        try:
+            import psutil
+            rss = psutil.Process().memory_info().rss / 1024 / 1024
+        except ImportError:
+            pass
+        self.rows.append({'epoch': len(self.rows) + 1, 'seconds': time.perf_counter() - self._start,
+                          'rss_mb': rss, 'peak_rss_mb': peak_rss_mb()})
+
+    def attach(self, model):
+        model.add_callback('on_train_epoch_start', self.on_train_epoch_start)
+        model.add_callback('on_fit_epoch_end', self.on_fit_epoch_end)
+
+    def summary(self):
+        if not self.rows:
+            return None
+        seconds = np.array([r['seconds'] for r in self.rows])
+        return {'epochs': len(self.rows), 'mean_epoch_s': float(seconds.mean()),
+                'median_epoch_s': float(np.median(seconds)), 'peak_rss_mb': self.rows[-1]['peak_rss_mb']}
+
+    def save(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['epoch', 'seconds', 'rss_mb', 'peak_rss_mb'])
+            writer.writeheader()
+            writer.writerows(self.rows)
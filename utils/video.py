@@ -0,0 +1,129 @@
+import glob
+import os
+
+import cv2
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def list_images(source):
+    """按文件名排序返回目录中的图像路径"""
+    return sorted(
+        f for f in glob.glob(os.path.join(source, "*"))
+        if f.lower().endswith(IMAGE_EXTS)
+    )
+
+
+def video_info(source):
+    """
+    获取视频或图像目录的基本信息
+
+    参数:
+    source: 视频文件、图像文件或图像目录
+
+    返回:
+    包含 fps, frame_count, width, height 的字典
+    """
+    if os.path.isdir(source) or source.lower().endswith(IMAGE_EXTS):
+        images = list_images(source) if os.path.isdir(source) else [source]
+        height, width = (0, 0)
+        if images:
+            img = cv2.imread(images[0])
+            if img is not None:
+                height, width = img.shape[:2]
+        return {'fps': 30.0, 'frame_count': len(images), 'width': width, 'height': height}
+
+    cap = cv2.VideoCapture(source)
+    try:
+        return {
+            'fps': cap.get(cv2.CAP_PROP_FPS) or 30.0,
+            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        }
+    finally:
+        cap.release()
+
+
+def iter_frames(source, start=0, stop=None):
+    """
+    逐帧读取视频或图像目录的生成器
+
+    参数:
+    source: 视频文件、图像文件或图像目录
+    start: 起始帧号
+    stop: 结束帧号(不含)，None表示读到末尾
+
+    返回:
+    (帧号, BGR图像) 元组的生成器
+    """
+    if os.path.isdir(source) or source.lower().endswith(IMAGE_EXTS):
+        images = list_images(source) if os.path.isdir(source) else [source]
+        for frame_idx, img_path in enumerate(images[start:stop], start=start):
+            frame = cv2.imread(img_path)
+            if frame is None:
+                print(f"无法读取图像: {img_path}")
+                continue
+            yield frame_idx, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        frame_idx = start
+        while stop is None or frame_idx < stop:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            yield frame_idx, frame
+            frame_idx += 1
+    finally:
+        cap.release()
+
+
+def draw_rows(frame, rows, class_names=None):
+    """
+    在帧上(原地)画出轨迹行 [track_id, cls, conf, x1, y1, x2, y2]，track_id < 0 的检测框不标ID
+
+    返回:
+    画好的帧
+    """
+    class_names = class_names or {}
+    for track_id, cls_id, conf, x1, y1, x2, y2 in rows:
+        p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+        cv2.rectangle(frame, p1, p2, (0, 255, 0), 2)
+        name = class_names.get(int(cls_id), str(int(cls_id)))
+        label = f"{name} {conf:.2f}" if track_id < 0 else f"{int(track_id)} {name} {conf:.2f}"
+        cv2.putText(frame, label, (p1[0], p1[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    return frame
+
+
+class AnnotatedVideoWriter:
+    """
+    把轨迹框和ID画到帧上并写出为视频，首帧到达时才创建 cv2.VideoWriter
+    """
+
+    def __init__(self, path, fps=30.0, class_names=None):
+        self.path = path
+        self.fps = fps
+        self.class_names = class_names or {}
+        self._writer = None
+
+    def write(self, frame_idx, frame, rows):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            h, w = frame.shape[:2]
+            self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (w, h))
+        self._writer.write(draw_rows(frame, rows, self.class_names))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()